@@ -0,0 +1,119 @@
+import argparse
+import sqlite3
+
+EAN13 = 'ean13'
+EAN8 = 'ean8'
+UPCA = 'upca'
+GS1_VARIABLE = 'gs1_variable'
+
+ALL_SYMBOLOGIES = (EAN13, EAN8, UPCA, GS1_VARIABLE)
+
+# Symbology of a valid code by its length; 13 digit codes starting with 2 are in-store variable measure codes
+SYMBOLOGY_BY_LENGTH = {13: EAN13, 8: EAN8, 12: UPCA}
+
+
+
+def check_digit(digits):
+    """
+    GS1 mod 10 check digit of a digit string without its check digit.
+    """
+    total = 0
+    for i, char in enumerate(reversed(digits)):
+        total += (ord(char) - 48) * (1 if i % 2 else 3)
+    return (10 - total % 10) % 10
+
+
+def identify(code):
+    """
+    Return the symbology of a valid code, or None when it is not a valid EAN-13, EAN-8, UPC-A or GS1 variable measure code.
+    """
+    length = len(code)
+    if length not in SYMBOLOGY_BY_LENGTH or not code.isascii() or not code.isdigit():
+        return None
+    if check_digit(code[:-1]) != ord(code[-1]) - 48:
+        return None
+    if length == 13 and code[0] == '2':
+        return GS1_VARIABLE
+    return SYMBOLOGY_BY_LENGTH[length]
+
+
+def validate_barcode(code, symbologies=ALL_SYMBOLOGIES):
+    return identify(code) in symbologies
+
+
+def validate_batch(codes, symbologies=ALL_SYMBOLOGIES):
+    """
+    Validate many codes at once. Returns a bool array, one entry per code.
+
+    Codes are grouped by length and checked as (n, length) digit matrices, so
+    the check digits of a whole table cost a handful of NumPy operations.
+    """
+    # NumPy is only loaded for batch checks, not on the collector's startup path
+    import numpy as np
+    codes = list(codes)
+    valid = np.zeros(len(codes), dtype=bool)
+    for length, symbology in SYMBOLOGY_BY_LENGTH.items():
+        wanted = symbology in symbologies or (length == 13 and GS1_VARIABLE in symbologies)
+        if not wanted:
+            continue
+        index = np.fromiter((i for i, code in enumerate(codes) if code and len(code) == length and code.isascii()),
+                            dtype=np.intp)
+        if not index.size:
+            continue
+        raw = ''.join(codes[i] for i in index).encode('ascii')
+        digits = np.frombuffer(raw, dtype=np.uint8).reshape(-1, length).astype(np.int32) - 48
+        ok = ((digits >= 0) & (digits <= 9)).all(axis=1)
+        # GS1 check digit weights, 3 and 1 alternating from the digit left of the check digit
+        weights = np.array([3 if (length - 1 - i) % 2 else 1 for i in range(length - 1)], dtype=np.int32)
+        expected = (10 - (digits[:, :-1] @ weights) % 10) % 10
+        ok &= expected == digits[:, -1]
+        if length == 13:
+            variable = digits[:, 0] == 2
+            if EAN13 not in symbologies:
+                ok &= variable
+            if GS1_VARIABLE not in symbologies:
+                ok &= ~variable
+        valid[index] = ok
+    return valid
+
+
+def parse_symbologies(value):
+    """
+    Parse a comma separated [Barcode] symbologies value.
+    """
+    symbologies = tuple(name.strip().lower() for name in value.split(',') if name.strip())
+    unknown = set(symbologies) - set(ALL_SYMBOLOGIES)
+    if unknown:
+        raise ValueError(f"Unknown barcode symbology: {', '.join(sorted(unknown))}")
+    return symbologies or ALL_SYMBOLOGIES
+
+
+def audit_product_data(db_file, symbologies=ALL_SYMBOLOGIES):
+    """
+    Re-check every barcode in ProductData and return the (id, barcode) rows that fail.
+    """
+    conn = sqlite3.connect(f'file:{db_file}?mode=ro', uri=True)
+    try:
+        rows = conn.execute("SELECT id, Barcode FROM ProductData").fetchall()
+    finally:
+        conn.close()
+    if not rows:
+        return []
+    valid = validate_batch((barcode for _, barcode in rows), symbologies)
+    return [row for row, ok in zip(rows, valid) if not ok]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List ProductData rows whose barcode fails validation.")
+    parser.add_argument('db_file', nargs='?', default='product_data.db')
+    parser.add_argument('--symbologies', default=','.join(ALL_SYMBOLOGIES))
+    args = parser.parse_args(argv)
+
+    invalid = audit_product_data(args.db_file, parse_symbologies(args.symbologies))
+    for row_id, barcode in invalid:
+        print(f"{row_id}\t{barcode}")
+    print(f"{len(invalid)} geçersiz barkod")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Measure stored bytes per image and encode time for image encoding settings.
+
+Runs every combination of format/quality and target width on one frame and
+prints the median encode time (resize included) and the encoded size. Use a
+real capture from the register so the numbers reflect your products:
+
+    python benchmarks/bench_encoding.py captured_images/8690793020082_20240724-100833.jpg
+    python benchmarks/bench_encoding.py photo.jpg --roi 400,200,1200,900 --widths 0,1280,640
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from image_writer import ImageEncoding, crop_roi, parse_roi  # noqa: E402
+
+DEFAULT_SETTINGS = 'jpg:95,jpg:85,jpg:75,webp:90,webp:75,png:95'
+
+
+def synthetic_frame(width=2688, height=1520):
+    """
+    A 4 MP stand-in with smooth gradients, edges and sensor noise, for runs without a capture at hand.
+    """
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:height, 0:width]
+    frame = np.dstack([(x * 255 // width), (y * 255 // height), ((x + y) * 255 // (width + height))]).astype(np.uint8)
+    for _ in range(40):
+        x0, y0 = rng.integers(0, width - 200), rng.integers(0, height - 200)
+        cv2.rectangle(frame, (int(x0), int(y0)), (int(x0) + 180, int(y0) + 120), rng.integers(0, 255, 3).tolist(), -1)
+        cv2.putText(frame, '8690793020082', (int(x0), int(y0) + 60), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 0), 2)
+    noise = rng.normal(0, 4, frame.shape)
+    return np.clip(frame + noise, 0, 255).astype(np.uint8)
+
+
+def measure(frame, encoding, repeats):
+    times = []
+    size = 0
+    for _ in range(repeats):
+        started = time.perf_counter()
+        ok, buffer = cv2.imencode(encoding.extension, encoding.resize(frame), encoding.params())
+        times.append(time.perf_counter() - started)
+        if not ok:
+            return None, None
+        size = buffer.nbytes
+    return statistics.median(times) * 1000, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('image', nargs='?', help="capture to encode; a synthetic 4 MP frame is used without it")
+    parser.add_argument('--roi', default='', help="x,y,width,height crop applied first, as in [Camera] roi")
+    parser.add_argument('--settings', default=DEFAULT_SETTINGS, help="comma separated format:quality pairs")
+    parser.add_argument('--widths', default='0,1920,1280,640', help="max_width values; 0 keeps the full size")
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    frame = cv2.imread(args.image) if args.image else synthetic_frame()
+    if frame is None:
+        parser.error(f"cannot read {args.image}")
+    frame = np.ascontiguousarray(crop_roi(frame, parse_roi(args.roi)))
+    print(f"Kaynak: {frame.shape[1]}x{frame.shape[0]}")
+    print(f"{'format':>6} {'kalite':>6} {'genişlik':>8} {'KB':>9} {'ms':>8}")
+
+    for max_width in (int(width) for width in args.widths.split(',')):
+        for setting in args.settings.split(','):
+            image_format, _, quality = setting.partition(':')
+            encoding = ImageEncoding(image_format, int(quality or 95), max_width)
+            elapsed, size = measure(frame, encoding, args.repeats)
+            if elapsed is None:
+                print(f"{image_format:>6} {quality:>6} {max_width or 'tam':>8} {'desteklenmiyor':>18}")
+                continue
+            print(f"{image_format:>6} {quality:>6} {max_width or 'tam':>8} {size / 1024:>9.1f} {elapsed:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""
+Benchmark KeyBurstDetector thresholds against key traces.
+
+Traces are CSV files of `timestamp,key` rows (seconds, and a character, `enter`
+or a modifier name such as `shift`). Without --trace a synthetic trace is used:
+EAN-13 scans at scanner speed interleaved with, and sometimes typed over by,
+human typing. Record a real trace on the register with --record.
+
+    python benchmarks/bench_hid_input.py
+    python benchmarks/bench_hid_input.py --record trace.csv
+    python benchmarks/bench_hid_input.py --trace trace.csv --expect scans.txt
+"""
+import argparse
+import csv
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from barcodes import validate_barcode  # noqa: E402
+from hid_input import KeyBurstDetector  # noqa: E402
+
+
+def ean13(rng):
+    digits = [rng.randrange(10) for _ in range(12)]
+    checksum = (10 - sum(d * (3 if i % 2 else 1) for i, d in enumerate(digits)) % 10) % 10
+    return ''.join(map(str, digits)) + str(checksum)
+
+
+def synthetic_trace(scans=2000, seed=1, scanner_ms=(2, 9), human_ms=(60, 300), overlap=0.05):
+    """
+    Return (events, expected barcodes). A share of `overlap` scans happen while someone is typing.
+    """
+    rng = random.Random(seed)
+    events = []
+    expected = []
+    t = 0.0
+    for _ in range(scans):
+        # Human typing between scans, ended by Enter now and then
+        for _ in range(rng.randrange(0, 12)):
+            t += rng.uniform(*human_ms) / 1000
+            events.append((t, rng.choice('abcdefghijklmnopqrstuvwxyz0123456789 ')))
+        if rng.random() < 0.3:
+            t += rng.uniform(*human_ms) / 1000
+            events.append((t, 'enter'))
+
+        t += rng.uniform(*human_ms) / 1000
+        barcode = ean13(rng)
+        expected.append(barcode)
+        typed_over = rng.random() < overlap
+        for i, char in enumerate(barcode):
+            t += rng.uniform(*scanner_ms) / 1000
+            events.append((t, char))
+            if typed_over and i == 6:
+                # A human key lands inside the burst; the scan must be rejected, not corrupted
+                events.append((t + 0.0005, 'x'))
+                expected.pop()
+                typed_over = False
+        t += rng.uniform(*scanner_ms) / 1000
+        events.append((t, 'enter'))
+    return events, expected
+
+
+def load_trace(path):
+    with open(path, newline='') as f:
+        return [(float(row[0]), row[1]) for row in csv.reader(f) if row]
+
+
+def record_trace(path):
+    from pynput import keyboard
+
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+
+        def on_press(key):
+            timestamp = time.monotonic()
+            if key == keyboard.Key.enter:
+                name = 'enter'
+            else:
+                name = getattr(key, 'char', None) or getattr(key, 'name', str(key))
+            writer.writerow([f'{timestamp:.6f}', name])
+            if key == keyboard.Key.esc:
+                return False
+
+        print("Kayıt başladı, bitirmek için Esc")
+        with keyboard.Listener(on_press=on_press) as listener:
+            listener.join()
+
+
+def run(events, expected, max_gap_ms, min_length):
+    emitted = []
+    detector = KeyBurstDetector(emitted.append, max_gap=max_gap_ms / 1000, min_length=min_length,
+                                validator=validate_barcode)
+    started = time.perf_counter()
+    for timestamp, key in events:
+        is_enter = key == 'enter'
+        detector.feed_key(key if len(key) == 1 else None, is_enter, timestamp)
+    elapsed = time.perf_counter() - started
+
+    wanted = set(expected)
+    hits = sum(1 for barcode in emitted if barcode in wanted)
+    false_positives = len(emitted) - hits
+    recall = hits / len(expected) if expected else 1.0
+    return recall, false_positives, elapsed / len(events) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--trace', help="CSV trace to replay instead of the synthetic one")
+    parser.add_argument('--expect', help="file with the barcodes really scanned in --trace, one per line")
+    parser.add_argument('--record', help="record a trace from the keyboard to this CSV file")
+    parser.add_argument('--scans', type=int, default=2000)
+    parser.add_argument('--min-length', type=int, default=8)
+    parser.add_argument('--gaps', default='5,10,15,20,30,50,80,120', help="max_gap_ms values to try")
+    args = parser.parse_args()
+
+    if args.record:
+        record_trace(args.record)
+        return
+
+    if args.trace:
+        events = load_trace(args.trace)
+        expected = []
+        if args.expect:
+            with open(args.expect) as f:
+                expected = [line.strip() for line in f if line.strip()]
+    else:
+        events, expected = synthetic_trace(args.scans)
+
+    print(f"{len(events)} tuş, {len(expected)} beklenen barkod")
+    print(f"{'max_gap_ms':>10} {'recall':>8} {'false':>6} {'us/key':>8}")
+    for max_gap_ms in (float(gap) for gap in args.gaps.split(',')):
+        recall, false_positives, per_key = run(events, expected, max_gap_ms, args.min_length)
+        print(f"{max_gap_ms:>10g} {recall:>8.3f} {false_positives:>6} {per_key:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
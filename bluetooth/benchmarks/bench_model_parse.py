@@ -0,0 +1,93 @@
+"""
+Per-line cost of parsing scale lines as the number of [models] grows.
+
+For each model count it times, in microseconds per line:
+
+- parse: the selected model's regex plus the weight conversion, which is what
+  every line costs once a model is chosen, whatever the number of models
+- separate: every model's regex searched on its own, the naive detection
+- combined: one search of the combined alternation used for detection
+  (model_detect.py); it only runs on the first lines after a scale connects
+
+The configured models are padded with synthetic ones up to each count. Use a
+recording of the scale's output to measure real lines:
+
+    python benchmarks/bench_model_parse.py --config config.ini --lines scale_capture.txt
+    python benchmarks/bench_model_parse.py --counts 1,8,64
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from collector import compile_model_regex  # noqa: E402
+from database import parse_weight_kg  # noqa: E402
+from model_detect import CombinedModelRegex  # noqa: E402
+from settings import load_settings  # noqa: E402
+
+DEFAULT_MODELS = {'hrcr': r'/S\s{1,}([0-9.\s]+?)kg$/gm'}
+SAMPLE_LINES = ['S   0.452kg', 'S   0.453kg', 'US  0.448kg', 'ST,GS,+  0.450kg', 'garbage \x02\x03', '']
+
+
+def synthetic_models(count, models):
+    """
+    `models` padded with distinct scale formats up to `count` patterns.
+    """
+    padded = dict(models)
+    index = 0
+    while len(padded) < count:
+        padded[f'synthetic{index}'] = rf'^W{index:02d}[,:]\s*([-+]?[0-9.]+)\s*(?:kg|KG)'
+        index += 1
+    return dict(list(padded.items())[:count])
+
+
+def per_line_us(function, lines, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for line in lines:
+            function(line)
+        best = min(best, time.perf_counter() - started)
+    return best / len(lines) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--config', help="config.ini whose [models] are measured")
+    parser.add_argument('--lines', help="file with recorded scale lines, one per line")
+    parser.add_argument('--counts', default='1,2,4,8,16,32,64', help="model counts to measure")
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    models = load_settings(os.path.abspath(args.config)).models if args.config else DEFAULT_MODELS
+    if args.lines:
+        with open(args.lines, encoding='utf-8', errors='replace') as f:
+            lines = [line.rstrip('\r\n') for line in f]
+    else:
+        lines = SAMPLE_LINES * 200
+
+    print(f"{len(lines)} satır")
+    print(f"{'model':>6} {'parse µs':>9} {'ayrı µs':>9} {'birleşik µs':>12}")
+    for count in (int(count) for count in args.counts.split(',')):
+        model_regex = compile_model_regex(synthetic_models(count, models))
+        selected = next(iter(model_regex.values()))
+        combined = CombinedModelRegex(model_regex)
+
+        def parse(line):
+            match = selected.search(line)
+            return parse_weight_kg(match.group(1)) if match else None
+
+        def separate(line):
+            return {model: match.group(1) for model, regex in model_regex.items()
+                    for match in (regex.search(line),) if match}
+
+        parse_us = per_line_us(parse, lines, args.repeats)
+        separate_us = per_line_us(separate, lines, args.repeats)
+        combined_us = per_line_us(combined.best, lines, args.repeats)
+        print(f"{count:>6} {parse_us:>9.2f} {separate_us:>9.2f} {combined_us:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
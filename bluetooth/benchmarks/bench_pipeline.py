@@ -0,0 +1,288 @@
+"""
+End-to-end scan-to-row latency with simulated devices.
+
+Runs the headless capture pipeline (LaneManager / Collector, the same one the
+window uses) against local stand-ins:
+
+- camera: frames from a video file or synthetic frames, decoded at --fps into
+  the camera worker's ring buffer
+- barcode scanner: a pty serial port the scans are typed into
+- scale: a TCP server streaming readings in the --scale-line format, which
+  must match the chosen [models] regex; the next product's weight follows
+  each scan, so above ~1000/stable_time_ms scans per second the latency
+  includes the stabilizer settling
+
+Scans are sent open loop at each --rates value for --duration seconds. For
+each rate it reports p50/p99 latency from the scan bytes being written to the
+row being committed, and the highest rate that committed every scan within
+--max-p99-ms.
+
+    python benchmarks/bench_pipeline.py --config config.ini --model hrcr
+    python benchmarks/bench_pipeline.py --video sample.mp4 --rates 1,2,4,8 --burst-frames 1
+"""
+import argparse
+import contextlib
+import copy
+import os
+import pty
+import random
+import shutil
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from barcodes import check_digit  # noqa: E402
+from camera_worker import CameraWorker  # noqa: E402
+from collector import LaneManager, make_serial_listener  # noqa: E402
+from settings import LaneSettings, load_settings  # noqa: E402
+from sources import SocketSource  # noqa: E402
+
+
+class SimulatedCamera(CameraWorker):
+    """
+    Camera worker fed from a looping video file, or synthetic frames, at a fixed frame rate.
+    """
+
+    def __init__(self, video=None, fps=25, width=1920, height=1080, buffer_size=8):
+        super().__init__(video or 'simulated', buffer_size=buffer_size)
+        self.video = video
+        self.fps = fps
+        self.size = (width, height)
+
+    def synthetic_frames(self):
+        rng = np.random.default_rng(0)
+        background = rng.integers(0, 255, (self.size[1], self.size[0], 3), dtype=np.uint8)
+        position = 0
+        while True:
+            frame = background.copy()
+            position = (position + 15) % (self.size[0] - 300)
+            cv2.rectangle(frame, (position, 300), (position + 300, 600), (0, 0, 255), -1)
+            yield frame
+
+    def video_frames(self):
+        cap = cv2.VideoCapture(self.video)
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                continue
+            yield frame
+
+    def run(self):
+        self.connected = True
+        frames = self.video_frames() if self.video else self.synthetic_frames()
+        interval = 1.0 / self.fps
+        next_frame = time.monotonic()
+        for frame in frames:
+            if self.stop_event.is_set():
+                break
+            with self.frame_condition:
+                self.frames.append((time.monotonic(), frame))
+                self.frame_condition.notify_all()
+            next_frame += interval
+            self.stop_event.wait(max(0.0, next_frame - time.monotonic()))
+        self.connected = False
+
+
+class ScriptedScale(threading.Thread):
+    """
+    TCP server that streams one reading every `interval` seconds to each client.
+    """
+
+    def __init__(self, line_format, weight=0.452, interval=0.05):
+        super().__init__(daemon=True)
+        self.line_format = line_format
+        self.weight = weight
+        self.rng = random.Random(3)
+        self.interval = interval
+        self.server = socket.create_server(('127.0.0.1', 0))
+        self.address = f"tcp://127.0.0.1:{self.server.getsockname()[1]}"
+        self.stop_event = threading.Event()
+
+    def run(self):
+        self.server.settimeout(0.5)
+        while not self.stop_event.is_set():
+            try:
+                client, _ = self.server.accept()
+            except socket.timeout:
+                continue
+            with client:
+                try:
+                    while not self.stop_event.wait(self.interval):
+                        client.sendall((self.line_format.format(weight=self.weight) + '\r\n').encode())
+                except OSError:
+                    continue
+
+    def next_product(self):
+        """
+        Put the next product on the scale: each weighing is recorded for one scan only.
+        """
+        self.weight = round(self.rng.uniform(0.1, 5.0), 3)
+
+    def stop(self):
+        self.stop_event.set()
+        self.server.close()
+
+
+def unique_barcodes(seed=7):
+    rng = random.Random(seed)
+    while True:
+        digits = '869' + ''.join(rng.choice('0123456789') for _ in range(9))
+        yield digits + str(check_digit(digits))
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class PipelineBench:
+    def __init__(self, settings, model, scale_line, video, fps):
+        self.scanner_fd, scanner_slave = pty.openpty()
+        self.scanner_port = os.ttyname(scanner_slave)
+        self.scale = ScriptedScale(scale_line)
+        self.scale.start()
+
+        settings.lanes = [LaneSettings('bench', serial_port=self.scanner_port, scale_address=self.scale.address,
+                                       scale_model=model, roi=settings.camera_roi,
+                                       encoding=settings.camera_encoding)]
+        self.lanes = LaneManager(settings)
+        self.collector = self.lanes.primary
+        self.collector.camera_worker = SimulatedCamera(video, fps, buffer_size=settings.camera_buffer_size)
+        self.weighed = threading.Event()
+        self.collector.add_listener(self.on_event)
+
+        self.sent = {}
+        self.latencies = {}
+        self.done = threading.Condition()
+
+        self.lanes.start()
+        # Only the scale comes from start_sources; the scanner listener is opened without the keyboard hook
+        self.lanes.sources.append(SocketSource(self.scale.address, self.collector.feed_scale_bytes))
+        self.lanes.sources.append(make_serial_listener(
+            settings, self.scanner_port, lambda barcode: self.collector.submit_barcode(barcode, 'serial'),
+            keyboard_wedge=False))
+        for source in self.lanes.sources:
+            source.start()
+
+    def on_event(self, kind, data):
+        if kind == 'weight' and data['stable']:
+            self.weighed.set()
+        if kind in ('record_inserted', 'record_skipped', 'record_failed', 'capture_failed', 'duplicate_skipped',
+                    'session_expired'):
+            with self.done:
+                sent_at = self.sent.get(data['barcode'])
+                if sent_at is not None and data['barcode'] not in self.latencies:
+                    self.latencies[data['barcode']] = (time.monotonic() - sent_at if kind == 'record_inserted'
+                                                       else None)
+                    self.done.notify_all()
+
+    def wait_for_weight(self, timeout=10.0):
+        if not self.weighed.wait(timeout):
+            raise RuntimeError("Terazi okuması kararlı hale gelmedi; --scale-line modelin regex'i ile eşleşmeli")
+
+    def run_rate(self, rate, duration, barcodes, settle=5.0):
+        sent = []
+        interval = 1.0 / rate
+        next_scan = time.monotonic()
+        end = next_scan + duration
+        while next_scan < end:
+            barcode = next(barcodes)
+            with self.done:
+                self.sent[barcode] = time.monotonic()
+            os.write(self.scanner_fd, (barcode + '\r\n').encode())
+            # The next product settles on the scale while this one is photographed
+            self.scale.next_product()
+            sent.append(barcode)
+            next_scan += interval
+            time.sleep(max(0.0, next_scan - time.monotonic()))
+
+        with self.done:
+            self.done.wait_for(lambda: all(barcode in self.latencies for barcode in sent), settle)
+            results = [self.latencies.get(barcode) for barcode in sent]
+        latencies = [value * 1000 for value in results if value is not None]
+        return len(sent), latencies
+
+    def stop(self):
+        self.lanes.stop()
+        self.scale.stop()
+        os.close(self.scanner_fd)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--config', help="config.ini whose settings are benchmarked; device addresses are replaced")
+    parser.add_argument('--model', default='hrcr', help="[models] entry the scale readings are parsed with")
+    parser.add_argument('--scale-line', default='S   {weight:.3f}kg', help="reading format sent by the fake scale")
+    parser.add_argument('--video', help="video file used as the camera; synthetic 1080p frames without it")
+    parser.add_argument('--fps', type=float, default=25)
+    parser.add_argument('--rates', default='0.5,1,2,4,8', help="scans per second to try, in order")
+    parser.add_argument('--duration', type=float, default=10, help="seconds per rate")
+    parser.add_argument('--max-p99-ms', type=float, default=1000, help="p99 a rate must stay under to be sustainable")
+    parser.add_argument('--burst-frames', type=int, help="override [Camera] burst_frames")
+    parser.add_argument('--burst-ms', type=int, help="override [Camera] burst_window_ms")
+    parser.add_argument('--db-backend', choices=('sqlite', 'segment_log'), help="override [Database] backend")
+    parser.add_argument('--verbose', action='store_true', help="keep the pipeline's own log output")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench-pipeline-')
+    config = os.path.abspath(args.config) if args.config else None
+    if config is None:
+        config = os.path.join(workdir, 'config.ini')
+        with open(config, 'w') as f:
+            f.write("[Camera]\nip_address =\nusername =\npassword =\n[SerialPort]\nport =\n"
+                    "[models]\nhrcr = /S\\s{1,}([0-9.\\s]+?)kg$/gm\n[devmode]\non = 0\n")
+    # load_settings returns a cached instance; the bench overrides go on a copy
+    settings = copy.copy(load_settings(config))
+    # Images and the database go to a scratch directory
+    os.chdir(workdir)
+    settings.db_file = os.path.join(workdir, 'product_data.db')
+    settings.db_segment_dir = os.path.join(workdir, 'product_data_segments')
+    settings.dedupe_mode = 'off'
+    if args.burst_frames is not None:
+        settings.burst_frames = args.burst_frames
+    if args.burst_ms is not None:
+        settings.burst_window_ms = args.burst_ms
+    if args.db_backend:
+        settings.db_backend = args.db_backend
+
+    log = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(open(os.devnull, 'w'))
+    results = []
+    with log:
+        bench = PipelineBench(settings, args.model, args.scale_line, args.video, args.fps)
+        try:
+            bench.wait_for_weight()
+            barcodes = unique_barcodes()
+            for rate in (float(rate) for rate in args.rates.split(',')):
+                sent, latencies = bench.run_rate(rate, args.duration, barcodes)
+                results.append((rate, sent, latencies))
+                if len(latencies) < sent:
+                    break
+        finally:
+            bench.stop()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"burst_frames={settings.burst_frames} burst_window_ms={settings.burst_window_ms} "
+          f"db_backend={settings.db_backend} db_batch_window_ms={settings.db_batch_window_ms} "
+          f"writer_workers={settings.writer_workers}")
+    print(f"{'tarama/sn':>9} {'gönderilen':>10} {'kaydedilen':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    sustainable = 0
+    for rate, sent, latencies in results:
+        p50 = statistics.median(latencies) if latencies else float('nan')
+        p99 = percentile(latencies, 0.99) if latencies else float('nan')
+        print(f"{rate:>9g} {sent:>10} {len(latencies):>10} {p50:>8.1f} {p99:>8.1f}")
+        if len(latencies) == sent and p99 <= args.max_p99_ms:
+            sustainable = rate
+    print(f"Sürdürülebilir en yüksek hız: {sustainable:g} tarama/sn")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+import collections
+import threading
+import time
+
+from metrics import REGISTRY
+
+
+class CameraWorker(threading.Thread):
+    """
+    Keep the RTSP session open and decode frames into a small ring buffer of
+    (monotonic timestamp, frame) entries so captures never wait on the network.
+    """
+
+    def __init__(self, rtsp_url, buffer_size=8, warmup_frames=2, reconnect_delay=1.0,
+                 max_reconnect_delay=30.0, max_read_failures=5, name='camera'):
+        super().__init__(daemon=True)
+        self.rtsp_url = rtsp_url
+        self.warmup_frames = warmup_frames
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.max_read_failures = max_read_failures
+
+        self.frames = collections.deque(maxlen=max(1, buffer_size))
+        self.frame_condition = threading.Condition()
+        self.stop_event = threading.Event()
+        self.connected = False
+        self.reconnect_count = 0
+
+        # Labelled by name; the URL carries the camera password
+        self.connect_time = REGISTRY.histogram('camera_connect_seconds', "Time to open the RTSP session",
+                                               camera=name)
+        self.read_time = REGISTRY.histogram('camera_frame_read_seconds', "Time to receive and decode one frame",
+                                            camera=name)
+        self.reconnects = REGISTRY.counter('camera_reconnects', "RTSP sessions that dropped", camera=name)
+
+    def run(self):
+        # Imported here, on the worker thread, so loading OpenCV does not hold up the window
+        import cv2
+        delay = self.reconnect_delay
+        while not self.stop_event.is_set():
+            with self.connect_time.time():
+                cap = cv2.VideoCapture(self.rtsp_url)
+            # Keep the driver side buffer short so decoded frames are as fresh as possible
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+            if not cap.isOpened():
+                cap.release()
+                print(f"Kamera açılamadı, {delay:.1f} sn sonra tekrar denenecek")
+                self.stop_event.wait(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+                continue
+
+            print("Kamera bağlantısı kuruldu")
+            self.connected = True
+            delay = self.reconnect_delay
+            self.read_frames(cap)
+            cap.release()
+            self.connected = False
+
+            with self.frame_condition:
+                self.frames.clear()
+
+            if not self.stop_event.is_set():
+                self.reconnect_count += 1
+                self.reconnects.inc()
+                print(f"Kamera bağlantısı koptu, {delay:.1f} sn sonra yeniden bağlanılacak")
+                self.stop_event.wait(delay)
+
+    def read_frames(self, cap):
+        """
+        Decode frames until the stream drops or the worker is stopped.
+        """
+        failures = 0
+        skipped = 0
+        while not self.stop_event.is_set():
+            started = time.monotonic()
+            ret, frame = cap.read()
+            if not ret:
+                failures += 1
+                if failures >= self.max_read_failures:
+                    return
+                continue
+            failures = 0
+            self.read_time.observe(time.monotonic() - started)
+
+            # The first frames after connecting are often stale or half-decoded keyframes
+            if skipped < self.warmup_frames:
+                skipped += 1
+                continue
+
+            with self.frame_condition:
+                self.frames.append((time.monotonic(), frame))
+                self.frame_condition.notify_all()
+
+    def get_frames(self, start, end, max_frames=5, timeout=0.2):
+        """
+        Return up to `max_frames` (timestamp, frame) entries decoded between the
+        monotonic times `start` and `end`, spread evenly over the window.
+
+        Waits until a frame at or after `end` has been decoded, or `timeout`
+        seconds past `end`. Falls back to the frame closest to `start` when the
+        window holds none.
+        """
+        with self.frame_condition:
+            self.frame_condition.wait_for(
+                lambda: self.stop_event.is_set() or (self.frames and self.frames[-1][0] >= end),
+                max(0.0, end - time.monotonic()) + timeout)
+            if not self.frames:
+                return []
+            window = [entry for entry in self.frames if start <= entry[0] <= end]
+            if not window:
+                return [min(self.frames, key=lambda entry: abs(entry[0] - start))]
+        if len(window) > max_frames:
+            step = len(window) / max_frames
+            window = [window[int(i * step)] for i in range(max_frames)]
+        return window
+
+    def stop(self):
+        self.stop_event.set()
+        with self.frame_condition:
+            self.frame_condition.notify_all()
@@ -0,0 +1,149 @@
+import collections
+import itertools
+import time
+
+SCANNED = 'scanned'
+WEIGHED = 'weighed'
+PHOTOGRAPHED = 'photographed'
+COMMITTED = 'committed'
+EXPIRED = 'expired'
+FAILED = 'failed'
+
+# How the missing parts of a session are named in the logs
+PART_NAMES = {'weight': "ağırlık", 'photo': "fotoğraf"}
+
+
+class CaptureSession:
+    """
+    One scan on its way to a database row: scanned -> weighed (a stable weight
+    is bound) -> photographed (its photo is on disk) -> committed.
+
+    The photo is often written before the scale settles; it is kept and the
+    session moves on to photographed as soon as the weight arrives. A session
+    issues at most one database write and ends as committed, expired (not
+    complete before its deadline) or failed.
+    """
+
+    ids = itertools.count(1)
+
+    def __init__(self, barcode, source, scan_time, timeout):
+        self.id = next(self.ids)
+        self.barcode = barcode
+        self.source = source
+        self.scan_time = scan_time
+        self.deadline = scan_time + timeout
+        self.state = SCANNED
+        self.weight = None
+        self.weight_kg = None
+        self.photo_path = None
+        self.capture = {}
+        self.write_submitted = False
+
+    @property
+    def closed(self):
+        return self.state in (COMMITTED, EXPIRED, FAILED)
+
+    @property
+    def ready(self):
+        """
+        True once the row can be written, which happens only once.
+        """
+        return self.state == PHOTOGRAPHED and not self.write_submitted
+
+    def bind_weight(self, weight, weight_kg):
+        self.weight = weight
+        self.weight_kg = weight_kg
+        self.advance()
+
+    def bind_photo(self, photo_path, capture):
+        self.photo_path = photo_path
+        self.capture = capture
+        self.advance()
+
+    def advance(self):
+        if self.state == SCANNED and self.weight is not None:
+            self.state = WEIGHED
+        if self.state == WEIGHED and self.photo_path is not None:
+            self.state = PHOTOGRAPHED
+
+    def missing(self):
+        return [part for part, value in (('weight', self.weight), ('photo', self.photo_path)) if value is None]
+
+    def __repr__(self):
+        return f"<CaptureSession {self.id} {self.barcode} {self.state}>"
+
+
+class SessionTracker:
+    """
+    The open capture sessions of one lane, oldest first.
+
+    Each stable weighing (one settled run of the stabilizer) is bound to one
+    session only: the oldest open session still waiting for a weight. A
+    product left on the scale can therefore not be paired with the next scan
+    too; that scan waits for its own weighing. Sessions that are not complete
+    within `timeout` seconds of their scan expire, and at most `max_open`
+    sessions are kept, so a scanner ahead of the scale cannot grow the list.
+    """
+
+    def __init__(self, timeout=10.0, max_open=8):
+        self.timeout = timeout
+        self.max_open = max(1, max_open)
+        self.sessions = collections.OrderedDict()
+        self.bound_runs = collections.deque(maxlen=16)
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def open(self, barcode, source, scan_time):
+        """
+        Start a session. Returns (session, sessions dropped to make room).
+        """
+        # Sessions whose row is being written are left to finish
+        waiting = [session for session in self.sessions.values() if not session.write_submitted]
+        dropped = waiting[:max(0, len(self.sessions) + 1 - self.max_open)]
+        for session in dropped:
+            self.close(session, EXPIRED)
+        session = CaptureSession(barcode, source, scan_time, self.timeout)
+        self.sessions[session.id] = session
+        return session, dropped
+
+    def bind_weight(self, weight, weight_kg, run):
+        """
+        Bind a stable weight to the oldest session waiting for one. `run`
+        identifies the settled run, so repeated stable readings of the same
+        weighing bind only once. Returns the session, or None.
+        """
+        if run in self.bound_runs:
+            return None
+        for session in self.sessions.values():
+            if session.weight is None:
+                self.bound_runs.append(run)
+                session.bind_weight(weight, weight_kg)
+                return session
+        return None
+
+    def close(self, session, state):
+        session.state = state
+        self.sessions.pop(session.id, None)
+
+    def time_to_deadline(self, now=None):
+        """
+        Seconds until the next session expires, or None when none is open.
+        """
+        deadlines = [session.deadline for session in self.sessions.values() if not session.write_submitted]
+        if not deadlines:
+            return None
+        now = time.monotonic() if now is None else now
+        return max(0.0, min(deadlines) - now)
+
+    def expire(self, now=None):
+        """
+        Close and return the sessions whose deadline has passed. A session
+        whose row is already being written is left to finish.
+        """
+        now = time.monotonic() if now is None else now
+        expired = [session for session in self.sessions.values()
+                   if session.deadline <= now and not session.write_submitted]
+        for session in expired:
+            self.close(session, EXPIRED)
+        return expired
@@ -0,0 +1,669 @@
+import argparse
+import multiprocessing
+import os
+import queue
+import re
+import signal
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from barcodes import validate_barcode
+from camera_worker import CameraWorker
+from capture_session import COMMITTED, FAILED, PART_NAMES, SessionTracker
+from database import SQLiteManager, current_capture_time, parse_weight_kg
+from device_cache import DeviceCache, device_address, is_bluetooth_address
+from hid_input import KeyBurstDetector
+from image_store import make_image_store
+from image_writer import ImageWriterPool, crop_roi
+from metrics import REGISTRY, MetricsServer, SnapshotWriter
+from model_detect import ModelDetector
+from phash import DuplicateIndex, dhash, hash_to_hex
+from settings import load_settings
+from segment_log import SegmentLogManager
+from sharpness import pick_sharpest
+from sources import SerialListener, SocketSource
+from stream_framer import StreamFramer
+from weight_stabilizer import WeightStabilizer
+
+
+def compile_model_regex(models):
+    """
+    Compile the [models] patterns, dropping the JavaScript style slashes and flags.
+    """
+    model_regex = {}
+    for model, regex_pattern in models.items():
+        if regex_pattern:
+            # Only a /.../flags wrapper is removed; a bare pattern may itself end in 'g' or 'm' (kg)
+            wrapped = re.fullmatch(r'/(.*)/[a-z]*', regex_pattern.strip(), re.DOTALL)
+            model_regex[model.lower()] = re.compile(wrapped.group(1) if wrapped else regex_pattern)
+    return model_regex
+
+
+def make_burst_detector(settings, on_barcode):
+    """
+    Keyboard-wedge burst detector configured from the [Keyboard] section.
+    """
+    return KeyBurstDetector(on_barcode,
+                            max_gap=settings.keyboard_max_gap_ms / 1000,
+                            min_length=settings.keyboard_min_length,
+                            max_length=settings.keyboard_max_length,
+                            validator=lambda code: validate_barcode(code, settings.barcode_symbologies))
+
+
+def make_serial_listener(settings, port, on_barcode, keyboard_wedge=True):
+    """
+    Serial scanner listener with the [SerialPort] line settings and [Keyboard] burst detection.
+    """
+    return SerialListener(port, on_barcode, keyboard_wedge=keyboard_wedge,
+                          burst_detector=make_burst_detector(settings, on_barcode),
+                          baudrate=settings.serial_baudrate,
+                          parity=settings.serial_parity,
+                          bytesize=settings.serial_bytesize,
+                          stopbits=settings.serial_stopbits,
+                          terminator=settings.serial_terminator,
+                          max_buffer=settings.framing_max_buffer)
+
+
+def make_storage_backend(settings):
+    """
+    Record storage selected by [Database] backend.
+    """
+    if settings.db_backend == 'segment_log':
+        return SegmentLogManager(settings.db_segment_dir, settings.db_file,
+                                 max_bytes=settings.db_segment_max_bytes,
+                                 fsync_interval=settings.db_fsync_interval_ms / 1000.0,
+                                 batch_size=settings.db_batch_size)
+    if settings.db_backend != 'sqlite':
+        raise ValueError(f"Unknown database backend: {settings.db_backend}")
+    return SQLiteManager(settings.db_file,
+                         batch_size=settings.db_batch_size,
+                         batch_window=settings.db_batch_window_ms / 1000.0,
+                         synchronous=settings.db_synchronous)
+
+
+class Collector(threading.Thread):
+    """
+    GUI independent collection pipeline of one lane: sources -> parsers -> capture -> sink.
+
+    Device input (raw scale bytes, barcodes) is posted to a queue and handled on
+    this thread, so sources never wait on parsing, the camera or the database.
+    Everything that happens is reported to listeners as `listener(kind, data)`
+    calls, with the lane name in `data['lane']`; listeners run on the collector
+    thread and must not block.
+
+    Each valid scan opens a capture session (capture_session.py) that collects
+    its stable weight and its photo and writes one row once it has both.
+
+    Events: scale_line, weight, invalid_weight, no_model, model_detected, model_unknown, barcode, invalid_barcode,
+    capture_failed, duplicate_skipped, photo_saved, photo_failed, record_inserted,
+    record_skipped, record_failed, session_expired.
+    """
+
+    def __init__(self, settings, lane, db_manager, image_writer, camera_worker=None, duplicate_index=None,
+                 image_store=None):
+        super().__init__(daemon=True, name=f'collector-{lane.name}')
+        self.settings = settings
+        self.lane = lane
+        self.db_manager = db_manager
+        self.image_writer = image_writer
+        self.duplicate_index = duplicate_index
+        self.image_store = image_store or make_image_store(settings.image_store_layout, settings.image_store_root)
+        self.events = queue.Queue()
+        self.listeners = []
+
+        self.model_regex = compile_model_regex(settings.models)
+        self.scale_model = None
+        self.scale_regex = None
+        self.model_detector = None
+        self.detect_lines = []
+        if lane.scale_model in self.model_regex:
+            # The thread does not run yet, so the configured model is applied directly
+            self.handle_set_model(lane.scale_model)
+        elif lane.scale_model:
+            print("Regex pattern not found for the selected model")
+
+        self.scale_framer = StreamFramer(settings.scale_framing, settings.framing_max_buffer)
+        self.barcode_framer = StreamFramer(settings.barcode_framing, settings.framing_max_buffer)
+        self.stabilizer = WeightStabilizer(window_size=settings.stabilizer_window,
+                                           tolerance=settings.stabilizer_tolerance,
+                                           stable_time=settings.stabilizer_time_ms / 1000.0,
+                                           max_slope=settings.stabilizer_max_slope,
+                                           min_weight=settings.stabilizer_min_weight)
+
+        # Each lane has its own camera worker so a slow camera only delays its own lane
+        self.camera_worker = camera_worker
+        if camera_worker is None and lane.rtsp_url:
+            self.camera_worker = CameraWorker(lane.rtsp_url, buffer_size=settings.camera_buffer_size, name=lane.name)
+        # Waiting for a burst and scoring it takes burst_window_ms or more; it must not hold up the lane's input
+        self.capture_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix=f'capture-{lane.name}')
+
+        self.frame_wait = REGISTRY.histogram('capture_frame_wait_seconds', "Scan to burst frames available",
+                                             lane=lane.name)
+        self.scan_to_row = REGISTRY.histogram('scan_to_row_seconds', "Scan to committed database row",
+                                              lane=lane.name)
+        self.invalid_barcodes = REGISTRY.counter('invalid_barcodes', "Scans rejected by the barcode check",
+                                                 lane=lane.name)
+        self.regex_mismatches = REGISTRY.counter('regex_mismatches', "Scale lines the model regex did not match",
+                                                 lane=lane.name)
+        self.capture_failures = REGISTRY.counter('capture_failures', "Scans that got no photo", lane=lane.name)
+        self.sessions_expired = REGISTRY.counter('sessions_expired', "Scans that got no row before their timeout",
+                                                 lane=lane.name)
+        REGISTRY.gauge('collector_queue_depth', "Events waiting for the lane's pipeline thread",
+                       callback=self.events.qsize, lane=lane.name)
+
+        # Pairing state, only touched on the collector thread
+        self.sessions = SessionTracker(settings.session_timeout_ms / 1000.0, settings.session_max_open)
+        self.stable_run = None  # (weight, weight_kg, run) of the settled weighing on the scale
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def notify(self, kind, **data):
+        data['lane'] = self.lane.name
+        for listener in self.listeners:
+            try:
+                listener(kind, data)
+            except Exception as e:
+                print(f"Collector listener error ({kind}): {e}")
+
+    # Inputs, safe to call from any thread
+
+    def feed_scale_bytes(self, data):
+        self.events.put(('scale_bytes', (bytes(data), time.monotonic())))
+
+    def feed_barcode_bytes(self, data, source):
+        self.events.put(('barcode_bytes', (bytes(data), source, time.monotonic())))
+
+    def submit_barcode(self, barcode_data, source, scan_time=None):
+        self.events.put(('barcode', (barcode_data.strip(), source, scan_time or time.monotonic())))
+
+    def set_scale_model(self, model):
+        """
+        Select the regex used to parse scale lines; it takes effect on the
+        collector thread. Returns False for unknown models.
+        """
+        model = model.lower()
+        if model not in self.model_regex:
+            print("Regex pattern not found for the selected model")
+            return False
+        self.events.put(('set_model', (model,)))
+        return True
+
+    def reset_scale(self):
+        self.events.put(('reset_scale', ()))
+
+    def detect_scale_model(self):
+        """
+        Pick the model from the next scale lines instead of a configured one.
+        """
+        self.events.put(('detect_model', ()))
+
+    # Pipeline, runs on the collector thread
+
+    def run(self):
+        if self.camera_worker and not self.camera_worker.is_alive():
+            self.camera_worker.start()
+
+        handlers = {
+            'scale_bytes': self.handle_scale_bytes,
+            'barcode_bytes': self.handle_barcode_bytes,
+            'barcode': self.handle_barcode,
+            'frames_ready': self.handle_frames_ready,
+            'photo_written': self.handle_photo_written,
+            'record_written': self.handle_record_written,
+            'reset_scale': self.handle_reset_scale,
+            'set_model': self.handle_set_model,
+            'detect_model': self.handle_detect_model,
+        }
+        while True:
+            # Wake up for the next session deadline even when no device sends anything
+            try:
+                kind, args = self.events.get(timeout=self.sessions.time_to_deadline())
+            except queue.Empty:
+                self.expire_sessions()
+                continue
+            if kind == 'stop':
+                break
+            try:
+                handlers[kind](*args)
+            except Exception as e:
+                print(f"Collector error while handling {kind}: {e}")
+            self.expire_sessions()
+
+    def expire_sessions(self):
+        for session in self.sessions.expire():
+            self.session_expired(session)
+
+    def session_expired(self, session):
+        missing = session.missing()
+        print(f"Eşleşme zaman aşımı ({session.barcode}): {', '.join(PART_NAMES[part] for part in missing)} yok")
+        self.sessions_expired.inc()
+        self.notify('session_expired', barcode=session.barcode, missing=missing, path=session.photo_path)
+
+    def handle_reset_scale(self):
+        self.scale_framer.reset()
+        self.stabilizer.reset()
+        self.stable_run = None
+
+    def handle_scale_bytes(self, data, received_at):
+        for line in self.scale_framer.feed(data):
+            self.handle_scale_line(line, received_at)
+
+    def handle_set_model(self, model):
+        # A model picked by hand also ends a detection in progress
+        self.scale_model = model
+        self.scale_regex = self.model_regex[model]
+        self.model_detector = None
+        self.detect_lines = []
+        print(f"Selected model ({self.lane.name}): {model}")
+        print(f"Regex pattern: {self.scale_regex}")
+
+    def handle_detect_model(self):
+        self.scale_model = None
+        self.scale_regex = None
+        self.detect_lines = []
+        self.model_detector = ModelDetector(self.model_regex, self.settings.model_detect_lines,
+                                            self.settings.model_detect_min_share)
+        print(f"Terazi modeli algılanıyor ({self.lane.name})")
+
+    def handle_scale_line(self, line, received_at):
+        self.notify('scale_line', line=line)
+        if self.model_detector:
+            self.detect_model_line(line, received_at)
+        else:
+            self.parse_scale_line(line, received_at)
+
+    def detect_model_line(self, line, received_at):
+        detector = self.model_detector
+        self.detect_lines.append((line, received_at))
+        model = detector.feed(line)
+        if not detector.done:
+            return
+
+        lines, self.detect_lines = self.detect_lines, []
+        self.model_detector = None
+        if model is None:
+            print(f"Terazi modeli algılanamadı ({self.lane.name}): {detector.scores}")
+            self.notify('model_unknown', lines=detector.lines, scores=detector.scores)
+            return
+        self.handle_set_model(model)
+        self.notify('model_detected', model=model, lines=detector.lines, score=detector.scores[model])
+        # The sampled lines are parsed with the detected model, so their readings are not lost
+        for sampled_line, sampled_at in lines:
+            self.parse_scale_line(sampled_line, sampled_at)
+
+    def parse_scale_line(self, line, received_at):
+        if not self.scale_regex:
+            self.notify('no_model', line=line)
+            return
+
+        match = self.scale_regex.search(line)
+        weight_kg = parse_weight_kg(match.group(1)) if match else None
+        if weight_kg is None:
+            self.regex_mismatches.inc()
+            self.notify('invalid_weight', line=line)
+            return
+
+        # Extract the weight value using regex; only a settled reading may be bound to a capture
+        weight = match.group(1).strip()
+        stable = self.stabilizer.add(weight_kg, received_at) is not None
+        self.stable_run = (weight, weight_kg, self.stabilizer.settled_since) if stable else None
+        self.notify('weight', line=line, weight=weight, weight_kg=weight_kg, stable=stable)
+        if stable:
+            self.bind_stable_weight()
+
+    def bind_stable_weight(self):
+        session = self.sessions.bind_weight(*self.stable_run)
+        if session:
+            self.try_commit(session)
+
+    def handle_barcode_bytes(self, data, source, received_at):
+        for line in self.barcode_framer.feed(data):
+            self.handle_barcode(line, source, received_at)
+
+    def handle_barcode(self, barcode_data, source, scan_time):
+        # Misreads fail the check digit here, before they cost a camera capture and a DB write
+        if not validate_barcode(barcode_data, self.settings.barcode_symbologies):
+            print(f"Invalid barcode data: {barcode_data}")
+            self.invalid_barcodes.inc()
+            self.notify('invalid_barcode', barcode=barcode_data, source=source)
+            return
+
+        print(f"Valid barcode data: {barcode_data}")
+        session, dropped = self.sessions.open(barcode_data, source, scan_time)
+        for old in dropped:
+            self.session_expired(old)
+        self.notify('barcode', barcode=barcode_data, source=source)
+        # A product that settled on the scale before it was scanned is weighed already
+        if self.stable_run:
+            self.bind_stable_weight()
+        self.trigger_camera_capture(session)
+
+    def capture_failed(self, session, reason):
+        print(reason)
+        self.capture_failures.inc()
+        self.sessions.close(session, FAILED)
+        self.notify('capture_failed', barcode=session.barcode, reason=reason)
+
+    def trigger_camera_capture(self, session):
+        print(f"Kamera tetiklendi: Barkod - {session.barcode}")
+        if not (self.camera_worker and self.camera_worker.connected):
+            self.capture_failed(session, "Kamera açılamadı")
+            return
+
+        future = self.capture_executor.submit(self.collect_burst, session.scan_time)
+        future.add_done_callback(lambda done: self.events.put(('frames_ready', (session, done))))
+
+    def collect_burst(self, scan_time):
+        """
+        Runs on a capture thread. The product may still be moving at scan time:
+        take a short burst and keep the sharpest frame. Returns (frame,
+        sharpness, dHash or None, the frame's monotonic time), or None when
+        the camera had no frame.
+        """
+        entries = self.camera_worker.get_frames(scan_time, scan_time + self.settings.burst_window_ms / 1000.0,
+                                                max_frames=self.settings.burst_frames)
+        self.frame_wait.observe(time.monotonic() - scan_time)
+        if not entries:
+            return None
+
+        # Only the product region is scored and stored
+        frames = [crop_roi(frame, self.lane.roi) for _, frame in entries]
+        best, sharpness = pick_sharpest(frames, self.settings.sharpness_width)
+        frame = frames[best]
+        # A 9x8 thumbnail hash, so near-identical shots of the same item are caught before encoding
+        photo_hash = dhash(frame) if self.duplicate_index else None
+        return frame, sharpness, photo_hash, entries[best][0]
+
+    def handle_frames_ready(self, session, future):
+        barcode_data = session.barcode
+        if session.closed:
+            print(f"Oturum kapandı, kare kaydedilmedi ({barcode_data})")
+            return
+        try:
+            burst = future.result()
+        except Exception as e:
+            self.capture_failed(session, f"Kamera görüntüsü alınamadı: {e}")
+            return
+        if burst is None:
+            self.capture_failed(session, "Kamera görüntüsü alınamadı")
+            return
+
+        frame, sharpness, photo_hash, frame_time = burst
+        # The row and the file name carry the wall-clock time the frame was taken, not the commit time
+        captured = time.time() - (time.monotonic() - frame_time)
+        capture = {'photo_hash': None, 'duplicate_of': None, 'sharpness': sharpness,
+                   'captured_at': current_capture_time(captured)}
+        filename = self.image_store.path_for(barcode_data, self.lane.name, captured,
+                                             extension=self.lane.encoding.extension)
+        if photo_hash is not None:
+            capture['photo_hash'] = hash_to_hex(photo_hash)
+            # The hash is indexed now, not when the file is written, so the next burst already sees it
+            match = self.duplicate_index.find_or_add(barcode_data, photo_hash, filename)
+            if match:
+                distance, capture['duplicate_of'] = match
+                if self.settings.dedupe_mode == 'skip':
+                    print(f"Benzer fotoğraf zaten var ({distance} bit fark): {capture['duplicate_of']}")
+                    self.sessions.close(session, FAILED)
+                    self.notify('duplicate_skipped', barcode=barcode_data, path=capture['duplicate_of'],
+                                distance=distance)
+                    return
+
+        # Encoding and writing happen on the image writer pool
+        future = self.image_writer.submit(
+            frame, filename,
+            lambda path, error: self.events.put(('photo_written', (session, path, error, capture))),
+            encoding=self.lane.encoding)
+        if future is None:
+            if capture['photo_hash'] and not capture['duplicate_of']:
+                self.duplicate_index.remove(barcode_data, filename)
+            self.capture_failed(session, "Görüntü yazma kuyruğu dolu")
+            return
+
+        metrics = self.image_writer.metrics()
+        if metrics['queue_depth'] >= metrics['queue_capacity'] // 2:
+            print(f"Görüntü yazma kuyruğu: {metrics['queue_depth']}/{metrics['queue_capacity']}")
+
+    def handle_photo_written(self, session, filename, error, capture):
+        barcode_data = session.barcode
+        if error:
+            print(f"Fotoğraf kaydedilemedi ({barcode_data}): {error}")
+            if capture['photo_hash'] and not capture['duplicate_of']:
+                self.duplicate_index.remove(barcode_data, filename)
+            self.sessions.close(session, FAILED)
+            self.notify('photo_failed', barcode=barcode_data, error=str(error))
+            return
+
+        print(f"Fotoğraf kaydedildi: {filename}")
+        self.notify('photo_saved', barcode=barcode_data, path=filename, sharpness=capture['sharpness'])
+        if session.closed:
+            # The session expired while the photo was written; the file stays without a row
+            print(f"Fotoğraf eşleşmedi, oturum kapandı ({barcode_data}): {filename}")
+            return
+        session.bind_photo(filename, capture)
+        # Without a weight yet, the row is written when the session's weighing settles
+        self.try_commit(session)
+
+    def try_commit(self, session):
+        if not session.ready:
+            return
+
+        session.write_submitted = True  # One row per session
+        try:
+            future = self.db_manager.insert_data(session.barcode, session.weight, session.photo_path,
+                                                 scale_model=self.scale_model, lane=self.lane.name,
+                                                 **session.capture)
+        except RuntimeError as e:
+            # The writer thread is gone; the session ends here instead of waiting for a callback
+            future = Future()
+            future.set_exception(e)
+            self.handle_record_written(session, future)
+            return
+        future.add_done_callback(lambda done: self.events.put(('record_written', (session, done))))
+
+    def handle_record_written(self, session, future):
+        data = {'barcode': session.barcode, 'weight': session.weight, 'path': session.photo_path}
+        try:
+            inserted = future.result()
+        except Exception as e:
+            print(f"Insert error: {e}")
+            self.sessions.close(session, FAILED)
+            self.notify('record_failed', error=str(e), **data)
+            return
+        self.sessions.close(session, COMMITTED)
+        if inserted:
+            self.scan_to_row.observe(time.monotonic() - session.scan_time)
+        self.notify('record_inserted' if inserted else 'record_skipped', **data)
+
+    def stop(self):
+        """
+        Stop the camera and the pipeline thread. Shared resources are closed by the LaneManager.
+        """
+        if self.camera_worker:
+            self.camera_worker.stop()
+        # Bursts in progress end with the camera; their frames_ready events are handled before the stop
+        self.capture_executor.shutdown(wait=True)
+        self.events.put(('stop', ()))
+        if self.is_alive():
+            self.join()
+
+    def drain(self):
+        """
+        Give image writes that finished during shutdown their rows.
+        """
+        while not self.events.empty():
+            kind, args = self.events.get()
+            if kind == 'photo_written':
+                self.handle_photo_written(*args)
+
+
+class LaneManager:
+    """
+    Runs one Collector per configured lane in a single process. All lanes share
+    the DB writer and the image writer pool; each lane keeps its own pipeline
+    thread, camera worker and device sources.
+    """
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.db_manager = make_storage_backend(settings)
+        self.image_writer = ImageWriterPool(max_workers=settings.writer_workers,
+                                            max_queue=settings.writer_queue_size,
+                                            use_processes=settings.writer_mode == 'process',
+                                            jpeg_quality=settings.jpeg_quality)
+
+        self.duplicate_index = None
+        if settings.dedupe_mode != 'off':
+            # Filled from the database in start()
+            self.duplicate_index = DuplicateIndex(settings.dedupe_threshold)
+
+        self.image_store = make_image_store(settings.image_store_layout, settings.image_store_root)
+        self.collectors = [Collector(settings, lane, self.db_manager, self.image_writer,
+                                     duplicate_index=self.duplicate_index, image_store=self.image_store)
+                           for lane in settings.lanes]
+        self.sources = []
+        self.metrics_server = None
+        self.metrics_snapshots = None
+
+        # Lanes with a scale but no model use the model remembered for it, or detect one
+        self.device_cache = DeviceCache(settings.device_cache_file).load()
+        for collector in self.collectors:
+            address = collector.lane.scale_address
+            if not address or collector.scale_model:
+                continue
+            model = self.device_cache.model_for(device_address(address))
+            if not (model and collector.set_scale_model(model)) and settings.model_auto_detect:
+                collector.detect_scale_model()
+        self.add_listener(self.remember_detected_model)
+
+    def remember_detected_model(self, kind, data):
+        if kind != 'model_detected':
+            return
+        lane = next(collector.lane for collector in self.collectors if collector.lane.name == data['lane'])
+        if lane.scale_address:
+            address = device_address(lane.scale_address)
+            # Recorded as the lane's scale, so the window does not offer it for its own lane
+            self.device_cache.set_model(address, data['model'], lane=lane.name)
+
+    @property
+    def primary(self):
+        return self.collectors[0]
+
+    def add_listener(self, listener):
+        for collector in self.collectors:
+            collector.add_listener(listener)
+
+    def start(self):
+        """
+        Open the database and start the pipeline threads. Kept out of __init__ so
+        the window can be shown before migrations and the hash index load run.
+        """
+        self.db_manager.connect()
+        self.db_manager.create_table()
+        if self.duplicate_index:
+            self.duplicate_index.load(self.db_manager.load_photo_hashes())
+        self.db_manager.start_writer()
+        for collector in self.collectors:
+            collector.start()
+        self.start_metrics()
+
+    def start_metrics(self):
+        if self.settings.metrics_port:
+            try:
+                self.metrics_server = MetricsServer(port=self.settings.metrics_port, host=self.settings.metrics_host)
+            except OSError as e:
+                print(f"Metrik sunucusu başlatılamadı: {e}")
+            else:
+                self.metrics_server.start()
+                print(f"Metrikler: http://{self.settings.metrics_host}:{self.metrics_server.port}/metrics")
+        if self.settings.metrics_snapshot_file:
+            self.metrics_snapshots = SnapshotWriter(self.settings.metrics_snapshot_file,
+                                                    self.settings.metrics_snapshot_interval_s)
+            self.metrics_snapshots.start()
+
+    def start_sources(self, include_primary=True, keyboard_wedge=True):
+        """
+        Open the scale and serial scanner configured for each lane. The window
+        connects the primary lane's scanner and Bluetooth scale itself, so it
+        passes include_primary=False; a tcp:// scale of that lane is still opened here.
+        """
+        # A global keyboard hook cannot tell lanes apart, so it is only used with a single lane
+        keyboard_wedge = keyboard_wedge and len(self.collectors) == 1
+        for collector in self.collectors:
+            lane = collector.lane
+            window_lane = collector is self.primary and not include_primary
+            if window_lane:
+                if lane.scale_address and not is_bluetooth_address(lane.scale_address):
+                    self.sources.append(SocketSource(lane.scale_address, collector.feed_scale_bytes))
+                continue
+            if lane.scale_address:
+                self.sources.append(SocketSource(lane.scale_address, collector.feed_scale_bytes))
+            else:
+                print(f"[{lane.name}] terazi adresi tanımlı değil, terazi okunmayacak")
+            if lane.serial_port:
+                self.sources.append(make_serial_listener(
+                    self.settings, lane.serial_port,
+                    lambda barcode, c=collector: c.submit_barcode(barcode, 'serial'),
+                    keyboard_wedge=keyboard_wedge))
+        for source in self.sources:
+            source.start()
+
+    def stop(self):
+        for source in self.sources:
+            source.stop()
+        for source in self.sources:
+            if isinstance(source, SerialListener):
+                source.join(timeout=2)
+                metrics = source.metrics()
+                print(f"Seri port {metrics['port']}: {metrics['bytes_received']} bayt, "
+                      f"{metrics['frames_emitted']} barkod, {metrics['bytes_dropped']} atılan bayt, "
+                      f"{metrics['reconnects']} yeniden bağlantı")
+        for collector in self.collectors:
+            collector.stop()
+        self.image_writer.shutdown(wait=True)
+        for collector in self.collectors:
+            collector.drain()
+        self.db_manager.close()
+        if self.metrics_server:
+            self.metrics_server.stop()
+        if self.metrics_snapshots:
+            # The last snapshot includes everything committed during shutdown
+            self.metrics_snapshots.stop()
+
+
+def print_event(kind, data):
+    if kind in ('scale_line', 'weight'):
+        return
+    details = ', '.join(f"{key}={value}" for key, value in data.items() if key != 'lane')
+    print(f"[{time.strftime('%H:%M:%S')}] {data['lane']} {kind}: {details}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the data collector without a window.")
+    parser.add_argument('--config', default=os.path.join(os.getcwd(), 'config.ini'),
+                        help="path to config.ini")
+    parser.add_argument('--no-keyboard', action='store_true',
+                        help="do not listen for keyboard-wedge barcode scanners")
+    args = parser.parse_args(argv)
+
+    settings = load_settings(args.config)
+    lanes = LaneManager(settings)
+    lanes.add_listener(print_event)
+    lanes.start()
+    lanes.start_sources(keyboard_wedge=not args.no_keyboard)
+
+    stopped = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stopped.set())
+    signal.signal(signal.SIGTERM, lambda *_: stopped.set())
+    print("Collector çalışıyor, durdurmak için Ctrl+C")
+    while not stopped.wait(1.0):
+        pass
+
+    print("Collector durduruluyor")
+    lanes.stop()
+
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()  # Needed for the process pool in the frozen exe
+    main()
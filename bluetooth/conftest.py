@@ -0,0 +1,32 @@
+import copy
+
+import pytest
+
+from settings import load_settings
+
+CONFIG = """[Camera]
+ip_address =
+username =
+password =
+[SerialPort]
+port =
+[models]
+hrcr = /S\\s{1,}([0-9.\\s]+?)kg$/gm
+[devmode]
+on = 0
+"""
+
+
+@pytest.fixture
+def settings(tmp_path, monkeypatch):
+    """
+    Settings of a single lane without devices; the database, images and known devices go to tmp_path.
+    """
+    config = tmp_path / 'config.ini'
+    config.write_text(CONFIG)
+    monkeypatch.chdir(tmp_path)
+    settings = copy.copy(load_settings(str(config)))
+    settings.db_file = str(tmp_path / 'product_data.db')
+    settings.db_segment_dir = str(tmp_path / 'product_data_segments')
+    settings.device_cache_file = str(tmp_path / 'known_devices.json')
+    return settings
@@ -0,0 +1,409 @@
+import abc
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+from metrics import REGISTRY
+
+# A sign only counts when it is not glued to a status prefix such as 'ST-0.450'
+WEIGHT_PATTERN = re.compile(r'(?<![\w.])[-+]?\d+(?:\.\d+)?|\d+(?:\.\d+)?')
+PHOTO_TIMESTAMP_PATTERN = re.compile(r'_(\d{8})-(\d{6})')
+
+
+def parse_weight_kg(weight):
+    """
+    Convert a scale reading such as '0.156', '0. 156' or 'ST - 0,156 kg' to kg.
+    Returns None when no number can be found.
+    """
+    if weight is None:
+        return None
+    if isinstance(weight, (int, float)):
+        return float(weight)
+    match = WEIGHT_PATTERN.search(str(weight).replace(' ', '').replace(',', '.'))
+    return float(match.group(0)) if match else None
+
+
+def capture_time_from_path(photo_path):
+    """
+    Recover the capture time from a '{barcode}_{%Y%m%d-%H%M%S}.jpg' file name.
+    """
+    if not photo_path:
+        return None
+    match = PHOTO_TIMESTAMP_PATTERN.search(os.path.basename(photo_path))
+    if not match:
+        return None
+    date, clock = match.groups()
+    return f"{date[:4]}-{date[4:6]}-{date[6:]} {clock[:2]}:{clock[2:4]}:{clock[4:]}"
+
+
+def current_capture_time(now=None):
+    """
+    CapturedAt text of an epoch time, by default now, with milliseconds.
+    """
+    now = time.time() if now is None else now
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(now)) + f".{int(now % 1 * 1000):03d}"
+
+
+def migrate_create_table(cursor):
+    cursor.execute("""CREATE TABLE IF NOT EXISTS ProductData (
+                       id INTEGER PRIMARY KEY AUTOINCREMENT,
+                       Barcode TEXT,
+                       Weight TEXT,
+                       PhotoPath TEXT
+                   )""")
+
+
+def migrate_typed_schema(cursor):
+    """
+    Rebuild ProductData with a REAL weight in kg, capture time and scale model
+    columns, drop duplicate (Barcode, PhotoPath) rows and add the indexes.
+    """
+    cursor.execute("""CREATE TABLE ProductData_new (
+                       id INTEGER PRIMARY KEY AUTOINCREMENT,
+                       Barcode TEXT NOT NULL,
+                       Weight REAL,
+                       PhotoPath TEXT NOT NULL,
+                       CapturedAt TEXT,
+                       ScaleModel TEXT
+                   )""")
+    cursor.execute("""INSERT INTO ProductData_new (id, Barcode, Weight, PhotoPath, CapturedAt)
+                      SELECT id, Barcode, parse_weight_kg(Weight), PhotoPath, capture_time_from_path(PhotoPath)
+                      FROM ProductData
+                      WHERE id IN (SELECT MIN(id) FROM ProductData
+                                   WHERE Barcode IS NOT NULL AND PhotoPath IS NOT NULL
+                                   GROUP BY Barcode, PhotoPath)""")
+    cursor.execute("SELECT (SELECT COUNT(*) FROM ProductData) - (SELECT COUNT(*) FROM ProductData_new)")
+    dropped = cursor.fetchone()[0]
+    if dropped:
+        print(f"Migration dropped {dropped} duplicate or incomplete rows")
+
+    cursor.execute("DROP TABLE ProductData")
+    cursor.execute("ALTER TABLE ProductData_new RENAME TO ProductData")
+    cursor.execute("CREATE UNIQUE INDEX idx_productdata_barcode_photo ON ProductData (Barcode, PhotoPath)")
+    cursor.execute("CREATE INDEX idx_productdata_barcode_captured ON ProductData (Barcode, CapturedAt)")
+
+
+def migrate_add_lane(cursor):
+    cursor.execute("ALTER TABLE ProductData ADD COLUMN Lane TEXT")
+
+
+def migrate_add_photo_hash(cursor):
+    """
+    Add the perceptual hash of the photo (hex dHash) and the photo path a near duplicate matched.
+    """
+    cursor.execute("ALTER TABLE ProductData ADD COLUMN PhotoHash TEXT")
+    cursor.execute("ALTER TABLE ProductData ADD COLUMN DuplicateOf TEXT")
+
+
+def migrate_add_sharpness(cursor):
+    cursor.execute("ALTER TABLE ProductData ADD COLUMN Sharpness REAL")
+
+
+# Schema migrations, applied in order; PRAGMA user_version holds the last applied version
+MIGRATIONS = [
+    (1, migrate_create_table),
+    (2, migrate_typed_schema),
+    (3, migrate_add_lane),
+    (4, migrate_add_photo_hash),
+    (5, migrate_add_sharpness),
+]
+
+
+# Columns of one captured record, in the order insert_data builds them
+RECORD_COLUMNS = ('Barcode', 'Weight', 'PhotoPath', 'CapturedAt', 'ScaleModel', 'Lane',
+                  'PhotoHash', 'DuplicateOf', 'Sharpness')
+
+# The unique (Barcode, PhotoPath) index replaces the check-then-insert round trip
+INSERT_QUERY = f"""INSERT INTO ProductData ({', '.join(RECORD_COLUMNS)})
+                   VALUES ({', '.join('?' * len(RECORD_COLUMNS))})
+                   ON CONFLICT (Barcode, PhotoPath) DO NOTHING"""
+
+
+class SQLiteWriter(threading.Thread):
+    """
+    Dedicated writer thread that owns its own connection and group-commits
+    queued jobs: several jobs share one transaction, closed when either
+    `batch_size` jobs are collected or `batch_window` seconds have passed.
+
+    A job that raises fails only its own Future. An error outside the jobs
+    (the connection, BEGIN/COMMIT failing with something other than an
+    SQLite error) rolls back, fails every queued Future and ends the thread;
+    submit() raises from then on.
+    """
+
+    def __init__(self, db_file, batch_size=64, batch_window=0.05, synchronous='NORMAL'):
+        super().__init__(daemon=True)
+        self.db_file = db_file
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.synchronous = synchronous
+        self.jobs = queue.Queue()
+        self.stopping = False
+        self.failed = None
+        self.lock = threading.Lock()
+        self.committed_batches = 0
+        self.committed_jobs = 0
+
+        self.commit_time = REGISTRY.histogram('sqlite_commit_seconds', "Time to run and commit one batch")
+        self.batch_jobs = REGISTRY.histogram('sqlite_batch_jobs', "Jobs per committed batch",
+                                             buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256))
+        REGISTRY.gauge('sqlite_queue_depth', "Jobs waiting for the SQLite writer", callback=self.queue_depth)
+
+    def submit(self, job, *args):
+        """
+        Queue `job(cursor, *args)` for the next transaction and return a Future
+        resolving to its return value.
+        """
+        future = Future()
+        with self.lock:
+            if self.failed is not None or (self.ident is not None and not self.is_alive() and not self.stopping):
+                raise RuntimeError(f"SQLite writer is not running: {self.failed}")
+            if self.stopping:
+                future.set_exception(RuntimeError("SQLite writer is stopped"))
+                return future
+            self.jobs.put((future, job, args))
+        return future
+
+    def queue_depth(self):
+        return self.jobs.qsize()
+
+    def run(self):
+        connection = cursor = None
+        batch = []
+        try:
+            connection = sqlite3.connect(self.db_file, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(f"PRAGMA synchronous={self.synchronous}")
+            cursor = connection.cursor()
+
+            while True:
+                item = self.jobs.get()
+                if item is None:
+                    break
+
+                batch = [item]
+                deadline = time.monotonic() + self.batch_window
+                stop_after_batch = False
+                while len(batch) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = self.jobs.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        stop_after_batch = True
+                        break
+                    batch.append(item)
+
+                with self.commit_time.time():
+                    self.commit_batch(connection, cursor, batch)
+                self.batch_jobs.observe(len(batch))
+                batch = []
+                if stop_after_batch:
+                    break
+        except Exception as e:
+            print(f"SQLite writer stopped: {e}")
+            if connection is not None and connection.in_transaction:
+                connection.rollback()
+            self.fail_pending(batch, e)
+        finally:
+            if cursor is not None:
+                cursor.close()
+            if connection is not None:
+                connection.close()
+
+    def fail_pending(self, batch, error):
+        """
+        Fail the batch in progress and everything still queued, so no caller waits forever.
+        """
+        with self.lock:
+            self.failed = error
+            pending = list(batch)
+            while True:
+                try:
+                    item = self.jobs.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None:
+                    pending.append(item)
+        for future, _, _ in pending:
+            if not future.done():
+                future.set_exception(error)
+
+    def commit_batch(self, connection, cursor, batch):
+        results = []
+        try:
+            cursor.execute("BEGIN")
+            for future, job, args in batch:
+                try:
+                    results.append((future, job(cursor, *args), None))
+                except Exception as e:
+                    # A bad row fails its own Future; the rest of the batch is committed
+                    results.append((future, None, e))
+            cursor.execute("COMMIT")
+        except sqlite3.Error as e:
+            print(f"SQLite batch commit error: {e}")
+            if connection.in_transaction:
+                connection.rollback()
+            for future, _, _ in batch:
+                future.set_exception(e)
+            return
+
+        self.committed_batches += 1
+        self.committed_jobs += len(batch)
+        for future, result, error in results:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def stop(self):
+        """
+        Commit everything already queued and stop the thread.
+        """
+        self.stopping = True
+        self.jobs.put(None)
+        if self.is_alive():
+            self.join()
+
+
+class StorageBackend(abc.ABC):
+    """
+    Where captured records go. The collector only calls the methods below;
+    insert_data checks and builds the record, the backend's write_record
+    stores it and returns a Future resolving to True (stored) or False
+    (skipped). `[Database] backend` picks the implementation.
+    """
+
+    backend = None
+
+    def connect(self):
+        pass
+
+    def create_table(self):
+        """
+        Prepare the storage, bringing existing data up to the current format.
+        """
+
+    def start_writer(self):
+        pass
+
+    def load_photo_hashes(self):
+        """
+        Return (barcode, photo hash, photo path) of every hashed record that is not itself a near duplicate.
+        """
+        return []
+
+    def insert_data(self, barcode, weight, photo_path, captured_at=None, scale_model=None, lane=None,
+                    photo_hash=None, duplicate_of=None, sharpness=None):
+        """
+        Queue a record on the writer thread. Returns a Future that resolves to
+        True when the row was inserted and False when it was skipped.
+        """
+        # Check if barcode and photo_path are valid (not empty and not None)
+        if not (barcode and photo_path and photo_path != 'Resim yolu yok'):
+            print("Data not inserted: barcode or photo_path is invalid or empty")
+            future = Future()
+            future.set_result(False)
+            return future
+
+        record = (barcode, parse_weight_kg(weight), photo_path, captured_at or current_capture_time(),
+                  scale_model, lane, photo_hash, duplicate_of, sharpness)
+        return self.write_record(record)
+
+    @abc.abstractmethod
+    def write_record(self, record):
+        """
+        Store one record (values in RECORD_COLUMNS order) and return a Future.
+        """
+
+    def close(self):
+        pass
+
+
+class SQLiteManager(StorageBackend):
+    """
+    Records inserted into the ProductData table, group-committed by an SQLiteWriter.
+    """
+
+    backend = 'sqlite'
+
+    def __init__(self, db_file, batch_size=64, batch_window=0.05, synchronous='NORMAL'):
+        self.db_file = db_file
+        self.connection = None
+        self.cursor = None
+        self.writer = SQLiteWriter(db_file, batch_size, batch_window, synchronous)
+
+    def connect(self):
+        try:
+            self.connection = sqlite3.connect(self.db_file, isolation_level=None)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.create_function('parse_weight_kg', 1, parse_weight_kg)
+            self.connection.create_function('capture_time_from_path', 1, capture_time_from_path)
+            self.cursor = self.connection.cursor()
+            print("SQLite database connected successfully")
+        except sqlite3.Error as e:
+            print(f"SQLite connection error: {e}")
+
+    def create_table(self):
+        """
+        Create the ProductData table or migrate an existing one to the latest schema.
+        """
+        self.migrate()
+
+    def schema_version(self):
+        self.cursor.execute("PRAGMA user_version")
+        return self.cursor.fetchone()[0]
+
+    def migrate(self):
+        version = self.schema_version()
+        for target, migration in MIGRATIONS:
+            if target <= version:
+                continue
+            try:
+                self.cursor.execute("BEGIN IMMEDIATE")
+                migration(self.cursor)
+                self.cursor.execute(f"PRAGMA user_version = {target}")
+                self.cursor.execute("COMMIT")
+                print(f"Database migrated to schema version {target}")
+            except sqlite3.Error as e:
+                self.connection.rollback()
+                print(f"Migration to schema version {target} failed: {e}")
+                return
+        print("Table created successfully")
+
+    def start_writer(self):
+        # A writer that died is not restarted; its submit() reports the error
+        if self.writer.ident is None:
+            self.writer.start()
+
+    def load_photo_hashes(self):
+        self.cursor.execute("""SELECT Barcode, PhotoHash, PhotoPath FROM ProductData
+                               WHERE PhotoHash IS NOT NULL AND DuplicateOf IS NULL""")
+        return self.cursor.fetchall()
+
+    def write_record(self, record):
+        self.start_writer()
+        return self.writer.submit(self._insert_record, record)
+
+    @staticmethod
+    def _insert_record(cursor, record):
+        cursor.execute(INSERT_QUERY, record)
+        if cursor.rowcount == 0:
+            print("Data not inserted: record already exists")
+            return False
+        print("Data inserted successfully")
+        return True
+
+    def close(self):
+        self.writer.stop()
+        if self.cursor:
+            self.cursor.close()
+        if self.connection:
+            self.connection.close()
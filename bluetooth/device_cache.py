@@ -0,0 +1,147 @@
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+
+ROLES = ('scale', 'barcode')
+
+BLUETOOTH_ADDRESS = re.compile(r'[0-9A-F]{2}(?::[0-9A-F]{2}){5}', re.IGNORECASE)
+
+
+def device_address(scale_address):
+    """
+    Cache key of a configured scale address: rfcomm://AA:BB:CC:DD:EE:FF/1 becomes
+    AA:BB:CC:DD:EE:FF, the form the window uses, so both share the remembered model.
+    """
+    scheme, _, target = scale_address.partition('://')
+    if scheme == 'rfcomm':
+        return target.partition('/')[0].upper()
+    return scale_address
+
+
+def is_bluetooth_address(scale_address):
+    """
+    True for an address the window can open with a Bluetooth socket (rfcomm:// or a bare device address).
+    """
+    return BLUETOOTH_ADDRESS.fullmatch(device_address(scale_address)) is not None
+
+
+class DeviceCache:
+    """
+    Bluetooth devices the window has connected to, kept in a JSON file so the
+    next session can connect to them directly instead of running a discovery
+    scan. Each entry holds the address, name, role (scale or barcode), the
+    scale model bound to it, the last RSSI seen and when it last connected.
+
+    The scales of configured lanes are kept too, for their detected model;
+    those entries carry the lane name and are not offered to the window.
+    """
+
+    def __init__(self, path='known_devices.json'):
+        self.path = path
+        self.devices = {}
+        self.lock = threading.Lock()
+
+    def load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                devices = json.load(f)
+        except FileNotFoundError:
+            return self
+        except (OSError, ValueError) as e:
+            print(f"Bilinen cihazlar okunamadı ({self.path}): {e}")
+            return self
+        with self.lock:
+            self.devices = {device['address']: device for device in devices if device.get('address')}
+        return self
+
+    def save(self):
+        with self.lock:
+            data = json.dumps(list(self.devices.values()), indent=1, ensure_ascii=False)
+        directory = os.path.dirname(os.path.abspath(self.path))
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        except OSError as e:
+            print(f"Bilinen cihazlar kaydedilemedi ({self.path}): {e}")
+            return
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(temp_path, self.path)
+        except BaseException as e:
+            # A failed write must not leave a stray temp file next to the cache
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            if not isinstance(e, OSError):
+                raise
+            print(f"Bilinen cihazlar kaydedilemedi ({self.path}): {e}")
+
+    def remember(self, role, address, name='', rssi=None):
+        """
+        Record a successful connection; the device becomes the first choice for its role.
+        An empty name keeps the one already stored.
+        """
+        if role not in ROLES:
+            raise ValueError(f"Unknown device role: {role}")
+        with self.lock:
+            device = self.devices.setdefault(address, {'address': address, 'model': None, 'rssi': None})
+            device['role'] = role
+            device['name'] = name or device.get('name', '')
+            if rssi:
+                device['rssi'] = rssi
+            # A device the window connects to is no longer a lane's own
+            device.pop('lane', None)
+            device['last_connected'] = time.strftime('%Y-%m-%d %H:%M:%S')
+        self.save()
+
+    def update_rssi(self, address, rssi):
+        """
+        Refresh the signal strength of a known device seen during discovery.
+        """
+        with self.lock:
+            device = self.devices.get(address)
+            if device is None or not rssi or device.get('rssi') == rssi:
+                return
+            device['rssi'] = rssi
+        self.save()
+
+    def set_model(self, address, model, lane=None):
+        """
+        Bind a scale model to a device. With `lane`, the device is recorded as
+        that lane's scale, and added if it is not known yet.
+        """
+        with self.lock:
+            device = self.devices.get(address)
+            if device is None:
+                if lane is None:
+                    return
+                device = self.devices[address] = {'address': address, 'name': '', 'role': 'scale',
+                                                  'model': None, 'rssi': None}
+            if device.get('model') == model and (lane is None or device.get('lane') == lane):
+                return
+            device['model'] = model
+            if lane is not None:
+                device['lane'] = lane
+        self.save()
+
+    def model_for(self, address):
+        with self.lock:
+            device = self.devices.get(address)
+            return device.get('model') if device else None
+
+    def __contains__(self, address):
+        with self.lock:
+            return address in self.devices
+
+    def known(self, role):
+        """
+        Bluetooth devices of a role the window can connect to, most recently
+        connected first. Scales owned by a configured lane are left out.
+        """
+        with self.lock:
+            devices = [dict(device) for device in self.devices.values()
+                       if device.get('role') == role and not device.get('lane')
+                       and is_bluetooth_address(device['address'])]
+        return sorted(devices, key=lambda device: device.get('last_connected', ''), reverse=True)
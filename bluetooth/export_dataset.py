@@ -0,0 +1,346 @@
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import struct
+import tarfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from database import SQLiteManager
+
+FORMATS = ('imagenet', 'yolo', 'coco')
+STATE_FILE = 'export_state.json'
+
+
+def iter_pages(db_file, after_id=0, page_size=1000, include_duplicates=False):
+    """
+    Yield ProductData rows in id order, one page at a time, using keyset pagination
+    so every page is an index range scan no matter how far the export has got.
+    Rows flagged as near duplicates of an earlier photo are left out unless
+    `include_duplicates` is set.
+    """
+    conn = sqlite3.connect(f'file:{db_file}?mode=ro', uri=True)
+    try:
+        while True:
+            rows = conn.execute("""SELECT id, Barcode, Weight, PhotoPath, CapturedAt, Lane
+                                   FROM ProductData WHERE id > ? AND (? OR DuplicateOf IS NULL)
+                                   ORDER BY id LIMIT ?""",
+                                (after_id, include_duplicates, page_size)).fetchall()
+            if not rows:
+                return
+            yield [dict(zip(('id', 'barcode', 'weight', 'photo_path', 'captured_at', 'lane'), row)) for row in rows]
+            after_id = rows[-1][0]
+    finally:
+        conn.close()
+
+
+def link_or_copy(source, target):
+    """
+    Hard link `source` to `target`, copying when the two are on different file systems.
+    """
+    if os.path.exists(target):
+        return
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def read_exact(f, size):
+    data = f.read(size)
+    if len(data) < size:
+        raise ValueError("truncated image header")
+    return data
+
+
+def jpeg_size(f):
+    """
+    (width, height) from the frame header of a baseline or progressive JPEG.
+    """
+    while True:
+        marker = read_exact(f, 2)
+        if marker[0] != 0xff:
+            raise ValueError("bad JPEG marker")
+        if marker[1] in (0xd8, 0x01) or 0xd0 <= marker[1] <= 0xd7:
+            continue
+        length = struct.unpack('>H', read_exact(f, 2))[0]
+        if 0xc0 <= marker[1] <= 0xcf and marker[1] not in (0xc4, 0xc8, 0xcc):
+            height, width = struct.unpack('>xHH', read_exact(f, 5))
+            return width, height
+        f.seek(length - 2, os.SEEK_CUR)
+
+
+def png_size(f):
+    # The IHDR chunk always comes first: length, b'IHDR', width, height
+    chunk = read_exact(f, 16)
+    if chunk[4:8] != b'IHDR':
+        raise ValueError("PNG without IHDR")
+    return struct.unpack('>II', chunk[8:16])
+
+
+def webp_size(f):
+    chunk = read_exact(f, 4)
+    header = read_exact(f, 14)
+    if chunk == b'VP8 ':
+        # Lossy: a 3 byte frame tag, the start code, then 14 bit width and height
+        width, height = struct.unpack('<HH', header[10:14])
+        return width & 0x3fff, height & 0x3fff
+    if chunk == b'VP8L':
+        # Lossless: a signature byte, then 14 bit width - 1 and height - 1
+        bits = int.from_bytes(header[5:9], 'little')
+        return (bits & 0x3fff) + 1, ((bits >> 14) & 0x3fff) + 1
+    if chunk == b'VP8X':
+        # Extended: 24 bit canvas width - 1 and height - 1
+        return int.from_bytes(header[8:11], 'little') + 1, int.from_bytes(header[11:14], 'little') + 1
+    raise ValueError("unknown WebP chunk")
+
+
+def image_size(path):
+    """
+    Read (width, height) from the header of a JPEG, PNG or WebP image (the
+    formats the camera can store) without decoding it. Returns None for
+    other, truncated or unreadable files.
+    """
+    try:
+        with open(path, 'rb') as f:
+            signature = f.read(12)
+            if signature[:2] == b'\xff\xd8':
+                f.seek(2)
+                size = jpeg_size(f)
+            elif signature[:8] == b'\x89PNG\r\n\x1a\n':
+                f.seek(8)
+                size = png_size(f)
+            elif signature[:4] == b'RIFF' and signature[8:12] == b'WEBP':
+                size = webp_size(f)
+            else:
+                return None
+    except (OSError, ValueError, struct.error):
+        return None
+    return size if size[0] > 0 and size[1] > 0 else None
+
+
+def sample_key(row):
+    return f"{row['id']:08d}_{row['barcode']}"
+
+
+def export_page(rows, output_dir, image_root, layout, shard_max_bytes):
+    """
+    Export one page of rows. Runs in a pool worker; returns the exported rows
+    and the numbers of missing and unreadable images.
+    """
+    exported = []
+    missing = 0
+    unreadable = 0
+    shard = None
+    shard_part = 0
+    shard_bytes = 0
+
+    try:
+        for row in rows:
+            source = os.path.join(image_root, row['photo_path'])
+            if not os.path.isfile(source):
+                missing += 1
+                continue
+            # A truncated or unknown image would train on garbage and give COCO an empty box
+            row['size'] = image_size(source)
+            if row['size'] is None:
+                unreadable += 1
+                continue
+            name = sample_key(row) + os.path.splitext(source)[1].lower()
+
+            if layout == 'imagenet':
+                link_or_copy(source, os.path.join(output_dir, 'train', row['barcode'], name))
+            elif layout in ('yolo', 'coco'):
+                link_or_copy(source, os.path.join(output_dir, 'images', name))
+            if layout == 'yolo':
+                # No boxes are recorded; the product is framed by the camera, so the label covers the image
+                label = os.path.join(output_dir, 'labels', sample_key(row) + '.txt')
+                os.makedirs(os.path.dirname(label), exist_ok=True)
+                with open(label, 'w') as f:
+                    f.write(f"{row['class_id']} 0.5 0.5 1.0 1.0\n")
+
+            if shard_max_bytes:
+                size = os.path.getsize(source)
+                if shard is None or (shard_bytes and shard_bytes + size > shard_max_bytes):
+                    if shard:
+                        shard.close()
+                    # Shards are named after the first row of the page, so re-runs never overwrite them
+                    shard_name = f"shard-{rows[0]['id']:08d}-{shard_part:03d}.tar"
+                    shard = tarfile.open(os.path.join(output_dir, 'shards', shard_name), 'w')
+                    shard_part += 1
+                    shard_bytes = 0
+                key = sample_key(row)
+                shard.add(source, arcname=key + os.path.splitext(source)[1].lower())
+                meta = json.dumps({field: row[field] for field in ('barcode', 'weight', 'captured_at', 'lane', 'class_id')},
+                                  ensure_ascii=False).encode('utf-8')
+                info = tarfile.TarInfo(key + '.json')
+                info.size = len(meta)
+                shard.addfile(info, io.BytesIO(meta))
+                shard_bytes += size + len(meta)
+
+            exported.append(dict(row, file_name=name))
+    finally:
+        if shard:
+            shard.close()
+    return exported, missing, unreadable
+
+
+class DatasetExporter:
+    """
+    Incremental export of ProductData into a training dataset.
+
+    Layouts: `imagenet` (train/<barcode>/ folders), `yolo` (images/, labels/,
+    classes.txt) or `coco` (images/, annotations.json). With `shard_max_bytes`
+    the images are also packed into tar shards for streaming loaders. Pages
+    are exported in a process pool; the last exported id and the class list
+    are kept in export_state.json so a re-run only handles new rows. Near
+    duplicates flagged by the [Dedupe] check are skipped unless
+    `include_duplicates` is set.
+    """
+
+    def __init__(self, db_file, output_dir, layout='imagenet', image_root='.', page_size=1000, workers=None,
+                 shard_max_bytes=0, include_duplicates=False):
+        if layout not in FORMATS:
+            raise ValueError(f"Unknown export format: {layout}")
+        self.db_file = db_file
+        self.output_dir = output_dir
+        self.layout = layout
+        self.image_root = image_root
+        self.page_size = page_size
+        self.workers = workers or os.cpu_count() or 1
+        self.shard_max_bytes = shard_max_bytes
+        self.include_duplicates = include_duplicates
+        self.state_path = os.path.join(output_dir, STATE_FILE)
+        self.state = self.load_state()
+
+    def load_state(self):
+        if os.path.exists(self.state_path):
+            with open(self.state_path) as f:
+                state = json.load(f)
+            if state.get('layout') != self.layout:
+                raise ValueError(f"{self.output_dir} holds a {state.get('layout')} export")
+            return state
+        return {'layout': self.layout, 'last_id': 0, 'classes': {}, 'exported': 0}
+
+    def save_state(self):
+        temp_path = self.state_path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(self.state, f, ensure_ascii=False)
+        os.replace(temp_path, self.state_path)
+
+    def assign_classes(self, rows):
+        classes = self.state['classes']
+        for row in rows:
+            row['class_id'] = classes.setdefault(row['barcode'], len(classes))
+
+    def run(self):
+        # Older databases lack the Lane and DuplicateOf columns read below
+        manager = SQLiteManager(self.db_file)
+        manager.connect()
+        manager.create_table()
+        manager.close()
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        if self.shard_max_bytes:
+            os.makedirs(os.path.join(self.output_dir, 'shards'), exist_ok=True)
+        coco = self.load_coco() if self.layout == 'coco' else None
+        missing = unreadable = 0
+
+        pages = iter_pages(self.db_file, self.state['last_id'], self.page_size, self.include_duplicates)
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            pending = deque()
+            for rows in pages:
+                self.assign_classes(rows)
+                pending.append((rows[-1]['id'], pool.submit(export_page, rows, self.output_dir, self.image_root,
+                                                            self.layout, self.shard_max_bytes)))
+                # Results are taken in page order, so last_id only moves past pages that are done
+                while len(pending) >= self.workers * 2:
+                    page_missing, page_unreadable = self.finish_page(*pending.popleft(), coco)
+                    missing += page_missing
+                    unreadable += page_unreadable
+            while pending:
+                page_missing, page_unreadable = self.finish_page(*pending.popleft(), coco)
+                missing += page_missing
+                unreadable += page_unreadable
+
+        self.write_class_list()
+        if coco is not None:
+            self.write_coco(coco)
+        self.save_state()
+        print(f"{self.state['exported']} örnek dışa aktarıldı, {len(self.state['classes'])} sınıf, "
+              f"{missing} resim bulunamadı, {unreadable} resim okunamadı")
+        return self.state
+
+    def finish_page(self, last_id, future, coco):
+        exported, missing, unreadable = future.result()
+        if coco is not None:
+            self.add_coco(coco, exported)
+        self.state['last_id'] = last_id
+        self.state['exported'] += len(exported)
+        # annotations.json is only written at the end, so a coco export keeps its progress until then
+        if coco is None:
+            self.save_state()
+        return missing, unreadable
+
+    def write_class_list(self):
+        if self.layout != 'yolo':
+            return
+        names = sorted(self.state['classes'], key=self.state['classes'].get)
+        with open(os.path.join(self.output_dir, 'classes.txt'), 'w') as f:
+            f.write(''.join(f"{name}\n" for name in names))
+
+    def load_coco(self):
+        path = os.path.join(self.output_dir, 'annotations.json')
+        if os.path.exists(path):
+            with open(path) as f:
+                return json.load(f)
+        return {'images': [], 'annotations': [], 'categories': []}
+
+    def add_coco(self, coco, exported):
+        for row in exported:
+            coco['images'].append({'id': row['id'], 'file_name': f"images/{row['file_name']}",
+                                   'barcode': row['barcode'], 'weight': row['weight'],
+                                   'captured_at': row['captured_at'], 'lane': row['lane']})
+            # No boxes are recorded, so the annotation covers the whole image
+            width, height = row['size']
+            coco['images'][-1].update(width=width, height=height)
+            coco['annotations'].append({'id': row['id'], 'image_id': row['id'], 'category_id': row['class_id'],
+                                        'bbox': [0, 0, width, height], 'area': width * height, 'iscrowd': 0})
+
+    def write_coco(self, coco):
+        classes = self.state['classes']
+        coco['categories'] = [{'id': class_id, 'name': name} for name, class_id in
+                              sorted(classes.items(), key=lambda item: item[1])]
+        path = os.path.join(self.output_dir, 'annotations.json')
+        with open(path + '.tmp', 'w') as f:
+            json.dump(coco, f, ensure_ascii=False)
+        os.replace(path + '.tmp', path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export captured products as a training dataset.")
+    parser.add_argument('output_dir')
+    parser.add_argument('--db', default='product_data.db', help="path to product_data.db")
+    parser.add_argument('--format', choices=FORMATS, default='imagenet')
+    parser.add_argument('--image-root', default='.', help="directory the stored photo paths are relative to")
+    parser.add_argument('--page-size', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--shard-mb', type=float, default=0,
+                        help="also pack images into tar shards of at most this many MB")
+    parser.add_argument('--include-duplicates', action='store_true',
+                        help="also export photos flagged as near duplicates of an earlier one")
+    args = parser.parse_args(argv)
+
+    exporter = DatasetExporter(args.db, args.output_dir, args.format, args.image_root, args.page_size,
+                               args.workers, int(args.shard_mb * 1024 * 1024), args.include_duplicates)
+    exporter.run()
+
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+    main()
@@ -0,0 +1,87 @@
+import time
+
+
+class KeyBurstDetector:
+    """
+    Pick keyboard-wedge scanner input out of the global key stream.
+
+    A scanner types a whole barcode in one burst, a few milliseconds per key,
+    and ends it with Enter. Keys further apart than `max_gap` seconds start a new
+    burst, so anything typed at human speed never grows past a character or two
+    and is dropped when Enter arrives. Characters go into a fixed buffer of
+    `max_length`; longer bursts are discarded whole. A burst is emitted only
+    when it is at least `min_length` long and passes `validator`.
+    """
+
+    def __init__(self, on_barcode, max_gap=0.03, min_length=8, max_length=64, validator=None):
+        self.on_barcode = on_barcode
+        self.max_gap = max_gap
+        self.min_length = min_length
+        self.max_length = max_length
+        self.validator = validator
+
+        self.buffer = [''] * max_length
+        self.length = 0
+        self.overflow = False
+        self.last_key_time = None
+
+        self.bursts_emitted = 0
+        self.bursts_rejected = 0
+        self.keys_discarded = 0
+
+    def reset(self):
+        self.keys_discarded += self.length
+        self.length = 0
+        self.overflow = False
+
+    def feed_char(self, char, timestamp=None):
+        if timestamp is None:
+            timestamp = time.monotonic()
+        if self.last_key_time is not None and timestamp - self.last_key_time > self.max_gap:
+            self.reset()
+        self.last_key_time = timestamp
+
+        if self.length == self.max_length:
+            self.overflow = True
+            self.keys_discarded += 1
+            return
+        self.buffer[self.length] = char
+        self.length += 1
+
+    def feed_enter(self, timestamp=None):
+        """
+        End the current burst. Returns the barcode when it was emitted, else None.
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+        in_burst = self.last_key_time is not None and timestamp - self.last_key_time <= self.max_gap
+        self.last_key_time = None
+
+        if not self.length:
+            return None
+        if not in_burst or self.overflow or self.length < self.min_length:
+            self.bursts_rejected += 1
+            self.reset()
+            return None
+
+        barcode = ''.join(self.buffer[:self.length])
+        self.length = 0
+        if self.validator and not self.validator(barcode):
+            self.bursts_rejected += 1
+            self.keys_discarded += len(barcode)
+            return None
+
+        self.bursts_emitted += 1
+        self.on_barcode(barcode)
+        return barcode
+
+    def feed_key(self, char, is_enter, timestamp=None):
+        """
+        Feed one key press; `char` is ignored for Enter and None for other non-character keys.
+        """
+        if is_enter:
+            return self.feed_enter(timestamp)
+        # Modifiers carry no character; scanners press Shift for capital letters, so they are skipped
+        if char:
+            self.feed_char(char, timestamp)
+        return None
@@ -0,0 +1,167 @@
+import argparse
+import hashlib
+import itertools
+import os
+import sqlite3
+import threading
+import time
+
+from database import SQLiteManager
+from image_writer import thumbnail_path
+
+
+class ImageStore:
+    """
+    Decides where a captured image lives. Names carry the barcode, the capture
+    time to the millisecond, the lane and a sequence number, so two captures
+    can never get the same name; subclasses spread them over subdirectories so
+    no single directory grows to millions of entries.
+    """
+
+    layout = 'flat'
+
+    def __init__(self, root='captured_images'):
+        self.root = root
+        self.sequence = itertools.count()
+        self.lock = threading.Lock()
+
+    def file_name(self, barcode, lane, timestamp, extension, unique=None):
+        if unique is None:
+            with self.lock:
+                unique = next(self.sequence)
+        # The _%Y%m%d-%H%M%S part is kept so capture_time_from_path still reads these names
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(timestamp)) + f'-{int(timestamp % 1 * 1000):03d}'
+        return f"{barcode}_{stamp}_{lane}_{unique}{extension}"
+
+    def shard(self, name, timestamp):
+        return ''
+
+    def path_for(self, barcode, lane, timestamp=None, extension='.jpg', unique=None):
+        if timestamp is None:
+            timestamp = time.time()
+        name = self.file_name(barcode, lane, timestamp, extension, unique)
+        return os.path.join(self.root, self.shard(name, timestamp), name)
+
+
+class DateShardedStore(ImageStore):
+    """
+    captured_images/YYYY/MM/DD/name: one directory per day, easy to archive by date.
+    """
+
+    layout = 'date'
+
+    def shard(self, name, timestamp):
+        return time.strftime('%Y/%m/%d', time.localtime(timestamp)).replace('/', os.sep)
+
+
+class HashShardedStore(ImageStore):
+    """
+    captured_images/ab/cd/name with 'abcd' from a hash of the name: 65536 evenly filled directories.
+    """
+
+    layout = 'hash'
+
+    def shard(self, name, timestamp):
+        digest = hashlib.blake2b(name.encode('utf-8'), digest_size=2).hexdigest()
+        return os.path.join(digest[:2], digest[2:])
+
+
+STORE_LAYOUTS = {store.layout: store for store in (ImageStore, DateShardedStore, HashShardedStore)}
+
+
+def make_image_store(layout='flat', root='captured_images'):
+    if layout not in STORE_LAYOUTS:
+        raise ValueError(f"Unknown image store layout: {layout}")
+    return STORE_LAYOUTS[layout](root)
+
+
+def capture_timestamp(captured_at, path):
+    """
+    Epoch seconds of a row's CapturedAt, falling back to the file's modification time.
+    """
+    if captured_at:
+        seconds, _, millis = captured_at.partition('.')
+        try:
+            return time.mktime(time.strptime(seconds, '%Y-%m-%d %H:%M:%S')) + int(millis or 0) / 1000
+        except ValueError:
+            pass
+    return os.path.getmtime(path)
+
+
+def move_file(source, target):
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    os.replace(source, target)
+
+
+def migrate_images(db_file, store, image_root='.', batch_size=500):
+    """
+    Move every image referenced by ProductData into `store`'s layout and rewrite
+    PhotoPath (and DuplicateOf) in batches. The new name uses the row id as
+    its sequence number, so an interrupted run can simply be started again.
+    Run it while the collector is stopped.
+    """
+    manager = SQLiteManager(db_file)
+    manager.connect()
+    manager.create_table()
+    manager.close()
+
+    conn = sqlite3.connect(db_file)
+    moved = missing = 0
+    last_id = 0
+    try:
+        while True:
+            rows = conn.execute("""SELECT id, Barcode, PhotoPath, CapturedAt, Lane FROM ProductData
+                                   WHERE id > ? ORDER BY id LIMIT ?""", (last_id, batch_size)).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            updates = []
+            renamed = []
+            for row_id, barcode, photo_path, captured_at, lane in rows:
+                source = os.path.join(image_root, photo_path)
+                exists = os.path.isfile(source)
+                if not exists and not captured_at:
+                    missing += 1
+                    continue
+                new_path = store.path_for(barcode, lane or 'default', capture_timestamp(captured_at, source),
+                                          os.path.splitext(photo_path)[1].lower() or '.jpg', unique=row_id)
+                if new_path == photo_path:
+                    continue
+                if not exists:
+                    if os.path.isfile(os.path.join(image_root, new_path)):
+                        # Moved by an interrupted run before its batch was committed
+                        updates.append((new_path, row_id))
+                        renamed.append((new_path, photo_path))
+                    else:
+                        missing += 1
+                    continue
+                move_file(source, os.path.join(image_root, new_path))
+                old_thumbnail = os.path.join(image_root, thumbnail_path(photo_path))
+                if os.path.isfile(old_thumbnail):
+                    move_file(old_thumbnail, os.path.join(image_root, thumbnail_path(new_path)))
+                updates.append((new_path, row_id))
+                renamed.append((new_path, photo_path))
+                moved += 1
+
+            # Files of this batch are moved before its rows are rewritten; one transaction per batch
+            with conn:
+                conn.executemany("UPDATE ProductData SET PhotoPath = ? WHERE id = ?", updates)
+                conn.executemany("UPDATE ProductData SET DuplicateOf = ? WHERE DuplicateOf = ?", renamed)
+    finally:
+        conn.close()
+    print(f"{moved} resim taşındı, {missing} resim bulunamadı")
+    return moved, missing
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Move captured images into a sharded layout and update the database.")
+    parser.add_argument('db_file', nargs='?', default='product_data.db')
+    parser.add_argument('--layout', choices=sorted(STORE_LAYOUTS), default='date')
+    parser.add_argument('--root', default='captured_images', help="image store directory")
+    parser.add_argument('--image-root', default='.', help="directory the stored photo paths are relative to")
+    args = parser.parse_args(argv)
+    migrate_images(args.db_file, make_image_store(args.layout, args.root), args.image_root)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,230 @@
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from metrics import REGISTRY
+
+THUMBNAIL_DIR = 'thumbnails'
+
+
+class ImageEncoding:
+    """
+    How a captured frame is stored: format (jpg, webp or png), quality, the
+    largest size the frame is scaled down to (0 keeps it) and the width of
+    the thumbnail written next to it (0 writes none).
+    """
+
+    FORMATS = ('jpg', 'webp', 'png')
+
+    def __init__(self, image_format='jpg', quality=95, max_width=0, max_height=0, thumbnail_width=0):
+        image_format = image_format.lower().lstrip('.').replace('jpeg', 'jpg')
+        if image_format not in self.FORMATS:
+            raise ValueError(f"Unsupported image format: {image_format}")
+        self.image_format = image_format
+        self.quality = quality
+        self.max_width = max_width
+        self.max_height = max_height
+        self.thumbnail_width = thumbnail_width
+
+    @property
+    def extension(self):
+        return '.' + self.image_format
+
+    def params(self):
+        # cv2 takes most of the startup time, so it is imported by the first capture
+        import cv2
+        if self.image_format == 'jpg':
+            return [cv2.IMWRITE_JPEG_QUALITY, self.quality]
+        if self.image_format == 'webp':
+            return [cv2.IMWRITE_WEBP_QUALITY, self.quality]
+        # PNG is lossless; quality 0-100 is mapped onto zlib levels 9-0
+        return [cv2.IMWRITE_PNG_COMPRESSION, max(0, min(9, 9 - self.quality * 9 // 100))]
+
+    def resize(self, frame):
+        height, width = frame.shape[:2]
+        scale = 1.0
+        if self.max_width and width > self.max_width:
+            scale = self.max_width / width
+        if self.max_height and height * scale > self.max_height:
+            scale = self.max_height / height
+        if scale >= 1.0:
+            return frame
+        import cv2
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+
+def parse_roi(value):
+    """
+    Parse an 'x,y,width,height' crop rectangle; an empty value means the whole frame.
+    """
+    if not value or not value.strip():
+        return None
+    parts = [int(part) for part in value.split(',')]
+    if len(parts) != 4 or parts[2] <= 0 or parts[3] <= 0:
+        raise ValueError(f"ROI must be x,y,width,height: {value}")
+    return tuple(parts)
+
+
+def crop_roi(frame, roi):
+    """
+    Crop a frame to the ROI, clamped to the frame. Returns a view, not a copy.
+    """
+    if not roi:
+        return frame
+    x, y, width, height = roi
+    frame_height, frame_width = frame.shape[:2]
+    x, y = max(0, min(x, frame_width - 1)), max(0, min(y, frame_height - 1))
+    return frame[y:min(y + height, frame_height), x:min(x + width, frame_width)]
+
+
+def thumbnail_path(filename):
+    return os.path.join(os.path.dirname(filename), THUMBNAIL_DIR, os.path.basename(filename))
+
+
+def write_atomic(data, filename):
+    directory = os.path.dirname(filename) or '.'
+    os.makedirs(directory, exist_ok=True)
+
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as temp_file:
+            temp_file.write(data)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        os.replace(temp_path, filename)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def encode_and_write_timed(frame, filename, encoding=None):
+    """
+    Scale, encode and write a frame (and its thumbnail) atomically: a temp file
+    in the target directory is fsynced and then renamed over the final name.
+    Returns (encode seconds, write seconds); the timings are returned rather
+    than recorded so they survive the process pool.
+    """
+    import cv2
+    encoding = encoding or ImageEncoding()
+    started = time.monotonic()
+    frame = encoding.resize(frame)
+    extension = os.path.splitext(filename)[1] or encoding.extension
+    ok, buffer = cv2.imencode(extension, frame, encoding.params())
+    if not ok:
+        raise ValueError(f"Görüntü kodlanamadı: {filename}")
+    encoded = time.monotonic()
+    write_atomic(buffer.tobytes(), filename)
+    written = time.monotonic()
+    encode_seconds, write_seconds = encoded - started, written - encoded
+
+    if encoding.thumbnail_width:
+        thumbnail = ImageEncoding(encoding.image_format, encoding.quality, encoding.thumbnail_width)
+        ok, buffer = cv2.imencode(extension, thumbnail.resize(frame), thumbnail.params())
+        encoded = time.monotonic()
+        if ok:
+            write_atomic(buffer.tobytes(), thumbnail_path(filename))
+        encode_seconds += encoded - written
+        write_seconds += time.monotonic() - encoded
+    return encode_seconds, write_seconds
+
+
+class ImageWriterPool:
+    """
+    Bounded pool that encodes and writes captured frames off the GUI thread.
+
+    At most `max_queue` frames may be pending at once; further submissions are
+    rejected instead of blocking the caller.
+    """
+
+    def __init__(self, max_workers=2, max_queue=16, use_processes=False, jpeg_quality=95):
+        self.max_queue = max_queue
+        self.use_processes = use_processes
+        self.encoding = ImageEncoding('jpg', jpeg_quality)
+        if use_processes:
+            self.executor = ProcessPoolExecutor(max_workers=max_workers)
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='image-writer')
+
+        self.slots = threading.BoundedSemaphore(max_queue)
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.max_pending = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+        self.encode_time = REGISTRY.histogram('image_encode_seconds', "Resize and encode time per image")
+        self.write_time = REGISTRY.histogram('image_write_seconds', "Atomic write and fsync time per image")
+        self.rejections = REGISTRY.counter('image_queue_rejected', "Frames dropped because the write queue was full")
+        REGISTRY.gauge('image_queue_depth', "Images waiting to be encoded and written", callback=lambda: self.pending)
+
+    def submit(self, frame, filename, callback=None, encoding=None):
+        """
+        Queue a frame for writing. `callback(filename, error)` is called from a
+        worker thread once the file is on disk or the write failed. `encoding`
+        overrides the pool's default JPEG encoding.
+
+        Returns the future, or None when the queue is full.
+        """
+        if not self.slots.acquire(blocking=False):
+            with self.lock:
+                self.rejected += 1
+            self.rejections.inc()
+            print(f"Görüntü yazma kuyruğu dolu, kare atlandı: {filename}")
+            return None
+
+        with self.lock:
+            self.pending += 1
+            self.submitted += 1
+            self.max_pending = max(self.max_pending, self.pending)
+
+        try:
+            future = self.executor.submit(encode_and_write_timed, frame, filename, encoding or self.encoding)
+        except RuntimeError:
+            self.release_slot(failed=True)
+            raise
+
+        def done(finished):
+            error = finished.exception()
+            if error is None:
+                encode_seconds, write_seconds = finished.result()
+                self.encode_time.observe(encode_seconds)
+                self.write_time.observe(write_seconds)
+            self.release_slot(failed=error is not None)
+            if callback:
+                callback(filename, error)
+
+        future.add_done_callback(done)
+        return future
+
+    def release_slot(self, failed):
+        with self.lock:
+            self.pending -= 1
+            if failed:
+                self.failed += 1
+            else:
+                self.completed += 1
+        self.slots.release()
+
+    def metrics(self):
+        """
+        Return a snapshot of the queue depth and throughput counters.
+        """
+        with self.lock:
+            return {
+                'queue_depth': self.pending,
+                'max_queue_depth': self.max_pending,
+                'queue_capacity': self.max_queue,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+            }
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
@@ -0,0 +1,128 @@
+import logging
+import logging.handlers
+import os
+
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, Qt, QTimer
+from PyQt5.QtWidgets import QAbstractItemView, QListView
+
+
+class RingLogModel(QAbstractListModel):
+    """
+    List model over a fixed-size ring buffer of log lines.
+
+    Appends are collected and applied once per flush tick, so a device that
+    sends many lines per second causes one row insertion per tick instead of
+    one per line. Lines pushed out of the ring can be spilled to a rotating
+    log file.
+    """
+
+    def __init__(self, capacity=1000, flush_interval_ms=100, newest_first=False, spill_file=None,
+                 spill_max_bytes=1024 * 1024, spill_backups=3, parent=None):
+        super().__init__(parent)
+        self.capacity = max(1, capacity)
+        self.newest_first = newest_first
+        self.items = [None] * self.capacity
+        self.start = 0
+        self.count = 0
+        self.pending = []
+
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.setInterval(flush_interval_ms)
+        self.flush_timer.timeout.connect(self.flush)
+
+        self.spill_logger = None
+        if spill_file:
+            spill_dir = os.path.dirname(spill_file)
+            if spill_dir:
+                os.makedirs(spill_dir, exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(spill_file, maxBytes=spill_max_bytes,
+                                                           backupCount=spill_backups, encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            self.spill_logger = logging.getLogger(f'logview.{os.path.abspath(spill_file)}')
+            self.spill_logger.propagate = False
+            self.spill_logger.setLevel(logging.INFO)
+            self.spill_logger.addHandler(handler)
+
+    def append(self, text):
+        self.pending.append(text)
+        if not self.flush_timer.isActive():
+            self.flush_timer.start()
+
+    def flush(self):
+        if not self.pending:
+            return
+        batch = self.pending
+        self.pending = []
+
+        # Lines that would be evicted within the same batch never become rows
+        skipped = []
+        if len(batch) > self.capacity:
+            skipped = batch[:-self.capacity]
+            batch = batch[-self.capacity:]
+
+        overflow = self.count + len(batch) - self.capacity
+        if overflow > 0:
+            first = self.count - overflow if self.newest_first else 0
+            self.beginRemoveRows(QModelIndex(), first, first + overflow - 1)
+            evicted = [self.items[(self.start + i) % self.capacity] for i in range(overflow)]
+            self.start = (self.start + overflow) % self.capacity
+            self.count -= overflow
+            self.endRemoveRows()
+            self.spill(evicted)
+        # After the older rows, so the spill file stays in chronological order
+        self.spill(skipped)
+
+        if self.newest_first:
+            self.beginInsertRows(QModelIndex(), 0, len(batch) - 1)
+        else:
+            self.beginInsertRows(QModelIndex(), self.count, self.count + len(batch) - 1)
+        for text in batch:
+            self.items[(self.start + self.count) % self.capacity] = text
+            self.count += 1
+        self.endInsertRows()
+
+    def spill(self, lines):
+        if self.spill_logger:
+            for line in lines:
+                self.spill_logger.info(line)
+
+    def line(self, row):
+        if self.newest_first:
+            row = self.count - 1 - row
+        return self.items[(self.start + row) % self.capacity]
+
+    def lines(self):
+        return [self.line(row) for row in range(self.count)]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.count
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid() or index.row() >= self.count:
+            return None
+        return self.line(index.row())
+
+
+class LogView(QListView):
+    """
+    Read-only list view over a RingLogModel, keeping the QTextEdit style `append` API.
+    """
+
+    def __init__(self, capacity=1000, flush_interval_ms=100, newest_first=False, spill_file=None,
+                 spill_max_bytes=1024 * 1024, spill_backups=3, parent=None):
+        super().__init__(parent)
+        self.log_model = RingLogModel(capacity, flush_interval_ms, newest_first, spill_file,
+                                      spill_max_bytes, spill_backups, self)
+        self.setModel(self.log_model)
+        self.setUniformItemSizes(True)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.follow_tail = not newest_first
+        self.log_model.rowsInserted.connect(self.scrollToLatest)
+
+    def append(self, text):
+        self.log_model.append(text)
+
+    def scrollToLatest(self):
+        if self.follow_tail:
+            self.scrollToBottom()
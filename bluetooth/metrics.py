@@ -0,0 +1,321 @@
+import bisect
+import collections
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Seconds; covers a fast in-memory step up to a slow RTSP reconnect
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Pending values a recording thread folds itself, so nothing grows when no exporter is running
+FOLD_THRESHOLD = 1024
+
+
+class Metric:
+    """
+    Base of the metric types. Recording only appends to a deque, which is
+    atomic in CPython, so hot paths never wait on a lock; readers fold the pending
+    values into the totals when the metrics are exported.
+    """
+
+    kind = 'untyped'
+
+    def __init__(self, name, help_text, labels):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.pending = collections.deque()
+        self.fold_lock = threading.Lock()
+
+    @property
+    def family(self):
+        """
+        Metric name as exported, which the HELP and TYPE lines must use too.
+        """
+        return self.name
+
+    def record(self, value):
+        self.pending.append(value)
+        if len(self.pending) >= FOLD_THRESHOLD and self.fold_lock.acquire(blocking=False):
+            try:
+                self.fold_pending()
+            finally:
+                self.fold_lock.release()
+
+    def fold(self):
+        with self.fold_lock:
+            self.fold_pending()
+
+    def fold_pending(self):
+        while True:
+            try:
+                value = self.pending.popleft()
+            except IndexError:
+                return
+            self.apply(value)
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labels):
+        super().__init__(name, help_text, labels)
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.record(amount)
+
+    def apply(self, amount):
+        self.value += amount
+
+    @property
+    def family(self):
+        return self.name + '_total'
+
+    def samples(self):
+        self.fold()
+        return [(self.family, self.labels, self.value)]
+
+    def snapshot(self):
+        self.fold()
+        return self.value
+
+
+class Gauge(Metric):
+    """
+    A value that goes up and down. With `callback` the value is read when the metrics are exported.
+    """
+
+    kind = 'gauge'
+
+    def __init__(self, name, help_text, labels, callback=None):
+        super().__init__(name, help_text, labels)
+        self.value = 0
+        self.callback = callback
+
+    def set(self, value):
+        self.value = value
+
+    def current(self):
+        if self.callback is None:
+            return self.value
+        try:
+            return self.callback()
+        except Exception:
+            return float('nan')
+
+    def samples(self):
+        return [(self.name, self.labels, self.current())]
+
+    def snapshot(self):
+        return self.current()
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labels, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.record(value)
+
+    def time(self):
+        return Timer(self)
+
+    def apply(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self):
+        self.fold()
+        samples = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            cumulative += count
+            samples.append((self.name + '_bucket', dict(self.labels, le=format_bound(bound)), cumulative))
+        samples.append((self.name + '_sum', self.labels, self.sum))
+        samples.append((self.name + '_count', self.labels, self.count))
+        return samples
+
+    def quantile(self, fraction):
+        """
+        Upper bucket bound below which `fraction` of the observations fall.
+        """
+        if not self.count:
+            return None
+        target = fraction * self.count
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return bound
+        return float('inf')
+
+    def snapshot(self):
+        self.fold()
+        return {'count': self.count, 'sum': self.sum, 'p50': self.quantile(0.5), 'p99': self.quantile(0.99)}
+
+
+class Timer:
+    """
+    Context manager that observes the elapsed monotonic time in seconds.
+    """
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.monotonic()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.monotonic() - self.started)
+        return False
+
+
+def format_bound(bound):
+    return '+Inf' if bound == float('inf') else repr(bound)
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for value in labels.values())
+    return '{' + ','.join(f'{key}="{value}"' for key, value in zip(labels, escaped)) + '}'
+
+
+class MetricsRegistry:
+    """
+    Named metrics, one instance per (name, labels). Asking for the same name and
+    labels again returns the existing metric, so modules can look theirs up freely.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def get(self, metric_class, name, help_text, labels, **kwargs):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            metric = self.metrics.get(key)
+            if metric is None:
+                metric = self.metrics[key] = metric_class(name, help_text, labels, **kwargs)
+            return metric
+
+    def counter(self, name, help_text='', **labels):
+        return self.get(Counter, name, help_text, labels)
+
+    def gauge(self, name, help_text='', callback=None, **labels):
+        gauge = self.get(Gauge, name, help_text, labels)
+        if callback is not None:
+            # A restarted component takes over its gauge
+            gauge.callback = callback
+        return gauge
+
+    def histogram(self, name, help_text='', buckets=DEFAULT_BUCKETS, **labels):
+        return self.get(Histogram, name, help_text, labels, buckets=buckets)
+
+    def prometheus_text(self):
+        with self.lock:
+            metrics = sorted(self.metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        described = set()
+        for metric in metrics:
+            # HELP and TYPE must name the sample family, e.g. socket_errors_total for a counter
+            if metric.family not in described:
+                described.add(metric.family)
+                lines.append(f"# HELP {metric.family} {metric.help_text}")
+                lines.append(f"# TYPE {metric.family} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{format_labels(labels)} {value}")
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self):
+        with self.lock:
+            metrics = list(self.metrics.values())
+        data = {}
+        for metric in metrics:
+            label_text = ','.join(f'{key}={value}' for key, value in metric.labels.items())
+            data[f'{metric.name}{{{label_text}}}' if label_text else metric.name] = metric.snapshot()
+        return {'time': time.strftime('%Y-%m-%d %H:%M:%S'), 'metrics': data}
+
+
+REGISTRY = MetricsRegistry()
+
+
+class MetricsServer(threading.Thread):
+    """
+    Serve the registry in Prometheus text format on http://host:port/metrics.
+    """
+
+    def __init__(self, registry=REGISTRY, port=9108, host='127.0.0.1'):
+        super().__init__(daemon=True, name='metrics-server')
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/metrics', '/'):
+                    self.send_error(404)
+                    return
+                body = registry.prometheus_text().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.port = self.httpd.server_address[1]
+
+    def run(self):
+        self.httpd.serve_forever(poll_interval=0.5)
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class SnapshotWriter(threading.Thread):
+    """
+    Write a JSON snapshot of the registry to `path` every `interval` seconds, and once more on stop.
+    """
+
+    def __init__(self, path, interval=30.0, registry=REGISTRY):
+        super().__init__(daemon=True, name='metrics-snapshot')
+        self.path = path
+        self.interval = interval
+        self.registry = registry
+        self.stop_event = threading.Event()
+
+    def write(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(self.registry.snapshot(), f, indent=1, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            try:
+                self.write()
+            except OSError as e:
+                print(f"Metrik dosyası yazılamadı: {e}")
+
+    def stop(self):
+        self.stop_event.set()
+        try:
+            self.write()
+        except OSError as e:
+            print(f"Metrik dosyası yazılamadı: {e}")
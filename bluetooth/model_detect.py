@@ -0,0 +1,105 @@
+import re
+
+from database import parse_weight_kg
+
+# Numbered backreferences would point at the wrong group once the patterns are combined
+BACKREFERENCE_PATTERN = re.compile(r'\\[1-9]|\(\?P=')
+
+
+class CombinedModelRegex:
+    """
+    All [models] patterns joined into one alternation of named groups,
+    `(?P<m0>...)|(?P<m1>...)|...`, so a single search tells which model
+    explains a scale line: the one whose match starts earliest, and the one
+    listed first among matches at the same position. A catch-all number
+    pattern therefore loses to a model that matches the scale's whole line.
+
+    The weight is the first group of the model's pattern, as in the collector.
+    Patterns that cannot be combined (backreferences, clashing group names,
+    inline flags) are searched separately and compete by the same rule.
+    """
+
+    def __init__(self, model_regex):
+        self.order = {model: index for index, model in enumerate(model_regex)}
+        self.groups = {}
+        self.separate = {}
+        parts = []
+        group = 0
+        for index, (model, regex) in enumerate(model_regex.items()):
+            if BACKREFERENCE_PATTERN.search(regex.pattern) or regex.flags & ~re.UNICODE:
+                self.separate[model] = regex
+                continue
+            part = f'(?P<m{index}>{regex.pattern})'
+            try:
+                re.compile('|'.join(parts + [part]))
+            except re.error:
+                self.separate[model] = regex
+                continue
+            parts.append(part)
+            self.groups[f'm{index}'] = (model, group + 2 if regex.groups else group + 1)
+            group += 1 + regex.groups
+        self.regex = re.compile('|'.join(parts)) if parts else None
+
+    def best(self, line):
+        """
+        Return (model, weight text) of the model that explains the line, or None.
+        """
+        best = None
+        if self.regex is not None:
+            match = self.regex.search(line)
+            if match:
+                model, weight_group = self.groups[match.lastgroup]
+                best = (match.start(), self.order[model], model, match.group(weight_group))
+        for model, regex in self.separate.items():
+            match = regex.search(line)
+            if match:
+                candidate = (match.start(), self.order[model], model,
+                             match.group(1) if regex.groups else match.group(0))
+                best = min(best, candidate) if best else candidate
+        return best[2:] if best else None
+
+
+class ModelDetector:
+    """
+    Pick the scale model from the first lines a scale sends. Each line scores
+    a point for the model that explains it (see CombinedModelRegex), if that
+    model reads a weight from it. After `sample_lines` lines the best model
+    wins if it read at least `min_share` of them, ties going to the model
+    listed first. A model that read every one of the first `early_lines`
+    lines wins at once.
+    """
+
+    def __init__(self, model_regex, sample_lines=20, min_share=0.6, early_lines=5):
+        self.combined = CombinedModelRegex(model_regex)
+        self.models = list(model_regex)
+        self.sample_lines = sample_lines
+        self.min_share = min_share
+        self.early_lines = early_lines
+        self.scores = dict.fromkeys(self.models, 0)
+        self.lines = 0
+        self.done = False
+        self.model = None
+
+    def feed(self, line):
+        """
+        Score one line. Returns the model once it is decided, otherwise None;
+        `done` turns True either way when the detector has finished.
+        """
+        if self.done or not line.strip():
+            return None
+        self.lines += 1
+        found = self.combined.best(line)
+        if found and parse_weight_kg(found[1]) is not None:
+            self.scores[found[0]] += 1
+
+        best = max(self.models, key=lambda model: self.scores[model], default=None)
+        if best and self.lines >= self.early_lines and self.scores[best] == self.lines:
+            return self.finish(best)
+        if self.lines >= self.sample_lines:
+            return self.finish(best if best and self.scores[best] >= self.min_share * self.lines else None)
+        return None
+
+    def finish(self, model):
+        self.done = True
+        self.model = model
+        return model
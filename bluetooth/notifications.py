@@ -0,0 +1,97 @@
+import time
+from collections import deque
+
+from PyQt5.QtCore import QObject, QTimer
+from PyQt5.QtWidgets import QLabel
+
+
+class NotificationCenter(QObject):
+    """
+    Non-modal notifications in the window's status bar.
+
+    Saves are counted over a sliding window and shown as one aggregated line
+    ("12 kayıt son 1 dakikada"). Status bar updates are coalesced to at most one
+    per `min_interval_ms`, and a repeated error is shown once with a repeat count
+    instead of once per occurrence. Errors are queued apart from save messages:
+    every error that arrived in a window is shown, and a save message never
+    replaces an error that is still on screen. Nothing here waits for the user.
+    """
+
+    def __init__(self, status_bar, window_s=60.0, min_interval_ms=500, message_timeout_ms=5000, parent=None):
+        super().__init__(parent)
+        self.status_bar = status_bar
+        self.window_s = window_s
+        self.message_timeout_ms = message_timeout_ms
+        self.saves = deque()
+        self.pending_saved = None
+        self.pending_errors = []
+        self.error_shown_until = 0.0
+        self.last_message = None
+        self.repeats = 0
+
+        self.save_count_label = QLabel()
+        self.status_bar.addPermanentWidget(self.save_count_label)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(min_interval_ms)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+        # Keeps the count falling as saves age out of the window while the scale is idle
+        self.expire_timer = QTimer(self)
+        self.expire_timer.setInterval(int(window_s * 1000 / 12) or 1000)
+        self.expire_timer.timeout.connect(self.refresh)
+        self.expire_timer.start()
+
+    def record_saved(self, lane=None, barcode=None):
+        """
+        Count a saved record and show it without interrupting capture.
+        """
+        self.saves.append(time.monotonic())
+        self.pending_saved = f"Başarıyla kaydedildi: {barcode}" if barcode else "Başarıyla kaydedildi"
+        if lane:
+            self.pending_saved = f"KASA {lane} - {self.pending_saved}"
+        self.schedule()
+
+    def error(self, message):
+        """
+        Show an error; the same message repeated back to back is counted instead of shown again.
+        """
+        if message == self.last_message:
+            self.repeats += 1
+        else:
+            self.last_message = message
+            self.repeats = 1
+        text = message if self.repeats == 1 else f"{message} ({self.repeats} kez)"
+        if self.pending_errors and self.pending_errors[-1][0] == message:
+            self.pending_errors[-1] = (message, text)
+        else:
+            self.pending_errors.append((message, text))
+        self.schedule()
+
+    def schedule(self):
+        if not self.refresh_timer.isActive():
+            self.refresh_timer.start()
+
+    def saved_in_window(self):
+        cutoff = time.monotonic() - self.window_s
+        while self.saves and self.saves[0] < cutoff:
+            self.saves.popleft()
+        return len(self.saves)
+
+    def refresh(self):
+        now = time.monotonic()
+        if self.pending_errors:
+            self.status_bar.showMessage(' | '.join(text for _, text in self.pending_errors), self.message_timeout_ms)
+            self.pending_errors = []
+            self.error_shown_until = now + self.message_timeout_ms / 1000
+            # The save is still counted in the label
+            self.pending_saved = None
+        elif self.pending_saved and now >= self.error_shown_until:
+            self.status_bar.showMessage(self.pending_saved, self.message_timeout_ms)
+            self.pending_saved = None
+
+        count = self.saved_in_window()
+        minutes = self.window_s / 60
+        window_text = f"son {minutes:g} dakikada" if minutes >= 1 else f"son {self.window_s:g} saniyede"
+        self.save_count_label.setText(f"{count} kayıt {window_text}" if count else "")
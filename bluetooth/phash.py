@@ -0,0 +1,227 @@
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from database import SQLiteManager
+
+
+def dhash(frame, hash_size=8):
+    """
+    Difference hash of a BGR or grayscale frame: the frame is shrunk to
+    (hash_size + 1) x hash_size and each bit says whether a pixel is brighter
+    than its left neighbour. Returns the hash as an int.
+    """
+    import cv2
+    import numpy as np
+    if frame.ndim == 3:
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(frame, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = small[:, 1:] > small[:, :-1]
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), 'big')
+
+
+def hash_to_hex(value):
+    return f'{value:016x}'
+
+
+def hex_to_hash(text):
+    return int(text, 16)
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+def hash_file(path):
+    """
+    dHash of an image file, or None when it cannot be read. The JPEG is decoded at
+    a quarter of its size, which is plenty for a 9x8 thumbnail and much faster.
+    """
+    import cv2
+    frame = cv2.imread(path, cv2.IMREAD_REDUCED_GRAYSCALE_4)
+    if frame is None:
+        return None
+    return dhash(frame)
+
+
+class BKTree:
+    """
+    Burkhard-Keller tree over hamming distance. A lookup within `max_distance`
+    only visits children whose edge distance is within `max_distance` of the
+    query's distance to the node, instead of every stored hash.
+    """
+
+    def __init__(self):
+        self.root = None
+        self.size = 0
+
+    def add(self, value, item):
+        self.size += 1
+        node = self.root
+        if node is None:
+            self.root = (value, item, {})
+            return
+        while True:
+            distance = hamming(value, node[0])
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = (value, item, {})
+                return
+            node = child
+
+    def items(self):
+        stack = [self.root] if self.root else []
+        while stack:
+            value, item, children = stack.pop()
+            yield value, item
+            stack.extend(children.values())
+
+    def search(self, value, max_distance):
+        """
+        Return (distance, item) pairs within `max_distance`, closest first.
+        """
+        found = []
+        stack = [self.root] if self.root else []
+        while stack:
+            node_value, item, children = stack.pop()
+            distance = hamming(value, node_value)
+            if distance <= max_distance:
+                found.append((distance, item))
+            for edge, child in children.items():
+                if distance - max_distance <= edge <= distance + max_distance:
+                    stack.append(child)
+        found.sort(key=lambda pair: pair[0])
+        return found
+
+
+class DuplicateIndex:
+    """
+    Per-barcode BK-trees of the photo hashes already stored. Shared by all lanes.
+    """
+
+    def __init__(self, threshold=6):
+        self.threshold = threshold
+        self.trees = {}
+        self.lock = threading.Lock()
+
+    def add(self, barcode, value, photo_path):
+        with self.lock:
+            self.trees.setdefault(barcode, BKTree()).add(value, photo_path)
+
+    def find(self, barcode, value):
+        """
+        Return (distance, photo_path) of the closest stored photo of `barcode` within the threshold, or None.
+        """
+        with self.lock:
+            tree = self.trees.get(barcode)
+            matches = tree.search(value, self.threshold) if tree else []
+        return matches[0] if matches else None
+
+    def find_or_add(self, barcode, value, photo_path):
+        """
+        Return the closest match like find(), or add the hash and return None. One
+        step under the lock, so two photos of a barcode taken before either is
+        written cannot both miss each other.
+        """
+        with self.lock:
+            tree = self.trees.setdefault(barcode, BKTree())
+            matches = tree.search(value, self.threshold)
+            if matches:
+                return matches[0]
+            tree.add(value, photo_path)
+        return None
+
+    def remove(self, barcode, photo_path):
+        """
+        Drop a photo whose file could not be written. BK-trees cannot delete a
+        node, so the barcode's tree is rebuilt without it.
+        """
+        with self.lock:
+            tree = self.trees.get(barcode)
+            if tree is None:
+                return
+            rebuilt = BKTree()
+            for value, item in tree.items():
+                if item != photo_path:
+                    rebuilt.add(value, item)
+            self.trees[barcode] = rebuilt
+
+    def load(self, rows):
+        for barcode, photo_hash, photo_path in rows:
+            self.add(barcode, hex_to_hash(photo_hash), photo_path)
+
+
+def backfill(db_file, image_root='.', workers=None, flag_duplicates=False, threshold=6, batch_size=500):
+    """
+    Hash the photos of rows that have no PhotoHash yet, in a process pool, and
+    optionally mark near duplicates of earlier photos of the same barcode.
+    """
+    # Bring older databases up to the schema with the PhotoHash column first
+    manager = SQLiteManager(db_file)
+    manager.connect()
+    manager.create_table()
+    manager.close()
+
+    conn = sqlite3.connect(db_file)
+    try:
+        rows = conn.execute("""SELECT id, PhotoPath FROM ProductData
+                               WHERE PhotoHash IS NULL ORDER BY id""").fetchall()
+        paths = [os.path.join(image_root, photo_path) for _, photo_path in rows]
+        updates = []
+        hashed = 0
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for (row_id, _), value in zip(rows, pool.map(hash_file, paths, chunksize=32)):
+                if value is None:
+                    continue
+                updates.append((hash_to_hex(value), row_id))
+                if len(updates) >= batch_size:
+                    hashed += flush_updates(conn, updates)
+        hashed += flush_updates(conn, updates)
+        print(f"{hashed} resim hashlendi, {len(rows) - hashed} resim okunamadı")
+
+        if flag_duplicates:
+            index = DuplicateIndex(threshold)
+            flags = []
+            for row_id, barcode, photo_hash, photo_path in conn.execute(
+                    """SELECT id, Barcode, PhotoHash, PhotoPath FROM ProductData
+                       WHERE PhotoHash IS NOT NULL ORDER BY id"""):
+                value = hex_to_hash(photo_hash)
+                match = index.find(barcode, value)
+                if match:
+                    flags.append((match[1], row_id))
+                else:
+                    index.add(barcode, value, photo_path)
+            with conn:
+                conn.executemany("UPDATE ProductData SET DuplicateOf = ? WHERE id = ?", flags)
+            print(f"{len(flags)} kayıt benzer resim olarak işaretlendi")
+    finally:
+        conn.close()
+
+
+def flush_updates(conn, updates):
+    count = len(updates)
+    with conn:
+        conn.executemany("UPDATE ProductData SET PhotoHash = ? WHERE id = ?", updates)
+    updates.clear()
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute photo hashes for rows captured before hashing was enabled.")
+    parser.add_argument('db_file', nargs='?', default='product_data.db')
+    parser.add_argument('--image-root', default='.', help="directory the stored photo paths are relative to")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--flag-duplicates', action='store_true',
+                        help="set DuplicateOf on rows whose photo nearly matches an earlier one")
+    parser.add_argument('--threshold', type=int, default=6, help="largest hamming distance counted as a duplicate")
+    args = parser.parse_args(argv)
+
+    backfill(args.db_file, args.image_root, args.workers, args.flag_duplicates, args.threshold)
+
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+    main()
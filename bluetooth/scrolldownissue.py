@@ -1,141 +1,56 @@
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, pyqtSlot
-from PyQt5.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QWidget, QPushButton, QTextEdit, QLabel, \
-    QListWidget, QListWidgetItem, QMessageBox, QTabWidget, QLineEdit, QHBoxLayout, QComboBox, QDialog, QScrollArea
-from PyQt5.QtBluetooth import QBluetoothDeviceDiscoveryAgent, QBluetoothSocket, QBluetoothDeviceInfo, QBluetoothUuid, \
-    QBluetoothServiceInfo
-import serial
 import sys
-import cv2
-import time
 import os
-from pynput import keyboard
-import configparser
-import sqlite3
-import re
-
-class SQLiteManager:
-    def __init__(self, db_file):
-        self.db_file = db_file
-        self.connection = None
-        self.cursor = None
-
-    def connect(self):
-        try:
-            self.connection = sqlite3.connect(self.db_file)
-            self.cursor = self.connection.cursor()
-            print("SQLite database connected successfully")
-        except sqlite3.Error as e:
-            print(f"SQLite connection error: {e}")
+import multiprocessing
+from startup_profile import StartupProfiler
 
-    def create_table(self):
-        try:
-            query = """CREATE TABLE IF NOT EXISTS ProductData (
-                           id INTEGER PRIMARY KEY AUTOINCREMENT,
-                           Barcode TEXT,
-                           Weight TEXT,
-                           PhotoPath TEXT
-                       )"""
-            self.cursor.execute(query)
-            self.connection.commit()
-            print("Table created successfully")
-        except sqlite3.Error as e:
-            print(f"Create table error: {e}")
-
-    def insert_data(self, barcode, weight, photo_path):
-        try:
-            # Debugging statements to trace function calls
-            print(f"Attempting to insert data: barcode={barcode}, weight={weight}, photo_path={photo_path}")
-
-            # Check if barcode and photo_path are valid (not empty and not None)
-            if barcode and photo_path and photo_path != 'Resim yolu yok':
-                # Check if the record already exists
-                self.cursor.execute("SELECT COUNT(*) FROM ProductData WHERE Barcode=? AND PhotoPath=?",
-                                    (barcode, photo_path))
-                count = self.cursor.fetchone()[0]
-
-                if count == 0:
-                    query = """INSERT INTO ProductData (Barcode, Weight, PhotoPath)
-                            VALUES (?, ?, ?)"""
-                    self.cursor.execute(query, (barcode, weight, photo_path))
-                    self.connection.commit()
-                    print("Data inserted successfully")
-                    self.show_success_message()
-
-                else:
-                    print("Data not inserted: record already exists")
-            else:
-                print("Data not inserted: barcode or photo_path is invalid or empty")
-        except sqlite3.Error as e:
-            print(f"Insert error: {e}")
+# python scrolldownissue.py --profile-startup (or the exe with the flag) prints where startup time goes
+PROFILER = StartupProfiler(enabled='--profile-startup' in sys.argv)
+
+# QtBluetooth is imported when discovery is first used, cv2 by the camera worker and the first capture
+with PROFILER.phase("import PyQt5"):
+    from PyQt5.QtCore import Qt, QObject, QTimer, pyqtSignal, pyqtSlot
+    from PyQt5.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QWidget, QPushButton, QLabel, \
+        QListWidget, QListWidgetItem, QMessageBox, QTabWidget, QLineEdit, QHBoxLayout, QComboBox, QDialog, QScrollArea
+with PROFILER.phase("import collector"):
+    from capture_session import PART_NAMES
+    from collector import LaneManager, make_serial_listener
+    from device_cache import device_address, is_bluetooth_address
+    from log_view import LogView
+    from metrics import REGISTRY
+    from notifications import NotificationCenter
+    from settings import load_settings
 
-    def show_success_message(self):
-        """
-        Show a success message box.
-        """
-        msg_box = QMessageBox()
-        msg_box.setIcon(QMessageBox.Information)
-        msg_box.setText("Başarıyla Kaydedildi!")
-        msg_box.setWindowTitle("Başarılı")
-        msg_box.setStandardButtons(QMessageBox.Ok)
-        msg_box.exec_()
-
-    def close(self):
-        if self.cursor:
-            self.cursor.close()
-        if self.connection:
-            self.connection.close()
-class SerialListener(QThread):
-    barcode_received = pyqtSignal(str)
-
-    def __init__(self, port, parent=None):
-        super().__init__(parent)
-        self.port = port
-        self.running = True
-        self.barcode_data = ""
-
-        # Keyboard listener setup
-        self.keyboard_listener = keyboard.Listener(on_press=self.on_key_press)
-        self.keyboard_listener.start()
-
-    def on_key_press(self, key):
-        try:
-            # Assuming the key pressed is alphanumeric
-            self.barcode_data += key.char
-        except AttributeError:
-            if key == keyboard.Key.enter:
-                self.barcode_received.emit(self.barcode_data)
-                self.barcode_data = ""
-
-    def run(self):
-        try:
-            with serial.Serial(self.port, 9600, timeout=1) as ser:
-                while self.running:
-                    # Read line from serial and emit barcode signal
-                    barcode = ser.readline().decode().strip()
-                    if barcode:
-                        self.barcode_received.emit(barcode)
-        except serial.SerialException as e:
-            print(f"Seri bağlantı hatası: {e}")
 
-    def stop(self):
-        self.running = False
-        self.keyboard_listener.stop()
+class CollectorBridge(QObject):
+    """
+    Re-emits collector events as a Qt signal so they are handled on the GUI thread.
+    """
+    event = pyqtSignal(str, dict)
+
+    def __call__(self, kind, data):
+        self.event.emit(kind, data)
 
 
 class BluetoothManager(QMainWindow):
     def __init__(self):
         super().__init__()
         self.devmode = 0  # Initialize the attribute
-        self.load_config()  # Load configuration to possibly update devmode
-        self.db_manager = SQLiteManager('product_data.db')
-        self.db_manager.connect()
-        self.db_manager.create_table()
+        with PROFILER.phase("settings"):
+            self.load_config()  # Load configuration to possibly update devmode
+
+        # All capture logic runs in the lane collectors; the window only observes their events.
+        # The devices picked in the window feed the primary lane, other lanes use their configured sources.
+        with PROFILER.phase("lanes"):
+            self.lanes = LaneManager(self.settings)
+            self.collector = self.lanes.primary
+            # The window's scanner is the primary lane's; with [Lane:*] sections that is not [SerialPort] port
+            self.serial_port = self.collector.lane.serial_port
+            self.collectorBridge = CollectorBridge()
+            self.collectorBridge.event.connect(self.onCollectorEvent)
+            self.lanes.add_listener(self.collectorBridge)
 
         self.loadModelsAndRegex()
 
-
-        self.newDataAvailable.connect(self.updateUI)
-
         self.startupTab = QWidget()
         self.scaleTab = QWidget()
         self.bluetoothBarcodeTab = QWidget()
@@ -143,18 +58,20 @@ class BluetoothManager(QMainWindow):
 
 
 
-        self.initUI()
+        with PROFILER.phase("window"):
+            self.initUI()
 
-        # Initialize discovery agents for each tab
-        self.discoveryAgentScale = QBluetoothDeviceDiscoveryAgent()
-        self.discoveryAgentScale.deviceDiscovered.connect(self.deviceDiscoveredScale)
-        self.discoveryAgentScale.finished.connect(self.discoveryFinishedScale)
-        self.discoveryAgentScale.error.connect(self.deviceDiscoveryError)
+        # Discovery agents for each tab are created when discovery is first started
+        self.discoveryAgentScale = None
+        self.discoveryAgentBluetooth = None
 
-        self.discoveryAgentBluetooth = QBluetoothDeviceDiscoveryAgent()
-        self.discoveryAgentBluetooth.deviceDiscovered.connect(self.deviceDiscoveredBluetooth)
-        self.discoveryAgentBluetooth.finished.connect(self.discoveryFinishedBluetooth)
-        self.discoveryAgentBluetooth.error.connect(self.deviceDiscoveryError)
+        # Devices connected before are reconnected directly; discovery is the fallback
+        self.deviceCache = self.lanes.device_cache
+        self.reconnectTargets = {}  # role -> (address, name) to keep connected
+        self.reconnectDelays = {}
+        self.pendingReconnects = set()
+        self.connectedRoles = set()
+        self.knownCandidates = {}  # role -> remembered devices not tried yet at startup
 
         self.socketScale = None
         self.socketBluetooth = None
@@ -162,13 +79,123 @@ class BluetoothManager(QMainWindow):
         self.serialConnection = None
         self.selectedDeviceInfoScale = None
         self.selectedDeviceInfoBluetooth = None
-        self.latest_weight = None
         self.data_list = []
         self.selected_model = None
-        self.selected_model_regex = None
         self.serialListener = None
-        self.success_message_shown = False
-        self.data_inserted = False
+
+        # The database is opened once the event loop runs, so the window is drawn first
+        QTimer.singleShot(0, self.startLanes)
+
+    def startLanes(self):
+        with PROFILER.phase("lanes start"):
+            self.lanes.start()
+            self.lanes.start_sources(include_primary=False)
+        scale_address = self.collector.lane.scale_address
+        if scale_address and not is_bluetooth_address(scale_address):
+            # start_sources reads this scale; the scanner tabs do not wait for a Bluetooth scale
+            self.no_weight_device_label.setText(scale_address)
+            self.tabWidget.setTabEnabled(2, True)
+            self.tabWidget.setTabEnabled(3, True)
+        # Loads QtBluetooth and opens the device sockets, the slowest part of startup
+        with PROFILER.phase("devices"):
+            self.connectKnownDevices()
+        PROFILER.report()
+
+    def connectKnownDevices(self):
+        """
+        List the remembered devices and connect to the last used scale and scanner at once.
+        When one cannot be reached, the other remembered devices of its role are tried in turn.
+        A scale configured for the primary lane is connected instead of a remembered one.
+        """
+        scale_address = self.collector.lane.scale_address
+        for role, deviceList, connect in (('scale', self.deviceListScale, self.connectScale),
+                                          ('barcode', self.deviceListBluetooth, self.connectBarcode)):
+            known = self.listKnownDevices(role, deviceList)
+            if role == 'scale' and scale_address:
+                if is_bluetooth_address(scale_address):
+                    print(f"Yapılandırılan teraziye bağlanılıyor: {scale_address}")
+                    connect(device_address(scale_address), '')
+                continue
+            if known and self.settings.device_auto_connect:
+                self.knownCandidates[role] = [(device['address'], device['name']) for device in known[1:]]
+                print(f"Bilinen cihaza bağlanılıyor: {known[0]['name']} - {known[0]['address']}")
+                # Both sockets connect asynchronously, so the scale and the scanner are tried in parallel
+                connect(known[0]['address'], known[0]['name'])
+        self.connectButtonScale.setEnabled(self.deviceListScale.count() > 0)
+        self.connectButtonBluetooth.setEnabled(self.deviceListBluetooth.count() > 0)
+
+    def listKnownDevices(self, role, deviceList):
+        """
+        Reset a device list to the remembered devices of a role; discovery adds the others.
+        """
+        deviceList.clear()
+        known = self.deviceCache.known(role)
+        for device in known:
+            deviceList.addItem(self.deviceItem(device['address'], device['name'], device.get('rssi')))
+        return known
+
+    def addDiscoveredDevice(self, deviceList, device):
+        address = device.address().toString()
+        self.deviceCache.update_rssi(address, device.rssi())
+        listed = (deviceList.item(row).data(Qt.UserRole)['address'] for row in range(deviceList.count()))
+        if address not in listed:
+            deviceList.addItem(self.deviceItem(address, device.name(), device.rssi()))
+
+    def deviceItem(self, address, name, rssi=None):
+        text = f"{name} - {address}"
+        if address in self.deviceCache:
+            text += " (bilinen)"
+        item = QListWidgetItem(text)
+        item.setData(Qt.UserRole, {'address': address, 'name': name, 'rssi': rssi})
+        return item
+
+    def scheduleReconnect(self, role):
+        """
+        Retry the connection of a role with a doubling delay. At startup the other
+        remembered devices are tried first; the first failure after that also
+        starts discovery, so another device can be picked.
+        """
+        target = self.reconnectTargets.get(role)
+        if target is None or role in self.pendingReconnects:
+            return
+        candidates = self.knownCandidates.get(role)
+        if candidates:
+            address, name = candidates.pop(0)
+            print(f"{target[0]} bağlantısı kurulamadı, bilinen cihaz deneniyor: {name} - {address}")
+            self.pendingReconnects.add(role)
+            # Not from inside the failed socket's own error signal
+            QTimer.singleShot(0, lambda: self.reconnect(role, (address, name)))
+            return
+        delay = self.reconnectDelays.get(role, self.settings.device_reconnect_delay_s)
+        self.reconnectDelays[role] = min(delay * 2, self.settings.device_max_reconnect_delay_s)
+        self.pendingReconnects.add(role)
+        print(f"{target[0]} bağlantısı {delay:.1f} sn sonra yeniden denenecek")
+        QTimer.singleShot(int(delay * 1000), lambda: self.reconnect(role))
+
+        if role not in self.connectedRoles and delay == self.settings.device_reconnect_delay_s:
+            if role == 'scale':
+                self.startDiscoveryScale()
+            else:
+                self.startDiscoveryBluetooth()
+
+    def reconnect(self, role, target=None):
+        self.pendingReconnects.discard(role)
+        # A disconnect in the meantime cancels the retry
+        if role not in self.reconnectTargets:
+            return
+        address, name = target or self.reconnectTargets[role]
+        if role == 'scale':
+            self.connectScale(address, name)
+        else:
+            self.connectBarcode(address, name)
+
+    def createDiscoveryAgent(self, on_discovered, on_finished):
+        from PyQt5.QtBluetooth import QBluetoothDeviceDiscoveryAgent
+        agent = QBluetoothDeviceDiscoveryAgent()
+        agent.deviceDiscovered.connect(on_discovered)
+        agent.finished.connect(on_finished)
+        agent.error.connect(self.deviceDiscoveryError)
+        return agent
 
     def initUI(self):
         self.setWindowTitle("Bluetooth Manager")
@@ -176,6 +203,7 @@ class BluetoothManager(QMainWindow):
 
         self.centralWidget = QWidget()
         self.setCentralWidget(self.centralWidget)
+        self.notifications = NotificationCenter(self.statusBar(), parent=self)
 
         self.tabWidget = QTabWidget()
         self.tabWidget.addTab(self.startupTab, "Başlangıç")
@@ -194,39 +222,8 @@ class BluetoothManager(QMainWindow):
         self.tabWidget.setTabEnabled(2, False)  # Bluetooth Barkod tab
         self.tabWidget.setTabEnabled(3, False)  # Serial Barkod tab
 
-    def show_success_message(self, message):
-        """
-        Show a success message box.
-        """
-        msg_box = QMessageBox()
-        msg_box.setIcon(QMessageBox.Information)
-        msg_box.setText(message)
-        msg_box.setWindowTitle("Başarılı")
-        msg_box.setStandardButtons(QMessageBox.Ok)
-        msg_box.exec_()
-
-    def reset_data_insertion_flag(self):
-        """
-        Reset the flag to allow data insertion again.
-        """
-        self.data_inserted = False
-
-    def reset_success_message_flag(self):
-        """
-        Reset the flag to allow showing the success message again.
-        """
-        self.success_message_shown = False
     def loadModelsAndRegex(self):
-        self.model_regex = {}
-
-        config = configparser.ConfigParser()
-        config.read('config.ini')
-
-        # Load models
-        for model, regex_pattern in config['models'].items():
-            # Compile the regex pattern
-            compiled_regex = re.compile(regex_pattern.strip('/gm'))  # Remove leading/trailing slashes and flags
-            self.model_regex[model.lower()] = compiled_regex
+        self.model_regex = self.collector.model_regex
 
         print(f"Loaded models and regex patterns: {self.model_regex}")
 
@@ -262,13 +259,12 @@ class BluetoothManager(QMainWindow):
         self.selected_model = selected_model.lower()
         dialog.accept()  # Close the dialog
 
-        # Get the regex pattern for the selected model
-        self.selected_model_regex = self.model_regex.get(self.selected_model, None)
-        if self.selected_model_regex:
-            print(f"Selected model: {self.selected_model}")
-            print(f"Regex pattern: {self.selected_model_regex}")
-        else:
-            print("Regex pattern not found for the selected model")
+        # The next connection to this scale uses the same model without asking
+        if 'scale' in self.reconnectTargets:
+            self.deviceCache.set_model(self.reconnectTargets['scale'][0], self.selected_model)
+
+        # The collector parses scale lines with the selected model's regex
+        self.collector.set_scale_model(self.selected_model)
 
     def print_data_list(self):
         """
@@ -278,61 +274,13 @@ class BluetoothManager(QMainWindow):
             print(data)
 
     def load_config(self):
-        config = configparser.ConfigParser()
-        config_file_path = os.path.join(os.getcwd(), "config.ini")
-        config_dir = os.path.dirname(config_file_path)
-
-        if not os.path.exists(config_file_path):
-            if config_dir and not os.path.exists(config_dir):
-                os.makedirs(config_dir, exist_ok=True)
-            print("Config file not found. Creating default config file.")
-            config['Camera'] = {}
-            config['SerialPort'] = {}
-            config['models'] = {}
-            config['devmode'] = {}
-
-            config['Camera']['ip_address'] = ''
-            config['Camera']['username'] = ''
-            config['Camera']['password'] = ''
-
-            config['SerialPort']['port'] = ''
-
-            config['models']['HRCR'] = ''
-            config['models']['GUNAS'] = ''
-            config['models']['DENEME'] = ''
-            config['models']['DENEME2'] = ''
-
-            config['devmode']['on'] = '0'  # Default value for devmode
-
-            with open(config_file_path, 'w') as configfile:
-                config.write(configfile)
-
-            print("Default config file created. Please update the configuration and restart the application.")
-            sys.exit(0)
-
-        config.read(config_file_path)
-
-        # Check if 'models' section exists in config.ini
-        if not config.has_section('models'):
-            config.add_section('models')
-            config.set('models', 'HRCR', '')
-            config.set('models', 'GUNAS', '')
-            config.set('models', 'DENEME', '')
-            config.set('models', 'DENEME2', '')
-
-            with open(config_file_path, 'w') as configfile:
-                config.write(configfile)
-
-        # Camera configuration
-        self.camera_ip = config['Camera']['ip_address']
-        self.camera_user = config['Camera']['username']
-        self.camera_password = config['Camera']['password']
+        self.settings = load_settings(os.path.join(os.getcwd(), "config.ini"))
 
         # Serial port configuration
-        self.serial_port = config['SerialPort']['port']
+        self.serial_port = self.settings.serial_port
 
         # Dev mode configuration
-        self.devmode = int(config['devmode'].get('on', '0'))
+        self.devmode = self.settings.devmode
 
         if self.devmode == 1:
             print("Dev mode is ON")
@@ -369,8 +317,27 @@ class BluetoothManager(QMainWindow):
         photo_layout.setSpacing(5)  # Adjust the spacing between the widgets
         layout.addLayout(photo_layout)
 
+        # One status row for every additional lane
+        self.lane_status_labels = {}
+        for collector in self.lanes.collectors[1:]:
+            label = QLabel(f"KASA {collector.lane.name}: bekleniyor")
+            self.lane_status_labels[collector.lane.name] = label
+            layout.addWidget(label)
+
         self.startupTab.setLayout(layout)
 
+    def createLogView(self, name, newest_first=False):
+        """
+        Create a bounded log view; older lines spill to {spill_dir}/{name}.log when configured.
+        """
+        spill_file = os.path.join(self.settings.log_spill_dir, f"{name}.log") if self.settings.log_spill_dir else None
+        return LogView(capacity=self.settings.log_capacity,
+                       flush_interval_ms=self.settings.log_flush_interval_ms,
+                       newest_first=newest_first,
+                       spill_file=spill_file,
+                       spill_max_bytes=self.settings.log_spill_max_bytes,
+                       spill_backups=self.settings.log_spill_backups)
+
     def initScaleTab(self):
         layout = QVBoxLayout(self.scaleTab)
 
@@ -402,34 +369,24 @@ class BluetoothManager(QMainWindow):
         layout.addWidget(self.servicesLabelScale)
 
         # Initialize the servicesListScale as it is used in both modes
-        self.servicesListScale = QTextEdit()
-        self.servicesListScale.setReadOnly(True)
-        self.servicesListScaleScrollArea = QScrollArea()
-        self.servicesListScaleScrollArea.setWidget(self.servicesListScale)
-        self.servicesListScaleScrollArea.setWidgetResizable(True)
+        self.servicesListScale = self.createLogView("scale")
 
         if self.devmode == 1:
             # Create two lists for original data and captured data
             print("Devmode çalıştı")
-            self.originalDataListScale = QListWidget()
+            self.originalDataListScale = self.createLogView("scale_original", newest_first=True)
             self.originalDataListScale.setObjectName("OriginalDataList")
-            self.originalDataListScaleScrollArea = QScrollArea()
-            self.originalDataListScaleScrollArea.setWidget(self.originalDataListScale)
-            self.originalDataListScaleScrollArea.setWidgetResizable(True)
             layout.addWidget(QLabel("Orijinal Veri"))
-            layout.addWidget(self.originalDataListScaleScrollArea)
+            layout.addWidget(self.originalDataListScale)
 
-            self.capturedDataListScale = QListWidget()
+            self.capturedDataListScale = self.createLogView("scale_captured", newest_first=True)
             self.capturedDataListScale.setObjectName("CapturedDataList")
-            self.capturedDataListScaleScrollArea = QScrollArea()
-            self.capturedDataListScaleScrollArea.setWidget(self.capturedDataListScale)
-            self.capturedDataListScaleScrollArea.setWidgetResizable(True)
             layout.addWidget(QLabel("Yakalanan Veri"))
-            layout.addWidget(self.capturedDataListScaleScrollArea)
+            layout.addWidget(self.capturedDataListScale)
         else:
             # Add servicesListScale only in normal mode
             print("devmode çalışmadı")
-            layout.addWidget(self.servicesListScaleScrollArea)
+            layout.addWidget(self.servicesListScale)
 
         # Initially disable the connect and disconnect buttons
         self.disconnectButtonScale.setEnabled(False)
@@ -458,8 +415,7 @@ class BluetoothManager(QMainWindow):
         self.servicesLabelBluetooth = QLabel("Gelen Veriler (Bluetooth Barkod):")
         layout.addWidget(self.servicesLabelBluetooth)
 
-        self.servicesListBluetooth = QTextEdit()
-        self.servicesListBluetooth.setReadOnly(True)
+        self.servicesListBluetooth = self.createLogView("bluetooth_barcode")
         layout.addWidget(self.servicesListBluetooth)
 
         # Initially disable the connect button
@@ -484,8 +440,7 @@ class BluetoothManager(QMainWindow):
         self.servicesLabelSerial = QLabel("Gelen Veriler (Serial Barkod):")
         layout.addWidget(self.servicesLabelSerial)
 
-        self.servicesListSerial = QTextEdit()
-        self.servicesListSerial.setReadOnly(True)
+        self.servicesListSerial = self.createLogView("serial_barcode")
         layout.addWidget(self.servicesListSerial)
 
         # Initially disable the disconnect button
@@ -493,7 +448,10 @@ class BluetoothManager(QMainWindow):
 
     def startDiscoveryScale(self):
         print("Bluetooth Terazi cihaz keşfi başlatıldı")
-        self.deviceListScale.clear()
+        self.listKnownDevices('scale', self.deviceListScale)
+        if self.discoveryAgentScale is None:
+            self.discoveryAgentScale = self.createDiscoveryAgent(self.deviceDiscoveredScale,
+                                                                 self.discoveryFinishedScale)
         self.discoveryAgentScale.start()
 
     def deviceDiscoveryError(self, error):
@@ -515,28 +473,20 @@ class BluetoothManager(QMainWindow):
 
     def deviceDiscoveredScale(self, device):
         print(f"Bulunan Cihaz (Terazi): {device.name()}, Adres: {device.address().toString()}")
-        item = QListWidgetItem(f"{device.name()} - {device.address().toString()}")
-        item.setData(Qt.UserRole, device)
-        self.deviceListScale.addItem(item)
+        self.addDiscoveredDevice(self.deviceListScale, device)
 
     def deviceDiscoveredBluetooth(self, device):
         print(f"Bulunan Cihaz (Bluetooth Barkod): {device.name()}, Adres: {device.address().toString()}")
-        item = QListWidgetItem(f"{device.name()} - {device.address().toString()}")
-        item.setData(Qt.UserRole, device)
-        self.deviceListBluetooth.addItem(item)
+        self.addDiscoveredDevice(self.deviceListBluetooth, device)
 
     def deviceDiscovered(self, device):
         print(f"Bulunan Cihaz: {device.name()}, Adres: {device.address().toString()}")
 
         if self.tabWidget.currentIndex() == 0:  # Terazi tab index
-            item = QListWidgetItem(f"{device.name()} - {device.address().toString()}")
-            item.setData(Qt.UserRole, device)
-            self.deviceListScale.addItem(item)
+            self.addDiscoveredDevice(self.deviceListScale, device)
 
         elif self.tabWidget.currentIndex() == 1:  # Bluetooth Barkod tab index
-            item = QListWidgetItem(f"{device.name()} - {device.address().toString()}")
-            item.setData(Qt.UserRole, device)
-            self.deviceListBluetooth.addItem(item)
+            self.addDiscoveredDevice(self.deviceListBluetooth, device)
 
     def connectToDeviceScale(self):
         selectedItems = self.deviceListScale.selectedItems()
@@ -547,20 +497,28 @@ class BluetoothManager(QMainWindow):
         selectedItem = selectedItems[0]
         self.selectedDeviceInfoScale = selectedItem.data(Qt.UserRole)
         print(
-            f"Seçilen Cihaz (Bluetooth Terazi): {self.selectedDeviceInfoScale.name()}, Adres: {self.selectedDeviceInfoScale.address().toString()}")
+            f"Seçilen Cihaz (Bluetooth Terazi): {self.selectedDeviceInfoScale['name']}, Adres: {self.selectedDeviceInfoScale['address']}")
+        self.reconnectDelays.pop('scale', None)
+        self.knownCandidates.pop('scale', None)
+        self.connectScale(self.selectedDeviceInfoScale['address'], self.selectedDeviceInfoScale['name'])
 
-        if self.socketScale and self.socketScale.state() == QBluetoothSocket.ConnectedState:
-            self.socketScale.disconnectFromService()
-            self.socketScale = None
+    def connectScale(self, address, name):
+        from PyQt5.QtBluetooth import QBluetoothAddress, QBluetoothSocket, QBluetoothUuid, QBluetoothServiceInfo
+
+        if self.socketScale:
+            # abort() also drops a connection attempt that is still in progress
+            previous, self.socketScale = self.socketScale, None
+            previous.abort()
 
-        self.socketScale = QBluetoothSocket(QBluetoothServiceInfo.RfcommProtocol)
+        self.reconnectTargets['scale'] = (address, name)
+        self.socketScale = socket = QBluetoothSocket(QBluetoothServiceInfo.RfcommProtocol)
+        self.collector.reset_scale()
         self.socketScale.connected.connect(self.scaleConnected)
-        self.socketScale.error.connect(self.socketError)
+        self.socketScale.error.connect(lambda error: self.socketError(error, 'scale', socket))
         self.socketScale.readyRead.connect(self.readFromBluetoothScale)
 
         try:
-            self.socketScale.connectToService(self.selectedDeviceInfoScale.address(),
-                                              QBluetoothUuid(QBluetoothUuid.SerialPort))
+            self.socketScale.connectToService(QBluetoothAddress(address), QBluetoothUuid(QBluetoothUuid.SerialPort))
             print("Bluetooth Terazi cihazına bağlanma isteği gönderildi")
         except ConnectionError as e:
             print(f"Bağlantı hatası: {e}")
@@ -572,7 +530,10 @@ class BluetoothManager(QMainWindow):
 
     def startDiscoveryBluetooth(self):
         print("Bluetooth Barkod cihaz keşfi başlatıldı")
-        self.deviceListBluetooth.clear()
+        self.listKnownDevices('barcode', self.deviceListBluetooth)
+        if self.discoveryAgentBluetooth is None:
+            self.discoveryAgentBluetooth = self.createDiscoveryAgent(self.deviceDiscoveredBluetooth,
+                                                                     self.discoveryFinishedBluetooth)
         self.discoveryAgentBluetooth.start()
 
     def connectToDeviceBluetooth(self):
@@ -584,19 +545,26 @@ class BluetoothManager(QMainWindow):
         selectedItem = selectedItems[0]
         self.selectedDeviceInfoBluetooth = selectedItem.data(Qt.UserRole)
         print(
-            f"Seçilen Cihaz (Bluetooth Barkod): {self.selectedDeviceInfoBluetooth.name()}, Adres: {self.selectedDeviceInfoBluetooth.address().toString()}")
+            f"Seçilen Cihaz (Bluetooth Barkod): {self.selectedDeviceInfoBluetooth['name']}, Adres: {self.selectedDeviceInfoBluetooth['address']}")
+        self.reconnectDelays.pop('barcode', None)
+        self.knownCandidates.pop('barcode', None)
+        self.connectBarcode(self.selectedDeviceInfoBluetooth['address'], self.selectedDeviceInfoBluetooth['name'])
 
-        if self.socketBluetooth and self.socketBluetooth.state() == QBluetoothSocket.ConnectedState:
-            self.socketBluetooth.disconnectFromService()
-            self.socketBluetooth = None
+    def connectBarcode(self, address, name):
+        from PyQt5.QtBluetooth import QBluetoothAddress, QBluetoothSocket, QBluetoothUuid, QBluetoothServiceInfo
 
-        self.socketBluetooth = QBluetoothSocket(QBluetoothServiceInfo.RfcommProtocol)
+        if self.socketBluetooth:
+            previous, self.socketBluetooth = self.socketBluetooth, None
+            previous.abort()
+
+        self.reconnectTargets['barcode'] = (address, name)
+        self.socketBluetooth = socket = QBluetoothSocket(QBluetoothServiceInfo.RfcommProtocol)
         self.socketBluetooth.connected.connect(self.barcodeConneced)
-        self.socketBluetooth.error.connect(self.socketError)
+        self.socketBluetooth.error.connect(lambda error: self.socketError(error, 'barcode', socket))
         self.socketBluetooth.readyRead.connect(self.readFromBluetoothBarcode)
 
         try:
-            self.socketBluetooth.connectToService(self.selectedDeviceInfoBluetooth.address(),
+            self.socketBluetooth.connectToService(QBluetoothAddress(address),
                                                   QBluetoothUuid(QBluetoothUuid.SerialPort))
             print("Bluetooth Barkod cihazına bağlanma isteği gönderildi")
         except ConnectionError as e:
@@ -611,23 +579,7 @@ class BluetoothManager(QMainWindow):
         if not self.socketBluetooth:
             return
 
-        while self.socketBluetooth.canReadLine():
-            line = self.socketBluetooth.readLine().data().decode('utf-8').strip()
-            if self.validate_barcode_data(line):
-                print(f"Valid barcode data: {line}")
-                self.servicesListBluetooth.append(f"Barkod: {line}")
-                self.trigger_camera_capture(line)  # Trigger camera capture
-
-                # Update the startup tab with barcode, weight, and image path
-                if self.latest_weight:
-                    weight_status = self.latest_weight.split('-')[0].strip()
-                    weight_value = self.latest_weight.split('-')[1].strip()
-                    self.updateStartupTab(line, f"{weight_status} - {weight_value}", self.photo_path_value.text())
-                else:
-                    self.updateStartupTab(line, None, self.photo_path_value.text())
-            else:
-                print(f"Invalid barcode data: {line}")
-                self.servicesListBluetooth.append(f"Geçersiz barkod: {line}")
+        self.collector.feed_barcode_bytes(self.socketBluetooth.readAll().data(), 'bluetooth')
 
     def updateStartupTab(self, barcode_data, weight, photo_path):
         """
@@ -638,12 +590,8 @@ class BluetoothManager(QMainWindow):
 
         # Update the weight label
         if weight:
-            try:
-                # Display weight information
-                self.no_weight_device_label.setText(f"{barcode_data} - {weight}")
-            except ValueError:
-                print(f"Invalid weight format: {weight}")
-                self.no_weight_device_label.setText(f"{barcode_data} - Verilen bilgiler eksik")
+            # Display weight information
+            self.no_weight_device_label.setText(f"{barcode_data} - {weight}")
         else:
             self.no_weight_device_label.setText(f"{barcode_data} - Verilen bilgiler eksik")
 
@@ -653,60 +601,101 @@ class BluetoothManager(QMainWindow):
         else:
             self.photo_path_value.setText("Resim yolu yok")
 
-        # Check if barcode and photo_path are valid
-        if barcode_data and photo_path and not self.data_inserted:
-            # Attempt to insert data
-            if self.db_manager.insert_data(barcode_data, weight, photo_path):
-                self.show_success_message("Veri başarıyla kaydedildi")
-                self.data_inserted = True  # Set flag to prevent repeated insertions
-            else:
-                print("Data insertion failed")
-        else:
-            print(f"Data not inserted: barcode or photo_path is invalid or empty")
-
-
-
     def readFromBluetoothScale(self):
         if not self.socketScale:
             return
 
-        while self.socketScale.canReadLine():
-            line = self.socketScale.readLine().data().decode('utf-8').strip()
-            print(f"Bluetooth Terazi'den gelen veri: {line}")
-
-            # Emit the signal with the new data
-            self.newDataAvailable.emit(line)
-
-    newDataAvailable = pyqtSignal(str)
-
-    @pyqtSlot(str)
-    def updateUI(self, line):
-        if self.devmode:
-            # Insert original data to the top of the original data list
-            self.originalDataListScale.insertItem(0, line)
-
-        if self.selected_model_regex:
-            match = self.selected_model_regex.search(line)
-            if match:
-                # Extract the weight value using regex
-                weight = match.group(1).strip()
-                self.servicesListScale.append(f"Terazi: {line}")
-                self.latest_weight = weight  # Update the latest weight
-                self.updateStartupTab(
-                    self.barcode_label.text().split(': ')[1].strip(),
-                    self.latest_weight,
-                    self.photo_path_value.text()
-                )
+        self.collector.feed_scale_bytes(self.socketScale.readAll().data())
 
+    @pyqtSlot(str, dict)
+    def onCollectorEvent(self, kind, data):
+        """
+        Reflect collector events in the window.
+        """
+        if data['lane'] != self.collector.lane.name:
+            self.updateLaneStatus(kind, data)
+            return
+
+        barcode_logs = {'bluetooth': self.servicesListBluetooth, 'serial': self.servicesListSerial}
+
+        if kind == 'scale_line':
+            print(f"Bluetooth Terazi'den gelen veri: {data['line']}")
+            if self.devmode:
+                # Insert original data to the top of the original data list
+                self.originalDataListScale.append(data['line'])
+        elif kind == 'no_model':
+            print("No regex pattern set for model")
+        elif kind == 'model_detected':
+            self.selected_model = data['model']
+            self.servicesListScale.append(f"Terazi modeli algılandı: {data['model']} "
+                                          f"({data['score']}/{data['lines']} satır)")
+            if 'scale' in self.reconnectTargets:
+                self.deviceCache.set_model(self.reconnectTargets['scale'][0], data['model'])
+        elif kind == 'model_unknown':
+            self.servicesListScale.append("Terazi modeli algılanamadı, lütfen seçin")
+            self.showModelSelectionDialog()
+        elif kind == 'invalid_weight':
+            print(f"Geçersiz veri: {data['line']}")
+            self.servicesListScale.append(f"Geçersiz veri: {data['line']}")
+        elif kind == 'weight':
+            self.servicesListScale.append(f"Terazi: {data['line']}")
+            if data['stable']:
+                self.no_weight_device_label.setText(f"{data['weight']} kg")
                 if self.devmode:
                     # Insert captured data to the top of the captured data list
-                    self.capturedDataListScale.insertItem(0, f"{weight} kg")
+                    self.capturedDataListScale.append(f"{data['weight']} kg")
+        elif kind == 'barcode':
+            barcode_logs[data['source']].append(f"Barkod: {data['barcode']}")
+            self.barcode_label.setText(f"BARKOD: {data['barcode']}")
+            # The photo path label is cleared until the new image is really on disk
+            self.photo_path_value.setText("Resim yolu yok")
+        elif kind == 'invalid_barcode':
+            barcode_logs[data['source']].append(f"Geçersiz barkod: {data['barcode']}")
+        elif kind == 'capture_failed':
+            self.servicesListSerial.append(data['reason'])
+            self.notifications.error(f"Fotoğraf çekilemedi: {data['reason']}")
+        elif kind == 'photo_saved':
+            self.servicesListSerial.append(f"Fotoğraf kaydedildi: {data['path']}")
+            self.photo_path_value.setText(data['path'])
+        elif kind == 'duplicate_skipped':
+            self.servicesListSerial.append(f"Benzer fotoğraf zaten var, kaydedilmedi: {data['path']}")
+        elif kind == 'photo_failed':
+            self.servicesListSerial.append(f"Fotoğraf kaydedilemedi: {data['error']}")
+            self.notifications.error(f"Fotoğraf kaydedilemedi: {data['error']}")
+        elif kind == 'record_failed':
+            self.servicesListSerial.append(f"Kayıt yazılamadı: {data['barcode']} - {data['error']}")
+            self.notifications.error(f"Kayıt yazılamadı: {data['error']}")
+        elif kind == 'session_expired':
+            self.servicesListSerial.append(f"Eşleşme zaman aşımı: {data['barcode']} - "
+                                           f"{', '.join(PART_NAMES[part] for part in data['missing'])} yok")
+        elif kind == 'record_inserted':
+            self.updateStartupTab(data['barcode'], data['weight'], data['path'])
+            self.notifications.record_saved(barcode=data['barcode'])
+
+    def updateLaneStatus(self, kind, data):
+        """
+        Show the latest capture step of an additional lane in its status row.
+        """
+        label = self.lane_status_labels.get(data['lane'])
+        if not label:
+            return
 
-            else:
-                print(f"Geçersiz veri: {line}")
-                self.servicesListScale.append(f"Geçersiz veri: {line}")
-        else:
-            print("No regex pattern set for model")
+        if kind == 'barcode':
+            label.setText(f"KASA {data['lane']}: {data['barcode']}")
+        elif kind == 'capture_failed':
+            label.setText(f"KASA {data['lane']}: {data['barcode']} - {data['reason']}")
+            self.notifications.error(f"KASA {data['lane']}: fotoğraf çekilemedi: {data['reason']}")
+        elif kind == 'photo_failed':
+            label.setText(f"KASA {data['lane']}: {data['barcode']} - fotoğraf kaydedilemedi")
+            self.notifications.error(f"KASA {data['lane']}: fotoğraf kaydedilemedi: {data['error']}")
+        elif kind == 'record_inserted':
+            label.setText(f"KASA {data['lane']}: {data['barcode']} - {data['weight']} kg - kaydedildi")
+            self.notifications.record_saved(data['lane'], data['barcode'])
+        elif kind == 'record_failed':
+            label.setText(f"KASA {data['lane']}: {data['barcode']} - kaydedilemedi")
+            self.notifications.error(f"KASA {data['lane']}: kayıt yazılamadı: {data['error']}")
+        elif kind == 'session_expired':
+            label.setText(f"KASA {data['lane']}: {data['barcode']} - zaman aşımı")
 
     def connectToSerial(self):
         port = self.serial_port
@@ -714,8 +703,9 @@ class BluetoothManager(QMainWindow):
             QMessageBox.critical(self, "Bağlantı Hatası", "Lütfen bir seri port girin.")
             return
 
-        self.serialListener = SerialListener(port)
-        self.serialListener.barcode_received.connect(self.handleSerialBarcodeData)
+        # Other lanes' scanners would type into the same global keyboard hook, as in start_sources
+        self.serialListener = make_serial_listener(self.settings, port, self.handleSerialBarcodeData,
+                                                   keyboard_wedge=len(self.lanes.collectors) == 1)
         self.serialListener.start()
 
         self.serialPort = port
@@ -726,18 +716,16 @@ class BluetoothManager(QMainWindow):
         self.disconnectButtonSerial.setEnabled(True)
 
     def handleSerialBarcodeData(self, data):
-        if self.validate_barcode_data(data):
-            print(f"Valid barcode data: {data}")
-            self.servicesListSerial.append(f"Barkod: {data}")
-            self.trigger_camera_capture(data)  # Trigger camera capture
-
-            # Update the startup tab barcode label
-            self.barcode_label.setText(f"BARKOD: {data}")
-        else:
-            print(f"Invalid barcode data: {data}")
-            self.servicesListSerial.append(f"Geçersiz barkod: {data}")
+        """
+        Called from the serial listener thread; the collector validates the barcode and triggers the camera.
+        """
+        self.collector.submit_barcode(data, 'serial')
 
     def disconnectFromDeviceScale(self):
+        # A disconnect asked for by the user is not retried
+        self.reconnectTargets.pop('scale', None)
+        self.knownCandidates.pop('scale', None)
+        self.connectedRoles.discard('scale')
         if self.socketScale:
             self.socketScale.disconnectFromService()
             self.socketScale.close()
@@ -748,6 +736,9 @@ class BluetoothManager(QMainWindow):
             self.no_weight_device_label.setText("Bağlı Cihaz Yok")
 
     def disconnectFromDeviceBarcode(self):
+        self.reconnectTargets.pop('barcode', None)
+        self.knownCandidates.pop('barcode', None)
+        self.connectedRoles.discard('barcode')
         if self.socketBluetooth:
             self.socketBluetooth.disconnectFromService()
             self.socketBluetooth.close()
@@ -760,10 +751,13 @@ class BluetoothManager(QMainWindow):
 
     def disconnectFromSerial(self):
         if self.serialListener:
+            # stop() cancels the pending read, so the join does not hold up the window
             self.serialListener.stop()
-            self.serialListener.wait()
+            self.serialListener.join(timeout=2)
+            metrics = self.serialListener.metrics()
             self.serialListener = None
-            self.servicesListSerial.append(f"Bağlantı kapatıldı: {self.serialPort}")
+            self.servicesListSerial.append(f"Bağlantı kapatıldı: {self.serialPort} "
+                                           f"({metrics['bytes_received']} bayt, {metrics['frames_emitted']} barkod)")
             self.tabWidget.setTabEnabled(2, True)
             self.no_barcode_device_label.setText("Bağlı Cihaz Yok")
             self.connectButtonSerial.setEnabled(True)
@@ -780,6 +774,24 @@ class BluetoothManager(QMainWindow):
             self.tabWidget.setTabEnabled(2, True)  # Bluetooth Barkod tab
             self.tabWidget.setTabEnabled(3, True)  # Serial Barkod tab
 
+            address, name = self.reconnectTargets.get('scale', (None, None))
+            self.connectedRoles.add('scale')
+            self.knownCandidates.pop('scale', None)
+            self.reconnectDelays.pop('scale', None)
+            if address:
+                self.deviceCache.remember('scale', address, name)
+            model = self.deviceCache.model_for(address) if address else None
+            if model and model in self.model_regex:
+                # A remembered scale keeps its model, also after a reconnect
+                self.selected_model = model
+                self.collector.set_scale_model(model)
+                return
+            if self.settings.model_auto_detect:
+                # The dialog is only shown when no model reads the first lines
+                self.servicesListScale.append("Terazi modeli algılanıyor")
+                self.collector.detect_scale_model()
+                return
+
             # Show model selection dialog
             self.showModelSelectionDialog()
         except Exception as e:
@@ -788,82 +800,59 @@ class BluetoothManager(QMainWindow):
 
     def barcodeConneced(self):
         print("Cihaza başarıyla bağlanıldı")
+        address, name = self.reconnectTargets.get('barcode', (None, None))
+        self.connectedRoles.add('barcode')
+        self.knownCandidates.pop('barcode', None)
+        self.reconnectDelays.pop('barcode', None)
+        if address:
+            self.deviceCache.remember('barcode', address, name)
         self.no_barcode_device_label.clear()
         self.disconnectButtonBarcode.setEnabled(True)
         self.tabWidget.setTabEnabled(3, False)
 
-    def socketError(self, error):
+    def socketError(self, error, role=None, socket=None):
         error_message = f"Soket hatası: {error}"
         print(error_message)  # Terminale yazdır
+        REGISTRY.counter('socket_errors', "Device socket connection failures and disconnects",
+                         source='bluetooth', role=role or 'unknown').inc()
 
-        # Arayüze yazdır
-        QMessageBox.critical(self, "Soket Hatası", error_message)
-
-    def validate_barcode_data(self, barcode_data):
-        if len(barcode_data) != 13:
-            return False
-        for char in barcode_data:
-            if not char.isdigit() or not 0 <= int(char) <= 9:
-                return False
-        return True
-
-    def trigger_camera_capture(self, barcode_data):
-        print(f"Kamera tetiklendi: Barkod - {barcode_data}")
-        rtsp_url = f'rtsp://{self.camera_user}:{self.camera_password}@{self.camera_ip}:554/stream'
-        cap = cv2.VideoCapture(rtsp_url)
-
-        filename = None
-        if cap.isOpened():
-            ret, frame = cap.read()
-            if ret:
-                timestamp = time.strftime("%Y%m%d-%H%M%S")
-                directory = "captured_images"
-                if not os.path.exists(directory):
-                    os.makedirs(directory)
-
-                filename = os.path.join(directory, f"{barcode_data}_{timestamp}.jpg")
-                cv2.imwrite(filename, frame)
-                print(f"Fotoğraf kaydedildi: {filename}")
-                self.servicesListSerial.append(f"Fotoğraf kaydedildi: {filename}")
-            else:
-                print("Kamera görüntüsü alınamadı")
-                self.servicesListSerial.append("Kamera görüntüsü alınamadı")
-        else:
-            print("Kamera açılamadı")
-            self.servicesListSerial.append("Kamera açılamadı")
-
-        cap.release()
+        # Arayüze yazdır, bağlantı kopukken tekrar eden hatalar pencereyi kilitlemesin
+        self.notifications.error(error_message)
 
-        # Update the startup tab photo path label
-        if filename:
-            self.photo_path_value.setText(filename)
-        else:
-            self.photo_path_value.setText("Resim yolu yok")
+        # Errors of a socket that was already replaced are not retried
+        if role and socket is (self.socketScale if role == 'scale' else self.socketBluetooth):
+            # A dropped device counts as not connected, so discovery can run again if it stays away
+            self.connectedRoles.discard(role)
+            self.scheduleReconnect(role)
 
     def closeEvent(self, event):
         """
         Override the closeEvent to clean up connections and threads.
         """
+        self.reconnectTargets.clear()
         # Stop the Bluetooth connections
-        if self.socketScale and self.socketScale.state() == QBluetoothSocket.ConnectedState:
+        if self.socketScale and self.socketScale.state() == self.socketScale.ConnectedState:
             self.socketScale.disconnectFromService()
-        if self.socketBluetooth and self.socketBluetooth.state() == QBluetoothSocket.ConnectedState:
+        if self.socketBluetooth and self.socketBluetooth.state() == self.socketBluetooth.ConnectedState:
             self.socketBluetooth.disconnectFromService()
 
         # Stop the serial listener if it exists
         if self.serialListener:
             self.serialListener.stop()
 
-        # Close the database connection
-        if self.db_manager:
-            self.db_manager.close()
+        # Stop the lanes: cameras, sources, pending images and the database connection
+        if self.lanes:
+            self.lanes.stop()
 
         # Call the base class implementation
         super().closeEvent(event)
 
 
 if __name__ == '__main__':
-    app = QApplication(sys.argv)
+    multiprocessing.freeze_support()  # Needed for the process pool in the frozen exe
+    with PROFILER.phase("QApplication"):
+        app = QApplication(sys.argv)
     window = BluetoothManager()
-    window.show()
+    with PROFILER.phase("show"):
+        window.show()
     sys.exit(app.exec_())
@@ -0,0 +1,421 @@
+import argparse
+import json
+import os
+import queue
+import re
+import sqlite3
+import struct
+import threading
+import time
+import zlib
+from concurrent.futures import Future
+
+from database import INSERT_QUERY, RECORD_COLUMNS, SQLiteManager, StorageBackend
+from image_writer import THUMBNAIL_DIR
+from metrics import REGISTRY
+
+MAGIC = b'PDSEG001'
+# Each record is its payload length and CRC-32, then the record as a JSON array
+RECORD_HEADER = struct.Struct('>II')
+SEGMENT_NAME_PATTERN = re.compile(r'segment-(\d{8})\.log$')
+
+
+def segment_path(directory, index):
+    return os.path.join(directory, f'segment-{index:08d}.log')
+
+
+def list_segments(directory):
+    """
+    (index, path) of the segments in `directory`, oldest first.
+    """
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    return sorted((int(match.group(1)), os.path.join(directory, name))
+                  for name in names for match in (SEGMENT_NAME_PATTERN.match(name),) if match)
+
+
+def encode_record(record):
+    payload = json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def read_segment(path):
+    """
+    Read the records of a segment. Returns (records, valid_bytes, size);
+    reading stops at the first record that is cut short or fails its CRC, so
+    valid_bytes < size means the tail after it was torn by a crash.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        return [], 0, len(data)
+
+    records = []
+    offset = len(MAGIC)
+    while offset + RECORD_HEADER.size <= len(data):
+        length, crc = RECORD_HEADER.unpack_from(data, offset)
+        start = offset + RECORD_HEADER.size
+        payload = data[start:start + length]
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            break
+        try:
+            records.append(json.loads(payload))
+        except ValueError:
+            break
+        offset = start + length
+    return records, offset, len(data)
+
+
+def fsync_directory(directory):
+    """
+    Make a new segment's directory entry durable. Windows cannot open directories; NTFS journals it anyway.
+    """
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class SegmentLogWriter(threading.Thread):
+    """
+    Appends queued records to the newest segment file. A batch is written
+    with a single write() and its Futures resolve once the data is with the
+    OS; the file is fsynced at most every `fsync_interval` seconds (0 syncs
+    every batch), when the writer is idle and when a segment reaches
+    `max_bytes` and is closed for the next one.
+
+    A failed write fails only its batch. Any other error (the segment cannot
+    be opened or rotated) fails every queued Future and ends the thread, as
+    in SQLiteWriter; submit() raises from then on.
+    """
+
+    def __init__(self, directory, max_bytes=16 * 1024 * 1024, fsync_interval=1.0, batch_size=64):
+        super().__init__(daemon=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.fsync_interval = fsync_interval
+        self.batch_size = batch_size
+        self.records = queue.Queue()
+        self.stopping = False
+        self.failed = None
+        self.lock = threading.Lock()
+        self.file = None
+        self.index = 0
+        self.dirty = False
+        self.last_fsync = time.monotonic()
+
+        self.write_time = REGISTRY.histogram('segment_write_seconds', "Time to append one batch to the segment log")
+        self.fsync_time = REGISTRY.histogram('segment_fsync_seconds', "Time to fsync the segment log")
+        REGISTRY.gauge('segment_queue_depth', "Records waiting for the segment log writer",
+                       callback=self.queue_depth)
+
+    def submit(self, record):
+        future = Future()
+        with self.lock:
+            if self.failed is not None or (self.ident is not None and not self.is_alive() and not self.stopping):
+                raise RuntimeError(f"Segment log writer is not running: {self.failed}")
+            if self.stopping:
+                future.set_exception(RuntimeError("Segment log writer is stopped"))
+                return future
+            self.records.put((future, record))
+        return future
+
+    def queue_depth(self):
+        return self.records.qsize()
+
+    def open_segment(self):
+        """
+        Continue the newest segment after cutting off a torn tail, or start the first one.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        segments = list_segments(self.directory)
+        if not segments:
+            self.new_segment(1)
+            return
+
+        self.index, path = segments[-1]
+        _, valid_bytes, size = read_segment(path)
+        if valid_bytes < size:
+            print(f"Segment kaydının yarım kalan sonu kesildi ({path}): {size - valid_bytes} bayt")
+        self.file = open(path, 'r+b')
+        self.file.truncate(valid_bytes)
+        self.file.seek(valid_bytes)
+        if valid_bytes == 0:
+            self.file.write(MAGIC)
+        self.sync()
+
+    def new_segment(self, index):
+        self.index = index
+        self.file = open(segment_path(self.directory, index), 'xb')
+        self.file.write(MAGIC)
+        self.sync()
+        fsync_directory(self.directory)
+
+    def rotate(self):
+        self.sync()
+        self.file.close()
+        self.new_segment(self.index + 1)
+
+    def sync(self):
+        with self.fsync_time.time():
+            self.file.flush()
+            os.fsync(self.file.fileno())
+        self.dirty = False
+        self.last_fsync = time.monotonic()
+
+    def sync_timeout(self):
+        if not self.dirty:
+            return None
+        return max(0.0, self.last_fsync + self.fsync_interval - time.monotonic())
+
+    def run(self):
+        batch = []
+        try:
+            self.open_segment()
+            while True:
+                try:
+                    item = self.records.get(timeout=self.sync_timeout())
+                except queue.Empty:
+                    self.sync()
+                    continue
+                if item is None:
+                    break
+
+                # Whatever queued up while the last batch was written goes in the next write
+                batch = [item]
+                stop_after_batch = False
+                while len(batch) < self.batch_size:
+                    try:
+                        item = self.records.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        stop_after_batch = True
+                        break
+                    batch.append(item)
+
+                self.write_batch(batch)
+                batch = []
+                if stop_after_batch:
+                    break
+        except Exception as e:
+            print(f"Segment kaydı durdu: {e}")
+            self.fail_pending(batch, e)
+        finally:
+            self.close_file()
+
+    def close_file(self):
+        if self.file is None or self.file.closed:
+            return
+        try:
+            self.sync()
+        except OSError as e:
+            print(f"Segment kaydı diske yazılamadı: {e}")
+        finally:
+            self.file.close()
+
+    def fail_pending(self, batch, error):
+        """
+        Fail the batch in progress and everything still queued, so no caller waits forever.
+        """
+        with self.lock:
+            self.failed = error
+            self.stopping = True
+            pending = list(batch)
+            while True:
+                try:
+                    item = self.records.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None:
+                    pending.append(item)
+        for future, _ in pending:
+            if not future.done():
+                future.set_exception(error)
+
+    def write_batch(self, batch):
+        data = b''.join(encode_record(record) for _, record in batch)
+        position = self.file.tell()
+        try:
+            with self.write_time.time():
+                self.file.write(data)
+                self.file.flush()
+            if time.monotonic() - self.last_fsync >= self.fsync_interval:
+                self.sync()
+            else:
+                self.dirty = True
+            if self.file.tell() >= self.max_bytes:
+                self.rotate()
+        except OSError as e:
+            print(f"Segment kaydı yazılamadı: {e}")
+            # A partly written batch would hide every record appended after it
+            try:
+                self.file.truncate(position)
+                self.file.seek(position)
+            except OSError:
+                pass
+            for future, _ in batch:
+                future.set_exception(e)
+            return
+
+        for future, _ in batch:
+            future.set_result(True)
+
+    def stop(self):
+        """
+        Write and fsync everything already queued and stop the thread.
+        """
+        self.stopping = True
+        self.records.put(None)
+        if self.is_alive():
+            self.join()
+
+
+class SegmentLogManager(StorageBackend):
+    """
+    Records appended to length-prefixed segment files instead of being
+    inserted into SQLite: an append and an occasional fsync instead of a
+    transaction per batch. `python segment_log.py` bulk-loads closed segments
+    into `db_file`, where the exports and tools read them.
+
+    Every record is accepted; duplicates of an earlier (barcode, photo) pair
+    are only dropped when the segments are replayed.
+    """
+
+    backend = 'segment_log'
+
+    def __init__(self, directory, db_file, max_bytes=16 * 1024 * 1024, fsync_interval=1.0, batch_size=64):
+        self.directory = directory
+        self.db_file = db_file
+        self.writer = SegmentLogWriter(directory, max_bytes, fsync_interval, batch_size)
+
+    def connect(self):
+        os.makedirs(self.directory, exist_ok=True)
+        print(f"Segment kaydı: {self.directory}")
+
+    def start_writer(self):
+        # A writer that died is not restarted; its submit() reports the error
+        if self.writer.ident is None:
+            self.writer.start()
+
+    def load_photo_hashes(self):
+        hashes = []
+        if os.path.exists(self.db_file):
+            manager = SQLiteManager(self.db_file)
+            manager.connect()
+            manager.create_table()
+            hashes = manager.load_photo_hashes()
+            manager.close()
+        for row in iter_segment_rows(self.directory):
+            if row['PhotoHash'] and not row['DuplicateOf']:
+                hashes.append((row['Barcode'], row['PhotoHash'], row['PhotoPath']))
+        return hashes
+
+    def write_record(self, record):
+        self.start_writer()
+        return self.writer.submit(record)
+
+    def close(self):
+        self.writer.stop()
+
+
+def iter_segment_rows(directory):
+    """
+    Records still waiting in the segments, as {column: value} dicts.
+    """
+    for _, path in list_segments(directory):
+        records, _, _ = read_segment(path)
+        for record in records:
+            yield dict(zip(RECORD_COLUMNS, record))
+
+
+def replay_segments(directory, db_file, include_active=False):
+    """
+    Bulk-load segments into ProductData, one transaction per segment, and
+    delete each segment once its transaction is committed. Records after a
+    torn tail are lost with it; the records before it are loaded. The newest
+    segment may still be appended to by a running collector and is only
+    loaded with `include_active`, when the collector is stopped. A run that
+    stops halfway can be started again: rows already loaded are skipped.
+    """
+    # Bring older databases up to the current schema first
+    manager = SQLiteManager(db_file)
+    manager.connect()
+    manager.create_table()
+    manager.close()
+
+    segments = list_segments(directory)
+    if not include_active:
+        segments = segments[:-1]
+
+    conn = sqlite3.connect(db_file)
+    conn.execute("PRAGMA journal_mode=WAL")
+    loaded = skipped = 0
+    try:
+        for _, path in segments:
+            records, valid_bytes, size = read_segment(path)
+            if valid_bytes < size:
+                print(f"{path}: yarım kalan son {size - valid_bytes} bayt atlandı")
+            with conn:
+                before = conn.total_changes
+                conn.executemany(INSERT_QUERY, records)
+                inserted = conn.total_changes - before
+            loaded += inserted
+            skipped += len(records) - inserted
+            os.remove(path)
+    finally:
+        conn.close()
+    print(f"{len(segments)} segment yüklendi: {loaded} yeni kayıt, {skipped} kayıt zaten vardı")
+    return loaded, skipped
+
+
+def find_orphan_images(db_file, directory, image_dir='captured_images', image_root='.'):
+    """
+    Images under `image_dir` that no row or waiting segment record points to:
+    photos written just before a crash, whose record never arrived.
+    """
+    conn = sqlite3.connect(f'file:{db_file}?mode=ro', uri=True)
+    try:
+        paths = [path for path, in conn.execute("SELECT PhotoPath FROM ProductData")]
+    finally:
+        conn.close()
+    paths.extend(row['PhotoPath'] for row in iter_segment_rows(directory))
+    referenced = {os.path.normpath(os.path.join(image_root, path)) for path in paths}
+
+    orphans = []
+    for dirpath, dirnames, filenames in os.walk(os.path.join(image_root, image_dir)):
+        dirnames[:] = [name for name in dirnames if name != THUMBNAIL_DIR]
+        for name in filenames:
+            path = os.path.normpath(os.path.join(dirpath, name))
+            if path not in referenced:
+                orphans.append(path)
+    return sorted(orphans)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load segment log records into the SQLite database.")
+    parser.add_argument('db_file', nargs='?', default='product_data.db')
+    parser.add_argument('--segments', default='product_data_segments', help="segment log directory")
+    parser.add_argument('--all', action='store_true',
+                        help="also load the newest segment; only while the collector is stopped")
+    parser.add_argument('--orphans', action='store_true', help="list images that have no record")
+    parser.add_argument('--image-dir', default='captured_images', help="image store directory")
+    parser.add_argument('--image-root', default='.', help="directory the stored photo paths are relative to")
+    args = parser.parse_args(argv)
+
+    replay_segments(args.segments, args.db_file, args.all)
+    if args.orphans:
+        orphans = find_orphan_images(args.db_file, args.segments, args.image_dir, args.image_root)
+        for path in orphans:
+            print(path)
+        print(f"{len(orphans)} resmin kaydı yok")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,343 @@
+import configparser
+import os
+import sys
+
+from barcodes import ALL_SYMBOLOGIES, parse_symbologies
+from image_writer import ImageEncoding, parse_roi
+
+DEFAULT_CONFIG = {
+    'Camera': {
+        'ip_address': '',
+        'username': '',
+        'password': '',
+        'buffer_size': '8',
+        'burst_frames': '5',
+        'burst_window_ms': '200',
+        'sharpness_width': '320',
+        'roi': '',
+        'image_format': 'jpg',
+        'max_width': '0',
+        'max_height': '0',
+        'thumbnail_width': '0',
+    },
+    'SerialPort': {
+        'port': '',
+        'baudrate': '9600',
+        'parity': 'N',
+        'bytesize': '8',
+        'stopbits': '1',
+        'terminator': 'line',
+    },
+    'Scale': {
+        'address': '',
+        'model': '',
+        'auto_detect': '1',
+        'detect_lines': '20',
+        'detect_min_share': '0.6',
+    },
+    'Barcode': {
+        'symbologies': ','.join(ALL_SYMBOLOGIES),
+    },
+    'Keyboard': {
+        'max_gap_ms': '30',
+        'min_length': '8',
+        'max_length': '64',
+    },
+    'ImageStore': {
+        'layout': 'date',
+        'root': 'captured_images',
+    },
+    'ImageWriter': {
+        'workers': '2',
+        'queue_size': '16',
+        'mode': 'thread',
+        'jpeg_quality': '95',
+    },
+    'Database': {
+        'file': 'product_data.db',
+        'batch_size': '64',
+        'batch_window_ms': '50',
+        'synchronous': 'NORMAL',
+        'backend': 'sqlite',
+        'segment_dir': 'product_data_segments',
+        'segment_max_bytes': '16777216',
+        'fsync_interval_ms': '1000',
+    },
+    'Framing': {
+        'scale_terminator': 'line',
+        'barcode_terminator': 'line',
+        'max_buffer': '4096',
+    },
+    'Stabilizer': {
+        'window_size': '32',
+        'tolerance': '0.002',
+        'stable_time_ms': '500',
+        'max_slope': '0.005',
+        'min_weight': '0.0',
+    },
+    'Dedupe': {
+        'mode': 'flag',
+        'threshold': '6',
+    },
+    'LogView': {
+        'capacity': '1000',
+        'flush_interval_ms': '100',
+        'spill_dir': '',
+        'spill_max_bytes': '1048576',
+        'spill_backups': '3',
+    },
+    'Metrics': {
+        'port': '0',
+        'host': '127.0.0.1',
+        'snapshot_file': '',
+        'snapshot_interval_s': '30',
+    },
+    'Capture': {
+        'session_timeout_ms': '10000',
+        'max_open_sessions': '8',
+    },
+    'Devices': {
+        'cache_file': 'known_devices.json',
+        'auto_connect': '1',
+        'reconnect_delay_s': '1',
+        'max_reconnect_delay_s': '30',
+    },
+    'models': {
+        'HRCR': '',
+        'GUNAS': '',
+        'DENEME': '',
+        'DENEME2': '',
+    },
+    'devmode': {
+        'on': '0',  # Default value for devmode
+    },
+}
+
+
+LANE_SECTION_PREFIX = 'lane:'
+
+
+class LaneSettings:
+    """
+    One register station: a scale, a barcode scanner and a camera.
+    """
+
+    def __init__(self, name, camera_ip='', camera_user='', camera_password='', serial_port='',
+                 scale_address='', scale_model='', roi=None, encoding=None):
+        self.name = name
+        self.camera_ip = camera_ip
+        self.camera_user = camera_user
+        self.camera_password = camera_password
+        self.serial_port = serial_port
+        self.scale_address = scale_address
+        self.scale_model = scale_model.lower()
+        self.roi = roi
+        self.encoding = encoding or ImageEncoding()
+
+    @property
+    def rtsp_url(self):
+        if not self.camera_ip:
+            return None
+        return f'rtsp://{self.camera_user}:{self.camera_password}@{self.camera_ip}:554/stream'
+
+
+class Settings:
+    """
+    Values read from config.ini, with defaults for the optional sections.
+    """
+
+    def __init__(self, config):
+        # Camera configuration
+        self.camera_ip = config['Camera']['ip_address']
+        self.camera_user = config['Camera']['username']
+        self.camera_password = config['Camera']['password']
+        self.camera_buffer_size = int(config['Camera'].get('buffer_size', '8'))
+        self.burst_frames = config.getint('Camera', 'burst_frames', fallback=5)
+        self.burst_window_ms = config.getint('Camera', 'burst_window_ms', fallback=200)
+        self.sharpness_width = config.getint('Camera', 'sharpness_width', fallback=320)
+
+        # Stored image: crop rectangle, size and encoder; lanes may override each key
+        self.jpeg_quality = config.getint('ImageWriter', 'jpeg_quality', fallback=95)
+        self.camera_roi = parse_roi(config.get('Camera', 'roi', fallback=''))
+        self.camera_encoding = self.read_encoding(config['Camera'], None)
+
+        # Serial port configuration
+        self.serial_port = config['SerialPort']['port']
+        self.serial_baudrate = config.getint('SerialPort', 'baudrate', fallback=9600)
+        self.serial_parity = config.get('SerialPort', 'parity', fallback='N').upper()[:1]
+        self.serial_bytesize = config.getint('SerialPort', 'bytesize', fallback=8)
+        self.serial_stopbits = config.getfloat('SerialPort', 'stopbits', fallback=1)
+        self.serial_terminator = config.get('SerialPort', 'terminator', fallback='line')
+
+        # Scale used by the headless collector (the window picks it interactively)
+        self.scale_address = config.get('Scale', 'address', fallback='')
+        self.scale_model = config.get('Scale', 'model', fallback='').lower()
+
+        # Without a model, the first scale lines are scored against every [models] pattern
+        self.model_auto_detect = config.getboolean('Scale', 'auto_detect', fallback=True)
+        self.model_detect_lines = config.getint('Scale', 'detect_lines', fallback=20)
+        self.model_detect_min_share = config.getfloat('Scale', 'detect_min_share', fallback=0.6)
+
+        # Accepted barcode types
+        self.barcode_symbologies = parse_symbologies(config.get('Barcode', 'symbologies',
+                                                                fallback=','.join(ALL_SYMBOLOGIES)))
+
+        # Keyboard-wedge scanner burst detection
+        self.keyboard_max_gap_ms = config.getint('Keyboard', 'max_gap_ms', fallback=30)
+        self.keyboard_min_length = config.getint('Keyboard', 'min_length', fallback=8)
+        self.keyboard_max_length = config.getint('Keyboard', 'max_length', fallback=64)
+
+        # Where captured images are stored
+        self.image_store_layout = config.get('ImageStore', 'layout', fallback='date').lower()
+        self.image_store_root = config.get('ImageStore', 'root', fallback='captured_images')
+
+        # Image writer configuration
+        self.writer_workers = config.getint('ImageWriter', 'workers', fallback=2)
+        self.writer_queue_size = config.getint('ImageWriter', 'queue_size', fallback=16)
+        self.writer_mode = config.get('ImageWriter', 'mode', fallback='thread').lower()
+
+        # Database writer configuration
+        self.db_file = config.get('Database', 'file', fallback='product_data.db')
+        self.db_batch_size = config.getint('Database', 'batch_size', fallback=64)
+        self.db_batch_window_ms = config.getint('Database', 'batch_window_ms', fallback=50)
+        self.db_synchronous = config.get('Database', 'synchronous', fallback='NORMAL').upper()
+        # sqlite inserts rows directly; segment_log appends them to files loaded later by segment_log.py
+        self.db_backend = config.get('Database', 'backend', fallback='sqlite').lower()
+        self.db_segment_dir = config.get('Database', 'segment_dir', fallback='product_data_segments')
+        self.db_segment_max_bytes = config.getint('Database', 'segment_max_bytes', fallback=16 * 1024 * 1024)
+        self.db_fsync_interval_ms = config.getint('Database', 'fsync_interval_ms', fallback=1000)
+
+        # Byte framing of the scale and barcode streams
+        self.scale_framing = config.get('Framing', 'scale_terminator', fallback='line')
+        self.barcode_framing = config.get('Framing', 'barcode_terminator', fallback='line')
+        self.framing_max_buffer = config.getint('Framing', 'max_buffer', fallback=4096)
+
+        # Weight stabilization configuration
+        self.stabilizer_window = config.getint('Stabilizer', 'window_size', fallback=32)
+        self.stabilizer_tolerance = config.getfloat('Stabilizer', 'tolerance', fallback=0.002)
+        self.stabilizer_time_ms = config.getint('Stabilizer', 'stable_time_ms', fallback=500)
+        self.stabilizer_max_slope = config.getfloat('Stabilizer', 'max_slope', fallback=0.005)
+        self.stabilizer_min_weight = config.getfloat('Stabilizer', 'min_weight', fallback=0.0)
+
+        # Near-duplicate photo detection: off, flag (store and mark) or skip (do not store)
+        self.dedupe_mode = config.get('Dedupe', 'mode', fallback='flag').lower()
+        self.dedupe_threshold = config.getint('Dedupe', 'threshold', fallback=6)
+
+        # Log views in the window
+        self.log_capacity = config.getint('LogView', 'capacity', fallback=1000)
+        self.log_flush_interval_ms = config.getint('LogView', 'flush_interval_ms', fallback=100)
+        self.log_spill_dir = config.get('LogView', 'spill_dir', fallback='')
+        self.log_spill_max_bytes = config.getint('LogView', 'spill_max_bytes', fallback=1024 * 1024)
+        self.log_spill_backups = config.getint('LogView', 'spill_backups', fallback=3)
+
+        # Stage timings and counters: Prometheus text on http://host:port/metrics (port 0 is off), JSON snapshots
+        self.metrics_port = config.getint('Metrics', 'port', fallback=0)
+        self.metrics_host = config.get('Metrics', 'host', fallback='127.0.0.1')
+        self.metrics_snapshot_file = config.get('Metrics', 'snapshot_file', fallback='')
+        self.metrics_snapshot_interval_s = config.getfloat('Metrics', 'snapshot_interval_s', fallback=30.0)
+
+        # Pairing of a scan with its weighing and photo: unfinished scans expire after the timeout
+        self.session_timeout_ms = config.getint('Capture', 'session_timeout_ms', fallback=10000)
+        self.session_max_open = config.getint('Capture', 'max_open_sessions', fallback=8)
+
+        # Bluetooth devices the window connected to before, reconnected on startup and after a drop
+        self.device_cache_file = config.get('Devices', 'cache_file', fallback='known_devices.json')
+        self.device_auto_connect = config.getboolean('Devices', 'auto_connect', fallback=True)
+        self.device_reconnect_delay_s = config.getfloat('Devices', 'reconnect_delay_s', fallback=1.0)
+        self.device_max_reconnect_delay_s = config.getfloat('Devices', 'max_reconnect_delay_s', fallback=30.0)
+
+        # Scale models and their regex patterns
+        self.models = {model.lower(): pattern for model, pattern in config['models'].items()}
+
+        # Dev mode configuration
+        self.devmode = int(config['devmode'].get('on', '0'))
+
+        # Register lanes; without [Lane:name] sections the single [Camera]/[SerialPort]/[Scale] setup is one lane
+        self.lanes = self.load_lanes(config)
+
+    def read_encoding(self, section, fallback):
+        """
+        Image encoding from a [Camera] or [Lane:name] section; missing keys come from `fallback`.
+        """
+        fallback = fallback or ImageEncoding('jpg', self.jpeg_quality)
+        return ImageEncoding(section.get('image_format', fallback.image_format),
+                             section.getint('quality', fallback.quality),
+                             section.getint('max_width', fallback.max_width),
+                             section.getint('max_height', fallback.max_height),
+                             section.getint('thumbnail_width', fallback.thumbnail_width))
+
+    def load_lanes(self, config):
+        lanes = []
+        for section in config.sections():
+            if not section.lower().startswith(LANE_SECTION_PREFIX):
+                continue
+            lane = config[section]
+            lanes.append(LaneSettings(section[len(LANE_SECTION_PREFIX):].strip(),
+                                      camera_ip=lane.get('camera_ip', ''),
+                                      camera_user=lane.get('camera_username', self.camera_user),
+                                      camera_password=lane.get('camera_password', self.camera_password),
+                                      serial_port=lane.get('serial_port', ''),
+                                      scale_address=lane.get('scale_address', ''),
+                                      scale_model=lane.get('scale_model', ''),
+                                      roi=parse_roi(lane['roi']) if 'roi' in lane else self.camera_roi,
+                                      encoding=self.read_encoding(lane, self.camera_encoding)))
+        if not lanes:
+            lanes.append(LaneSettings('default', self.camera_ip, self.camera_user, self.camera_password,
+                                      self.serial_port, self.scale_address, self.scale_model,
+                                      self.camera_roi, self.camera_encoding))
+        return lanes
+
+
+def write_default_config(config_file_path):
+    config = configparser.ConfigParser()
+    config.read_dict(DEFAULT_CONFIG)
+    with open(config_file_path, 'w') as configfile:
+        config.write(configfile)
+
+
+# (absolute path, modification time) -> Settings, so every caller shares one parse of the file
+_settings_cache = {}
+
+
+def load_settings(config_file_path=None):
+    """
+    Read config.ini into a Settings object. A default file is written, and the
+    process exits, when it does not exist yet.
+
+    The result is cached until the file changes, so asking for the settings
+    again costs a stat() instead of another parse.
+    """
+    if config_file_path is None:
+        config_file_path = os.path.join(os.getcwd(), "config.ini")
+    config_file_path = os.path.abspath(config_file_path)
+    config_dir = os.path.dirname(config_file_path)
+    try:
+        cache_key = (config_file_path, os.stat(config_file_path).st_mtime_ns)
+    except OSError:
+        cache_key = None
+    if cache_key in _settings_cache:
+        return _settings_cache[cache_key]
+
+    if not os.path.exists(config_file_path):
+        if config_dir and not os.path.exists(config_dir):
+            os.makedirs(config_dir, exist_ok=True)
+        print("Config file not found. Creating default config file.")
+        write_default_config(config_file_path)
+        print("Default config file created. Please update the configuration and restart the application.")
+        sys.exit(0)
+
+    config = configparser.ConfigParser()
+    config.read(config_file_path)
+
+    # Check if 'models' section exists in config.ini
+    if not config.has_section('models'):
+        config.add_section('models')
+        for model, pattern in DEFAULT_CONFIG['models'].items():
+            config.set('models', model, pattern)
+
+        with open(config_file_path, 'w') as configfile:
+            config.write(configfile)
+        cache_key = (config_file_path, os.stat(config_file_path).st_mtime_ns)
+
+    settings = _settings_cache[cache_key] = Settings(config)
+    return settings
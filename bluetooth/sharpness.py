@@ -0,0 +1,32 @@
+def sharpness_scores(frames, width=320):
+    """
+    Variance of the Laplacian of each frame, computed on a grayscale copy scaled
+    to `width` pixels. Blurred frames have few edges and score low.
+
+    The frames are shrunk one by one and then scored together: the 4-neighbour
+    Laplacian of the whole (n, h, w) stack is a handful of NumPy slice
+    operations, so a burst costs little more than a single frame.
+    """
+    import numpy as np
+    if not frames:
+        return np.zeros(0)
+    import cv2
+    height = max(1, round(frames[0].shape[0] * width / frames[0].shape[1]))
+    stack = np.empty((len(frames), height, width), dtype=np.float32)
+    for i, frame in enumerate(frames):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        stack[i] = cv2.resize(gray, (width, height), interpolation=cv2.INTER_AREA)
+
+    centre = stack[:, 1:-1, 1:-1]
+    laplacian = (stack[:, :-2, 1:-1] + stack[:, 2:, 1:-1] + stack[:, 1:-1, :-2] + stack[:, 1:-1, 2:]
+                 - 4 * centre)
+    return laplacian.reshape(len(frames), -1).var(axis=1)
+
+
+def pick_sharpest(frames, width=320):
+    """
+    Return (index, score) of the sharpest frame.
+    """
+    scores = sharpness_scores(frames, width)
+    best = int(scores.argmax())
+    return best, float(scores[best])
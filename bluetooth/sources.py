@@ -0,0 +1,195 @@
+import socket
+import threading
+import time
+
+import serial
+
+from hid_input import KeyBurstDetector
+from metrics import REGISTRY
+from stream_framer import StreamFramer
+
+
+class SerialListener(threading.Thread):
+    """
+    Read barcodes from a serial scanner and, optionally, from a keyboard-wedge
+    scanner through a global keyboard hook. Every barcode is passed to `on_barcode`.
+    Key presses go through `burst_detector` so only scanner-speed bursts count.
+
+    The port is read in whatever chunks are available and framed incrementally.
+    `stop()` cancels a pending read at once, and the port is reopened with
+    backoff when the USB-serial adapter is unplugged.
+    """
+
+    def __init__(self, port, on_barcode, keyboard_wedge=True, burst_detector=None, baudrate=9600,
+                 parity='N', bytesize=8, stopbits=1, terminator='line', max_buffer=4096,
+                 reconnect_delay=1.0, max_reconnect_delay=30.0):
+        super().__init__(daemon=True)
+        self.port = port
+        self.on_barcode = on_barcode
+        self.baudrate = baudrate
+        self.parity = parity
+        self.bytesize = bytesize
+        self.stopbits = stopbits
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.framer = StreamFramer(terminator, max_buffer)
+        self.stop_event = threading.Event()
+        self.serial = None
+        self.reconnect_count = 0
+        self.started_at = None
+        self.errors = REGISTRY.counter('serial_errors', "Serial port open failures and disconnects", port=port)
+        self.burst_detector = burst_detector or KeyBurstDetector(on_barcode)
+        self.keyboard_listener = None
+
+        if keyboard_wedge:
+            # pynput needs a display, so it is only imported when the hook is wanted
+            try:
+                from pynput import keyboard
+            except Exception as e:
+                print(f"Klavye dinleyicisi başlatılamadı: {e}")
+            else:
+                self.keyboard = keyboard
+                self.keyboard_listener = keyboard.Listener(on_press=self.on_key_press)
+                self.keyboard_listener.start()
+
+    def on_key_press(self, key):
+        # Timestamp first; the detector tells scanner bursts from typing by the gaps between keys
+        timestamp = time.monotonic()
+        self.burst_detector.feed_key(getattr(key, 'char', None), key == self.keyboard.Key.enter, timestamp)
+
+    def open_serial(self):
+        return serial.Serial(self.port, self.baudrate, bytesize=self.bytesize, parity=self.parity,
+                             stopbits=self.stopbits, timeout=1)
+
+    def run(self):
+        self.started_at = time.monotonic()
+        delay = self.reconnect_delay
+        while not self.stop_event.is_set():
+            try:
+                self.serial = self.open_serial()
+            except (serial.SerialException, ValueError) as e:
+                self.errors.inc()
+                print(f"Seri bağlantı hatası: {e}, {delay:.1f} sn sonra tekrar denenecek")
+                self.stop_event.wait(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+                continue
+
+            delay = self.reconnect_delay
+            try:
+                while not self.stop_event.is_set():
+                    # Block for the first byte, then take everything that already arrived
+                    data = self.serial.read(self.serial.in_waiting or 1)
+                    if data:
+                        for barcode in self.framer.feed(data):
+                            if barcode:
+                                self.on_barcode(barcode)
+            except (serial.SerialException, OSError) as e:
+                if not self.stop_event.is_set():
+                    self.errors.inc()
+                    print(f"Seri port koptu: {e}")
+            finally:
+                self.serial.close()
+                self.serial = None
+                # A half-received barcode from before the unplug is never completed
+                self.framer.reset()
+
+            if not self.stop_event.is_set():
+                self.reconnect_count += 1
+                self.stop_event.wait(delay)
+
+    def stop(self):
+        self.stop_event.set()
+        ser = self.serial
+        if ser is not None:
+            try:
+                ser.cancel_read()
+            except (serial.SerialException, OSError, AttributeError):
+                pass
+        if self.keyboard_listener:
+            self.keyboard_listener.stop()
+
+    def metrics(self):
+        """
+        Byte and frame counters of this port, with rates since the thread started.
+        """
+        elapsed = time.monotonic() - self.started_at if self.started_at else 0.0
+        return {
+            'port': self.port,
+            'bytes_received': self.framer.bytes_received,
+            'frames_emitted': self.framer.frames_emitted,
+            'bytes_dropped': self.framer.bytes_dropped,
+            'reconnects': self.reconnect_count,
+            'bytes_per_s': self.framer.bytes_received / elapsed if elapsed else 0.0,
+            'frames_per_s': self.framer.frames_emitted / elapsed if elapsed else 0.0,
+        }
+
+
+class SocketSource(threading.Thread):
+    """
+    Stream raw bytes from a scale reachable over a plain socket and pass them to
+    `on_data`. Addresses look like `rfcomm://AA:BB:CC:DD:EE:FF/1` (classic
+    Bluetooth serial, channel 1) or `tcp://host:port` (e.g. a serial server).
+    The connection is reopened with backoff when it drops.
+    """
+
+    def __init__(self, address, on_data, reconnect_delay=1.0, max_reconnect_delay=30.0):
+        super().__init__(daemon=True)
+        self.address = address
+        self.on_data = on_data
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.stop_event = threading.Event()
+        self.sock = None
+        self.errors = REGISTRY.counter('socket_errors', "Device socket connection failures and disconnects",
+                                       source=address, role='scale')
+
+    def open_socket(self):
+        scheme, _, target = self.address.partition('://')
+        if scheme == 'rfcomm':
+            device, _, channel = target.partition('/')
+            sock = socket.socket(socket.AF_BLUETOOTH, socket.SOCK_STREAM, socket.BTPROTO_RFCOMM)
+            sock.connect((device, int(channel or 1)))
+        elif scheme == 'tcp':
+            host, _, port = target.rpartition(':')
+            sock = socket.create_connection((host, int(port)), timeout=10)
+        else:
+            raise ValueError(f"Unsupported scale address: {self.address}")
+        # A short timeout lets the loop notice stop() without closing from another thread
+        sock.settimeout(0.5)
+        return sock
+
+    def run(self):
+        delay = self.reconnect_delay
+        while not self.stop_event.is_set():
+            try:
+                self.sock = self.open_socket()
+            except (OSError, ValueError) as e:
+                self.errors.inc()
+                print(f"Terazi bağlantı hatası: {e}, {delay:.1f} sn sonra tekrar denenecek")
+                self.stop_event.wait(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+                continue
+
+            print(f"Teraziye bağlanıldı: {self.address}")
+            delay = self.reconnect_delay
+            try:
+                while not self.stop_event.is_set():
+                    try:
+                        data = self.sock.recv(4096)
+                    except socket.timeout:
+                        continue
+                    if not data:
+                        break
+                    self.on_data(data)
+            except OSError as e:
+                self.errors.inc()
+                print(f"Terazi bağlantısı koptu: {e}")
+            finally:
+                self.sock.close()
+                self.sock = None
+
+            if not self.stop_event.is_set():
+                self.stop_event.wait(delay)
+
+    def stop(self):
+        self.stop_event.set()
@@ -0,0 +1,40 @@
+import contextlib
+import sys
+import time
+
+
+class StartupProfiler:
+    """
+    Times the phases of application startup (imports, settings, window
+    construction, ...) and prints a breakdown with the number of modules each
+    phase imported. Disabled profilers only keep their phases silent, so the
+    startup code looks the same either way.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        self.phases = []
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        modules = len(sys.modules)
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - started, len(sys.modules) - modules))
+
+    def report(self, lazy_modules=('cv2', 'numpy', 'PyQt5.QtBluetooth', 'pynput')):
+        """
+        Print the breakdown, and which of the lazily imported modules startup still loaded.
+        """
+        if not self.enabled:
+            return
+        total = time.perf_counter() - self.started
+        print(f"{'aşama':<32} {'ms':>8} {'modül':>6}")
+        for name, elapsed, modules in self.phases:
+            print(f"{name:<32} {elapsed * 1000:>8.1f} {modules:>6}")
+        print(f"{'toplam':<32} {total * 1000:>8.1f} {len(sys.modules):>6}")
+        for module in lazy_modules:
+            print(f"{module}: {'yüklendi' if module in sys.modules else 'yüklenmedi'}")
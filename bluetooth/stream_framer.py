@@ -0,0 +1,180 @@
+STX = 0x02
+ETX = 0x03
+
+# C0 control bytes (except tab) are status noise from scales, not payload
+CONTROL_BYTES = bytes(b for b in range(32) if b != 9) + b'\x7f'
+
+
+class StreamFramer:
+    """
+    Incremental framer for raw device byte streams.
+
+    Bytes are appended to a preallocated buffer and split into frames on the
+    configured terminator. All frames completed by one `feed` call are
+    returned together, and the buffer is compacted once per call.
+
+    Modes:
+        line      CR, LF or CRLF (empty frames are skipped)
+        cr, lf, crlf
+        stx_etx   payload between STX (0x02) and ETX (0x03), noise outside is dropped
+        fixed:N   frames of exactly N bytes
+
+    A frame longer than the buffer is dropped whole: after an overflow the
+    framer discards bytes up to the next separator (or STX) and resumes with
+    the frame after it, so no tail of the long frame is glued onto it.
+    """
+
+    SEPARATORS = {'cr': b'\r', 'lf': b'\n', 'crlf': b'\r\n'}
+
+    def __init__(self, mode='line', max_buffer=4096, encoding='utf-8', strip_control=True):
+        mode = mode.strip().lower()
+        self.fixed_length = 0
+        if mode.startswith('fixed'):
+            self.fixed_length = int(mode.split(':', 1)[1])
+            if self.fixed_length <= 0 or self.fixed_length > max_buffer:
+                raise ValueError(f"Invalid fixed frame length: {mode}")
+            mode = 'fixed'
+        elif mode not in ('line', 'stx_etx') and mode not in self.SEPARATORS:
+            raise ValueError(f"Unknown framing mode: {mode}")
+
+        self.mode = mode
+        self.encoding = encoding
+        self.strip_control = strip_control
+        self.buffer = bytearray(max_buffer)
+        self.length = 0
+        self.discarding = False
+
+        self.bytes_received = 0
+        self.frames_emitted = 0
+        self.bytes_dropped = 0
+
+    def feed(self, data):
+        """
+        Append raw bytes and return the list of decoded frames they completed.
+        """
+        frames = []
+        view = memoryview(data)
+        self.bytes_received += len(view)
+        capacity = len(self.buffer)
+
+        while len(view):
+            free = capacity - self.length
+            if free == 0:
+                # Max-buffer guard: a frame longer than the buffer can never complete
+                self.bytes_dropped += self.length
+                self.length = 0
+                # STX framing already drops everything up to the next STX
+                self.discarding = self.mode not in ('stx_etx', 'fixed')
+                free = capacity
+
+            chunk = view[:free]
+            self.buffer[self.length:self.length + len(chunk)] = chunk
+            self.length += len(chunk)
+            view = view[len(chunk):]
+            self.extract(frames)
+
+        return frames
+
+    def extract(self, frames):
+        if self.discarding and not self.skip_overflow():
+            return
+        if self.mode == 'fixed':
+            start = self.extract_fixed(frames)
+        elif self.mode == 'stx_etx':
+            start = self.extract_stx_etx(frames)
+        else:
+            start = self.extract_separated(frames)
+
+        if start:
+            remaining = self.length - start
+            self.buffer[:remaining] = self.buffer[start:self.length]
+            self.length = remaining
+
+    def extract_separated(self, frames):
+        buffer = self.buffer
+        end = self.length
+        start = 0
+        if self.mode == 'line':
+            # Remember the next CR and LF so each byte is scanned at most once per separator
+            cr = buffer.find(b'\r', 0, end)
+            lf = buffer.find(b'\n', 0, end)
+            while cr >= 0 or lf >= 0:
+                split = lf if cr < 0 or 0 <= lf < cr else cr
+                self.emit(frames, start, split)
+                start = split + 1
+                if cr >= 0 and cr < start:
+                    cr = buffer.find(b'\r', start, end)
+                if lf >= 0 and lf < start:
+                    lf = buffer.find(b'\n', start, end)
+        else:
+            separator = self.SEPARATORS[self.mode]
+            while start < end:
+                split = buffer.find(separator, start, end)
+                if split < 0:
+                    break
+                self.emit(frames, start, split)
+                start = split + len(separator)
+        return start
+
+    def skip_overflow(self):
+        """
+        Drop the rest of an overflowed frame up to and including its separator.
+        Returns True once the separator was found and framing can resume.
+        """
+        buffer = self.buffer
+        end = self.length
+        if self.mode == 'line':
+            found = [split for split in (buffer.find(b'\r', 0, end), buffer.find(b'\n', 0, end)) if split >= 0]
+            split, size = (min(found) if found else -1), 1
+        else:
+            separator = self.SEPARATORS[self.mode]
+            split, size = buffer.find(separator, 0, end), len(separator)
+
+        if split < 0:
+            # Keep what could be the first bytes of a separator split across feeds
+            start = max(0, end - (size - 1))
+        else:
+            start = split + size
+            self.discarding = False
+        self.bytes_dropped += start
+        remaining = end - start
+        buffer[:remaining] = buffer[start:end]
+        self.length = remaining
+        return not self.discarding
+
+    def extract_stx_etx(self, frames):
+        buffer = self.buffer
+        end = self.length
+        start = 0
+        while start < end:
+            frame_start = buffer.find(STX, start, end)
+            if frame_start < 0:
+                self.bytes_dropped += end - start
+                return end
+            self.bytes_dropped += frame_start - start
+            frame_end = buffer.find(ETX, frame_start + 1, end)
+            if frame_end < 0:
+                return frame_start
+            self.emit(frames, frame_start + 1, frame_end)
+            start = frame_end + 1
+        return start
+
+    def extract_fixed(self, frames):
+        start = 0
+        while self.length - start >= self.fixed_length:
+            self.emit(frames, start, start + self.fixed_length)
+            start += self.fixed_length
+        return start
+
+    def emit(self, frames, start, end):
+        raw = self.buffer[start:end]
+        if self.strip_control:
+            raw = raw.translate(None, CONTROL_BYTES)
+        text = raw.decode(self.encoding, errors='replace').strip()
+        if text:
+            frames.append(text)
+            self.frames_emitted += 1
+
+    def reset(self):
+        self.length = 0
+        self.discarding = False
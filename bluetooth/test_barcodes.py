@@ -0,0 +1,42 @@
+import pytest
+
+from barcodes import ALL_SYMBOLOGIES, EAN8, EAN13, GS1_VARIABLE, UPCA, identify, validate_barcode, validate_batch
+
+CODES = {
+    '4006381333931': EAN13,
+    '96385074': EAN8,
+    '036000291452': UPCA,
+    '2001234001502': GS1_VARIABLE,
+}
+
+INVALID = ['4006381333932', '9638507', '03600029145X', '', '40063813339310', '４００６３８１３３３９３１']
+
+
+@pytest.mark.parametrize('code,symbology', CODES.items())
+def test_identify_valid_codes(code, symbology):
+    assert identify(code) == symbology
+    assert validate_barcode(code)
+
+
+@pytest.mark.parametrize('code', INVALID)
+def test_invalid_codes(code):
+    assert identify(code) is None
+    assert not validate_barcode(code)
+
+
+def test_symbology_filter():
+    assert not validate_barcode('2001234001502', (EAN13,))
+    assert validate_barcode('4006381333931', (EAN13,))
+    assert not validate_barcode('4006381333931', (GS1_VARIABLE,))
+    assert not validate_barcode('96385074', (EAN13, UPCA))
+
+
+@pytest.mark.parametrize('symbologies', [ALL_SYMBOLOGIES, (EAN13,), (GS1_VARIABLE,), (EAN8, UPCA), ()])
+def test_batch_matches_single_validation(symbologies):
+    codes = list(CODES) + INVALID + [None, '4006381333931']
+    expected = [bool(code) and validate_barcode(code, symbologies) for code in codes]
+    assert validate_batch(codes, symbologies).tolist() == expected
+
+
+def test_empty_batch():
+    assert validate_batch([]).tolist() == []
@@ -0,0 +1,64 @@
+from capture_session import COMMITTED, EXPIRED, PHOTOGRAPHED, SCANNED, WEIGHED, CaptureSession, SessionTracker
+
+
+def test_session_states():
+    session = CaptureSession('4006381333931', 'serial', 100.0, 10.0)
+    assert session.state == SCANNED and session.deadline == 110.0
+    assert session.missing() == ['weight', 'photo']
+    session.bind_weight('1.250', 1.25)
+    assert session.state == WEIGHED
+    session.bind_photo('captured_images/a.jpg', {'frames': 1})
+    assert session.state == PHOTOGRAPHED and session.ready
+    session.write_submitted = True
+    assert not session.ready
+
+
+def test_photo_before_weight_waits_for_the_weight():
+    session = CaptureSession('4006381333931', 'serial', 0.0, 10.0)
+    session.bind_photo('captured_images/a.jpg', {})
+    assert session.state == SCANNED and session.missing() == ['weight']
+    session.bind_weight('1.250', 1.25)
+    assert session.state == PHOTOGRAPHED
+
+
+def test_weight_goes_to_the_oldest_waiting_session():
+    tracker = SessionTracker()
+    first, _ = tracker.open('4006381333931', 'serial', 0.0)
+    second, _ = tracker.open('96385074', 'serial', 0.1)
+    assert tracker.bind_weight('1.0', 1.0, run=1.0) is first
+    assert tracker.bind_weight('2.0', 2.0, run=2.0) is second
+    assert tracker.bind_weight('3.0', 3.0, run=3.0) is None
+
+
+def test_a_settled_run_binds_only_once():
+    tracker = SessionTracker()
+    first, _ = tracker.open('4006381333931', 'serial', 0.0)
+    second, _ = tracker.open('96385074', 'serial', 0.1)
+    assert tracker.bind_weight('1.0', 1.0, run=5.0) is first
+    # The product is still on the scale: the next scan waits for its own weighing
+    assert tracker.bind_weight('1.0', 1.0, run=5.0) is None
+    assert second.weight is None
+
+
+def test_max_open_drops_the_oldest_waiting_session():
+    tracker = SessionTracker(max_open=2)
+    first, _ = tracker.open('a', 'serial', 0.0)
+    first.write_submitted = True
+    second, _ = tracker.open('b', 'serial', 0.1)
+    third, dropped = tracker.open('c', 'serial', 0.2)
+    assert dropped == [second] and second.state == EXPIRED
+    assert list(tracker.sessions.values()) == [first, third]
+
+
+def test_expire_leaves_sessions_being_written():
+    tracker = SessionTracker(timeout=1.0)
+    writing, _ = tracker.open('a', 'serial', 0.0)
+    writing.write_submitted = True
+    waiting, _ = tracker.open('b', 'serial', 0.5)
+    assert tracker.time_to_deadline(now=1.0) == 0.5
+    assert tracker.expire(now=1.2) == []
+    assert tracker.expire(now=1.5) == [waiting]
+    assert len(tracker) == 1
+    assert tracker.time_to_deadline(now=2.0) is None
+    tracker.close(writing, COMMITTED)
+    assert len(tracker) == 0 and writing.closed
@@ -0,0 +1,284 @@
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+import pytest
+
+import collector
+from collector import Collector, LaneManager
+from database import SQLiteManager
+from phash import DuplicateIndex
+from settings import LaneSettings
+
+
+class FakeSource:
+    def __init__(self, address, *args, **kwargs):
+        self.address = address
+        self.kwargs = kwargs
+        self.started = False
+
+    def start(self):
+        self.started = True
+
+    def stop(self):
+        pass
+
+    def join(self, timeout=None):
+        pass
+
+    def metrics(self):
+        return {'port': self.address, 'bytes_received': 0, 'frames_emitted': 0, 'bytes_dropped': 0}
+
+
+def opened_sources(monkeypatch, settings, **kwargs):
+    monkeypatch.setattr(collector, 'SocketSource', FakeSource)
+    monkeypatch.setattr(collector, 'SerialListener', FakeSource)
+    lanes = LaneManager(settings)
+    lanes.start_sources(**kwargs)
+    assert all(source.started for source in lanes.sources)
+    return [source.address for source in lanes.sources], lanes
+
+
+def test_every_lane_opens_its_configured_sources(monkeypatch, settings):
+    settings.lanes = [LaneSettings('1', serial_port='/dev/ttyS1', scale_address='rfcomm://AA:BB:CC:DD:EE:01/1'),
+                      LaneSettings('2', serial_port='/dev/ttyS2', scale_address='tcp://127.0.0.1:4001')]
+    addresses, lanes = opened_sources(monkeypatch, settings)
+    assert addresses == ['rfcomm://AA:BB:CC:DD:EE:01/1', '/dev/ttyS1', 'tcp://127.0.0.1:4001', '/dev/ttyS2']
+    # The keyboard hook cannot tell lanes apart
+    assert not any(source.kwargs.get('keyboard_wedge') for source in lanes.sources)
+
+
+def test_window_lane_leaves_its_bluetooth_scale_and_scanner_to_the_window(monkeypatch, settings):
+    settings.lanes = [LaneSettings('1', serial_port='/dev/ttyS1', scale_address='rfcomm://AA:BB:CC:DD:EE:01/1'),
+                      LaneSettings('2', scale_address='tcp://127.0.0.1:4001')]
+    addresses, _ = opened_sources(monkeypatch, settings, include_primary=False)
+    assert addresses == ['tcp://127.0.0.1:4001']
+
+
+def test_window_lane_tcp_scale_is_opened_here(monkeypatch, settings):
+    settings.lanes = [LaneSettings('1', serial_port='/dev/ttyS1', scale_address='tcp://127.0.0.1:4000')]
+    addresses, _ = opened_sources(monkeypatch, settings, include_primary=False)
+    assert addresses == ['tcp://127.0.0.1:4000']
+
+
+class FakeCamera:
+    """
+    A connected camera whose only frame was taken `age` seconds before the scan.
+    """
+
+    connected = True
+
+    def __init__(self, age=0.0):
+        self.age = age
+
+    def is_alive(self):
+        return True
+
+    def get_frames(self, start, end, max_frames=5, timeout=0.2):
+        return [(start - self.age, np.full((48, 64, 3), 128, dtype=np.uint8))]
+
+    def stop(self):
+        pass
+
+
+class DisconnectedCamera(FakeCamera):
+    connected = False
+
+
+class FakeImageWriter:
+    def __init__(self, error=None):
+        self.error = error
+        self.files = []
+
+    def submit(self, frame, filename, callback=None, encoding=None):
+        self.files.append(filename)
+        callback(filename, self.error)
+        future = Future()
+        future.set_result(filename)
+        return future
+
+    def metrics(self):
+        return {'queue_depth': 0, 'queue_capacity': 8}
+
+
+class HeldImageWriter(FakeImageWriter):
+    """
+    Keeps every write pending until release(), like a busy writer pool.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.callbacks = []
+        self.submitted = threading.Condition()
+
+    def submit(self, frame, filename, callback=None, encoding=None):
+        with self.submitted:
+            self.files.append(filename)
+            self.callbacks.append((filename, callback))
+            self.submitted.notify_all()
+        return Future()
+
+    def wait_for_files(self, count, timeout=5.0):
+        with self.submitted:
+            assert self.submitted.wait_for(lambda: len(self.files) >= count, timeout)
+
+    def release(self):
+        for filename, callback in self.callbacks:
+            callback(filename, None)
+
+
+class Events:
+    def __init__(self):
+        self.events = []
+        self.changed = threading.Condition()
+
+    def __call__(self, kind, data):
+        with self.changed:
+            self.events.append((kind, data))
+            self.changed.notify_all()
+
+    def wait_for(self, kind, timeout=5.0):
+        with self.changed:
+            assert self.changed.wait_for(lambda: any(event == kind for event, _ in self.events), timeout), \
+                f"no {kind} event in {[event for event, _ in self.events]}"
+            return next(data for event, data in self.events if event == kind)
+
+
+@pytest.fixture
+def db_manager(settings):
+    manager = SQLiteManager(settings.db_file, batch_window=0.01)
+    manager.connect()
+    manager.create_table()
+    yield manager
+    manager.close()
+
+
+@pytest.fixture
+def make_collector(settings, db_manager):
+    settings.stabilizer_time_ms = 0
+    collectors = []
+
+    def make(camera=None, image_writer=None, duplicate_index=None, **overrides):
+        for name, value in overrides.items():
+            setattr(settings, name, value)
+        lane = LaneSettings('1', scale_model='hrcr')
+        lane_collector = Collector(settings, lane, db_manager, image_writer or FakeImageWriter(),
+                                   camera_worker=camera if camera is not None else FakeCamera(),
+                                   duplicate_index=duplicate_index)
+        events = Events()
+        lane_collector.add_listener(events)
+        lane_collector.start()
+        collectors.append(lane_collector)
+        return lane_collector, events
+
+    yield make
+    for running in collectors:
+        running.stop()
+
+
+def weigh(collector, weight='1.250'):
+    collector.feed_scale_bytes(f'S  {weight}kg\r\n'.encode() * 3)
+
+
+def rows(settings):
+    conn = sqlite3.connect(settings.db_file)
+    try:
+        return conn.execute("SELECT Barcode, Weight, Lane, CapturedAt FROM ProductData ORDER BY id").fetchall()
+    finally:
+        conn.close()
+
+
+def test_captured_at_is_the_frame_time(settings, make_collector):
+    collector, events = make_collector(camera=FakeCamera(age=5.0))
+    collector.submit_barcode('4006381333931', 'serial')
+    events.wait_for('photo_saved')
+    weigh(collector)
+    events.wait_for('record_inserted')
+
+    [(barcode, weight, lane, captured_at)] = rows(settings)
+    assert (barcode, weight, lane) == ('4006381333931', 1.25, '1')
+    seconds, _, millis = captured_at.partition('.')
+    captured = time.mktime(time.strptime(seconds, '%Y-%m-%d %H:%M:%S')) + int(millis) / 1000
+    assert abs(captured - (time.time() - 5.0)) < 1.0
+
+
+def test_scale_model_is_switched_on_the_collector_thread(settings):
+    settings.models = dict(settings.models, plain=r'([0-9]+\.[0-9]+)')
+    lane_collector = Collector(settings, LaneSettings('1', scale_model='hrcr'), None, FakeImageWriter(),
+                               camera_worker=FakeCamera())
+    assert lane_collector.scale_model == 'hrcr'
+    assert not lane_collector.set_scale_model('missing')
+    assert lane_collector.set_scale_model('PLAIN')
+    # Only queued; the pipeline state is not touched from the calling thread
+    assert lane_collector.scale_model == 'hrcr'
+
+    events = Events()
+    lane_collector.add_listener(events)
+    lane_collector.start()
+    try:
+        lane_collector.feed_scale_bytes(b'1.250\r\n')
+        assert events.wait_for('weight')['weight'] == '1.250'
+        assert lane_collector.scale_model == 'plain'
+    finally:
+        lane_collector.stop()
+
+
+def test_second_burst_sees_the_first_photo_before_it_is_written(settings, make_collector):
+    writer = HeldImageWriter()
+    collector, events = make_collector(image_writer=writer, duplicate_index=DuplicateIndex(), dedupe_mode='skip')
+    collector.submit_barcode('4006381333931', 'serial')
+    writer.wait_for_files(1)
+    collector.submit_barcode('4006381333931', 'serial')
+    assert events.wait_for('duplicate_skipped')['path'] == writer.files[0]
+    writer.release()
+    assert len(writer.files) == 1
+
+
+def test_scan_then_weight_writes_one_row(settings, make_collector):
+    collector, events = make_collector()
+    collector.submit_barcode('4006381333931', 'serial')
+    events.wait_for('photo_saved')
+    assert rows(settings) == []
+    weigh(collector)
+    assert events.wait_for('record_inserted')['barcode'] == '4006381333931'
+    assert [row[:3] for row in rows(settings)] == [('4006381333931', 1.25, '1')]
+
+
+def test_product_weighed_before_the_scan_is_bound_to_it(settings, make_collector):
+    collector, events = make_collector()
+    weigh(collector, '0.850')
+    collector.submit_barcode('4006381333931', 'serial')
+    events.wait_for('record_inserted')
+    assert [row[:2] for row in rows(settings)] == [('4006381333931', 0.85)]
+
+
+def test_one_weighing_is_bound_to_one_scan_only(settings, make_collector):
+    collector, events = make_collector(session_timeout_ms=300)
+    weigh(collector)
+    collector.submit_barcode('4006381333931', 'serial')
+    events.wait_for('record_inserted')
+    # The same product still on the scale is not the next scan's weight
+    weigh(collector)
+    collector.submit_barcode('96385074', 'serial')
+    expired = events.wait_for('session_expired')
+    assert (expired['barcode'], expired['missing']) == ('96385074', ['weight'])
+    assert [row[0] for row in rows(settings)] == ['4006381333931']
+
+
+def test_scan_without_a_camera_fails(settings, make_collector):
+    collector, events = make_collector(camera=DisconnectedCamera())
+    weigh(collector)
+    collector.submit_barcode('4006381333931', 'serial')
+    assert events.wait_for('capture_failed')['barcode'] == '4006381333931'
+    assert len(collector.sessions) == 0
+    assert rows(settings) == []
+
+
+def test_photo_write_error_fails_the_session(settings, make_collector):
+    collector, events = make_collector(image_writer=FakeImageWriter(error=OSError("disk full")))
+    weigh(collector)
+    collector.submit_barcode('4006381333931', 'serial')
+    assert events.wait_for('photo_failed')['error'] == "disk full"
+    assert rows(settings) == []
@@ -0,0 +1,112 @@
+import sqlite3
+
+import pytest
+
+from database import (MIGRATIONS, RECORD_COLUMNS, SQLiteManager, SQLiteWriter, StorageBackend,
+                      capture_time_from_path, parse_weight_kg)
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = SQLiteManager(str(tmp_path / 'product_data.db'), batch_window=0.01)
+    manager.connect()
+    manager.create_table()
+    yield manager
+    manager.close()
+
+
+def columns(conn):
+    return [row[1] for row in conn.execute("PRAGMA table_info(ProductData)")]
+
+
+@pytest.mark.parametrize('text,kg', [('0.156', 0.156), ('0. 156', 0.156), ('ST - 0,156 kg', 0.156),
+                                     ('-1.5', -1.5), ('ST-0.450', 0.45), ('kg', None), (None, None), (2, 2.0)])
+def test_parse_weight_kg(text, kg):
+    assert parse_weight_kg(text) == kg
+
+
+def test_capture_time_from_path():
+    assert capture_time_from_path('captured_images/869_20260101-103000.jpg') == '2026-01-01 10:30:00'
+    assert capture_time_from_path('captured_images/869.jpg') is None
+
+
+def test_new_database_gets_the_latest_schema(manager):
+    assert manager.schema_version() == LATEST_VERSION
+    conn = sqlite3.connect(manager.db_file)
+    try:
+        assert set(RECORD_COLUMNS) <= set(columns(conn))
+    finally:
+        conn.close()
+
+
+def test_legacy_table_is_migrated(tmp_path):
+    db_file = str(tmp_path / 'legacy.db')
+    conn = sqlite3.connect(db_file)
+    conn.execute("CREATE TABLE ProductData (id INTEGER PRIMARY KEY AUTOINCREMENT, Barcode TEXT, "
+                 "Weight TEXT, PhotoPath TEXT)")
+    conn.executemany("INSERT INTO ProductData (Barcode, Weight, PhotoPath) VALUES (?, ?, ?)", [
+        ('869', '0. 156', 'captured_images/869_20260101-103000.jpg'),
+        ('869', '0. 156', 'captured_images/869_20260101-103000.jpg'),
+        ('870', 'ST - 1,250 kg', 'captured_images/870.jpg'),
+        (None, '1.0', 'captured_images/x.jpg'),
+    ])
+    conn.commit()
+    conn.close()
+
+    manager = SQLiteManager(db_file)
+    manager.connect()
+    manager.create_table()
+    assert manager.schema_version() == LATEST_VERSION
+    # Running the migrations again is a no-op
+    manager.create_table()
+    manager.close()
+
+    conn = sqlite3.connect(db_file)
+    try:
+        rows = conn.execute("SELECT Barcode, Weight, CapturedAt, Lane, PhotoHash, Sharpness "
+                            "FROM ProductData ORDER BY id").fetchall()
+    finally:
+        conn.close()
+    assert rows == [('869', 0.156, '2026-01-01 10:30:00', None, None, None),
+                    ('870', 1.25, None, None, None, None)]
+
+
+def test_inserts_skip_duplicates_and_invalid_rows(manager):
+    assert manager.insert_data('869', '0.156', 'a.jpg', lane='1').result(timeout=5) is True
+    assert manager.insert_data('869', '0.156', 'a.jpg').result(timeout=5) is False
+    assert manager.insert_data('869', '0.156', 'Resim yolu yok').result(timeout=5) is False
+    manager.insert_data('870', '1', 'b.jpg', photo_hash='ab', duplicate_of='a.jpg').result(timeout=5)
+    manager.insert_data('871', '1', 'c.jpg', photo_hash='cd').result(timeout=5)
+    assert manager.load_photo_hashes() == [('871', 'cd', 'c.jpg')]
+
+
+def test_a_failing_job_fails_only_its_future(manager):
+    manager.start_writer()
+    bad = manager.writer.submit(lambda cursor: 1 / 0)
+    good = manager.insert_data('869', '0.156', 'a.jpg')
+    with pytest.raises(ZeroDivisionError):
+        bad.result(timeout=5)
+    assert good.result(timeout=5) is True
+
+
+def test_a_dead_writer_fails_queued_jobs_and_refuses_new_ones(tmp_path):
+    writer = SQLiteWriter(str(tmp_path / 'product_data.db'))
+
+    def broken_commit(connection, cursor, batch):
+        raise OSError("disk gone")
+
+    writer.commit_batch = broken_commit
+    futures = [writer.submit(lambda cursor: True) for _ in range(3)]
+    writer.start()
+    for future in futures:
+        assert isinstance(future.exception(timeout=5), OSError)
+    writer.join(timeout=5)
+    with pytest.raises(RuntimeError):
+        writer.submit(lambda cursor: True)
+
+
+def test_storage_backend_is_abstract():
+    with pytest.raises(TypeError):
+        StorageBackend()
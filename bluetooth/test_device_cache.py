@@ -0,0 +1,100 @@
+import json
+import os
+
+import pytest
+
+from collector import LaneManager
+from device_cache import DeviceCache, device_address
+from settings import LaneSettings
+
+
+def test_device_address():
+    assert device_address('rfcomm://aa:bb:cc:dd:ee:ff/1') == 'AA:BB:CC:DD:EE:FF'
+    assert device_address('tcp://192.168.1.20:4001') == 'tcp://192.168.1.20:4001'
+
+
+def test_known_devices_survive_a_reload(tmp_path):
+    path = str(tmp_path / 'known_devices.json')
+    cache = DeviceCache(path)
+    cache.remember('scale', 'AA:BB:CC:DD:EE:01', 'Terazi')
+    cache.set_model('AA:BB:CC:DD:EE:01', 'hrcr')
+    cache.remember('barcode', 'AA:BB:CC:DD:EE:02', 'Okuyucu', rssi=-60)
+
+    cache = DeviceCache(path).load()
+    assert cache.model_for('AA:BB:CC:DD:EE:01') == 'hrcr'
+    assert [device['name'] for device in cache.known('barcode')] == ['Okuyucu']
+    assert list(tmp_path.iterdir()) == [tmp_path / 'known_devices.json']
+
+
+def test_latest_connection_comes_first(tmp_path):
+    cache = DeviceCache(str(tmp_path / 'known_devices.json'))
+    cache.remember('scale', 'AA:BB:CC:DD:EE:01', 'Eski')
+    cache.devices['AA:BB:CC:DD:EE:01']['last_connected'] = '2020-01-01 00:00:00'
+    cache.remember('scale', 'AA:BB:CC:DD:EE:02', 'Yeni')
+    # An empty name keeps the stored one
+    cache.remember('scale', 'AA:BB:CC:DD:EE:01')
+    assert [device['name'] for device in cache.known('scale')] == ['Eski', 'Yeni']
+
+
+def test_lane_scales_are_not_offered_to_the_window(tmp_path):
+    cache = DeviceCache(str(tmp_path / 'known_devices.json'))
+    cache.remember('scale', 'AA:BB:CC:DD:EE:01', 'Terazi')
+    cache.set_model('AA:BB:CC:DD:EE:02', 'hrcr', lane='2')
+    cache.set_model('tcp://192.168.1.20:4001', 'hrcr', lane='3')
+    assert [device['address'] for device in cache.known('scale')] == ['AA:BB:CC:DD:EE:01']
+    assert cache.model_for('tcp://192.168.1.20:4001') == 'hrcr'
+
+    # Connecting the window to a lane's scale makes it the window's device again
+    cache.remember('scale', 'AA:BB:CC:DD:EE:02', 'Yedek')
+    assert {device['address'] for device in cache.known('scale')} == {'AA:BB:CC:DD:EE:01', 'AA:BB:CC:DD:EE:02'}
+
+
+def test_detected_lane_model_keeps_the_window_list(tmp_path, settings):
+    settings.device_cache_file = str(tmp_path / 'known_devices.json')
+    DeviceCache(settings.device_cache_file).remember('scale', 'AA:BB:CC:DD:EE:01', 'Terazi')
+    settings.lanes = [LaneSettings('1'),
+                      LaneSettings('2', scale_address='rfcomm://AA:BB:CC:DD:EE:02/1'),
+                      LaneSettings('3', scale_address='tcp://192.168.1.20:4001')]
+    lanes = LaneManager(settings)
+    lanes.remember_detected_model('model_detected', {'lane': '2', 'model': 'hrcr'})
+    lanes.remember_detected_model('model_detected', {'lane': '3', 'model': 'hrcr'})
+
+    devices = json.load(open(settings.device_cache_file, encoding='utf-8'))
+    assert {device['address']: device.get('lane') for device in devices} == {
+        'AA:BB:CC:DD:EE:01': None, 'AA:BB:CC:DD:EE:02': '2', 'tcp://192.168.1.20:4001': '3'}
+    assert [device['name'] for device in lanes.device_cache.known('scale')] == ['Terazi']
+
+
+def test_unreadable_cache_starts_empty(tmp_path):
+    path = tmp_path / 'known_devices.json'
+    path.write_text('[{"address": ', encoding='utf-8')
+    cache = DeviceCache(str(path)).load()
+    assert cache.known('scale') == []
+    assert DeviceCache(str(tmp_path / 'missing.json')).load().devices == {}
+
+
+def test_failed_write_leaves_no_temp_file(tmp_path, monkeypatch):
+    path = tmp_path / 'known_devices.json'
+    cache = DeviceCache(str(path))
+    cache.remember('scale', 'AA:BB:CC:DD:EE:01', 'Terazi')
+
+    def fail(source, target):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, 'replace', fail)
+    cache.remember('scale', 'AA:BB:CC:DD:EE:01', 'Yeni ad')
+    monkeypatch.undo()
+    assert list(tmp_path.iterdir()) == [path]
+    assert [device['name'] for device in DeviceCache(str(path)).load().known('scale')] == ['Terazi']
+
+
+def test_rssi_and_models_only_update_known_devices(tmp_path):
+    cache = DeviceCache(str(tmp_path / 'known_devices.json'))
+    cache.remember('barcode', 'AA:BB:CC:DD:EE:02', 'Okuyucu', rssi=-70)
+    cache.update_rssi('AA:BB:CC:DD:EE:02', -50)
+    cache.update_rssi('AA:BB:CC:DD:EE:03', -40)
+    cache.set_model('AA:BB:CC:DD:EE:03', 'hrcr')
+    assert 'AA:BB:CC:DD:EE:03' not in cache
+    assert cache.known('barcode')[0]['rssi'] == -50
+    with pytest.raises(ValueError):
+        cache.remember('printer', 'AA:BB:CC:DD:EE:04')
@@ -0,0 +1,103 @@
+import json
+import os
+import sqlite3
+import tarfile
+
+import cv2
+import numpy as np
+import pytest
+
+from database import SQLiteManager
+from export_dataset import DatasetExporter, image_size
+
+
+def write_image(path, width=40, height=30):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    ok, data = cv2.imencode(os.path.splitext(path)[1], np.full((height, width, 3), 90, dtype=np.uint8))
+    assert ok
+    with open(path, 'wb') as f:
+        f.write(data.tobytes())
+
+
+@pytest.mark.parametrize('extension', ['.jpg', '.png', '.webp'])
+def test_image_size_reads_the_header(tmp_path, extension):
+    path = str(tmp_path / f'photo{extension}')
+    write_image(path, 40, 30)
+    assert image_size(path) == (40, 30)
+    with open(path, 'r+b') as f:
+        f.truncate(20)
+    assert image_size(path) is None
+
+
+@pytest.fixture
+def db_file(tmp_path):
+    db_file = str(tmp_path / 'product_data.db')
+    manager = SQLiteManager(db_file)
+    manager.connect()
+    manager.create_table()
+    manager.close()
+    return db_file
+
+
+def add_rows(db_file, rows):
+    conn = sqlite3.connect(db_file)
+    with conn:
+        conn.executemany("""INSERT INTO ProductData (Barcode, Weight, PhotoPath, CapturedAt, Lane, DuplicateOf)
+                            VALUES (?, 1.5, ?, '2026-01-01 10:30:00', '1', ?)""", rows)
+    conn.close()
+
+
+def test_yolo_export_is_incremental(tmp_path, db_file):
+    root = str(tmp_path)
+    output = str(tmp_path / 'dataset')
+    write_image(os.path.join(root, 'images/a.jpg'))
+    write_image(os.path.join(root, 'images/a2.jpg'))
+    write_image(os.path.join(root, 'images/b.png'))
+    with open(os.path.join(root, 'images/broken.jpg'), 'wb') as f:
+        f.write(b'\xff\xd8\xff')
+    add_rows(db_file, [('869', 'images/a.jpg', None), ('870', 'images/b.png', None),
+                       ('869', 'images/a2.jpg', 'images/a.jpg'), ('871', 'images/gone.jpg', None),
+                       ('872', 'images/broken.jpg', None)])
+
+    state = DatasetExporter(db_file, output, 'yolo', root, page_size=2, workers=1).run()
+    assert state['last_id'] == 5 and state['exported'] == 2
+    assert sorted(os.listdir(os.path.join(output, 'images'))) == ['00000001_869.jpg', '00000002_870.png']
+    with open(os.path.join(output, 'labels', '00000002_870.txt')) as f:
+        assert f.read() == "1 0.5 0.5 1.0 1.0\n"
+
+    write_image(os.path.join(root, 'images/c.webp'))
+    add_rows(db_file, [('869', 'images/c.webp', None)])
+    state = DatasetExporter(db_file, output, 'yolo', root, workers=1).run()
+    assert state['last_id'] == 6 and state['exported'] == 3
+    with open(os.path.join(output, 'labels', '00000006_869.txt')) as f:
+        assert f.read().startswith("0 ")
+    with open(os.path.join(output, 'classes.txt')) as f:
+        assert f.read().split() == ['869', '870', '871', '872']
+
+    with pytest.raises(ValueError):
+        DatasetExporter(db_file, output, 'coco', root)
+
+
+def test_coco_export_with_shards(tmp_path, db_file):
+    root = str(tmp_path)
+    output = str(tmp_path / 'dataset')
+    write_image(os.path.join(root, 'images/a.jpg'), 40, 30)
+    write_image(os.path.join(root, 'images/b.jpg'), 20, 10)
+    add_rows(db_file, [('869', 'images/a.jpg', None), ('870', 'images/b.jpg', None)])
+
+    DatasetExporter(db_file, output, 'coco', root, workers=1, shard_max_bytes=1).run()
+    with open(os.path.join(output, 'annotations.json')) as f:
+        coco = json.load(f)
+    assert [(image['file_name'], image['width'], image['height']) for image in coco['images']] == \
+        [('images/00000001_869.jpg', 40, 30), ('images/00000002_870.jpg', 20, 10)]
+    assert [annotation['bbox'] for annotation in coco['annotations']] == [[0, 0, 40, 30], [0, 0, 20, 10]]
+    assert coco['categories'] == [{'id': 0, 'name': '869'}, {'id': 1, 'name': '870'}]
+
+    # Every image goes into its own shard once the shard is full
+    shards = sorted(os.listdir(os.path.join(output, 'shards')))
+    assert shards == ['shard-00000001-000.tar', 'shard-00000001-001.tar']
+    with tarfile.open(os.path.join(output, 'shards', shards[1])) as shard:
+        assert shard.getnames() == ['00000002_870.jpg', '00000002_870.json']
+        meta = json.load(shard.extractfile('00000002_870.json'))
+    assert meta == {'barcode': '870', 'weight': 1.5, 'captured_at': '2026-01-01 10:30:00', 'lane': '1',
+                    'class_id': 1}
@@ -0,0 +1,64 @@
+from barcodes import validate_barcode
+from hid_input import KeyBurstDetector
+
+
+def type_keys(detector, text, start=0.0, gap=0.005, enter=True):
+    timestamp = start
+    for char in text:
+        detector.feed_key(char, False, timestamp)
+        timestamp += gap
+    return detector.feed_key(None, True, timestamp) if enter else None
+
+
+def make_detector(**kwargs):
+    found = []
+    return KeyBurstDetector(found.append, **kwargs), found
+
+
+def test_scanner_burst_is_emitted():
+    detector, found = make_detector(validator=validate_barcode)
+    assert type_keys(detector, '4006381333931') == '4006381333931'
+    assert found == ['4006381333931']
+    assert detector.bursts_emitted == 1
+
+
+def test_human_typing_is_dropped():
+    detector, found = make_detector()
+    assert type_keys(detector, '4006381333931', gap=0.15) is None
+    assert found == []
+    assert detector.bursts_rejected == 1
+    assert detector.keys_discarded == 13
+
+
+def test_typed_keys_before_a_scan_do_not_join_it():
+    detector, found = make_detector()
+    type_keys(detector, 'ab', gap=0.2, enter=False)
+    assert type_keys(detector, '4006381333931', start=1.0) == '4006381333931'
+    assert found == ['4006381333931']
+
+
+def test_enter_long_after_the_burst_is_rejected():
+    detector, found = make_detector()
+    type_keys(detector, '4006381333931', enter=False)
+    assert detector.feed_enter(5.0) is None
+    assert found == []
+
+
+def test_short_long_and_invalid_bursts_are_rejected():
+    detector, found = make_detector(max_length=16, validator=validate_barcode)
+    assert type_keys(detector, '1234') is None
+    assert type_keys(detector, '4006381333931' * 2, start=1.0) is None
+    assert type_keys(detector, '4006381333932', start=2.0) is None
+    assert found == []
+    assert detector.bursts_rejected == 3
+    # The next burst starts with an empty buffer
+    assert type_keys(detector, '4006381333931', start=3.0) == '4006381333931'
+
+
+def test_modifier_keys_are_skipped():
+    detector, found = make_detector(min_length=3)
+    timestamp = 0.0
+    for char in ['A', None, 'B', None, 'C']:
+        detector.feed_key(char, False, timestamp)
+        timestamp += 0.005
+    assert detector.feed_key('\r', True, timestamp) == 'ABC'
@@ -0,0 +1,98 @@
+import os
+import sqlite3
+
+import pytest
+
+from database import SQLiteManager
+from image_store import (DateShardedStore, HashShardedStore, ImageStore, capture_timestamp, make_image_store,
+                         migrate_images)
+from image_writer import thumbnail_path
+
+
+def test_names_are_unique_and_sharded(tmp_path):
+    timestamp = 1767256200.25
+    flat = ImageStore('images')
+    first, second = flat.path_for('869', '1', timestamp), flat.path_for('869', '1', timestamp)
+    assert first != second
+    assert os.path.dirname(first) == 'images'
+    assert os.path.basename(first).startswith('869_')
+    assert '-250_1_' in first
+
+    dated = DateShardedStore('images').path_for('869', '1', timestamp, unique=3)
+    assert os.path.dirname(dated).count(os.sep) == 3
+    hashed = HashShardedStore('images').path_for('869', '1', timestamp, unique=3)
+    assert hashed == HashShardedStore('images').path_for('869', '1', timestamp, unique=3)
+    assert os.path.basename(hashed) == os.path.basename(dated)
+
+    with pytest.raises(ValueError):
+        make_image_store('nested')
+
+
+def write(root, path, data=b'jpeg'):
+    full = os.path.join(root, path)
+    os.makedirs(os.path.dirname(full), exist_ok=True)
+    with open(full, 'wb') as f:
+        f.write(data)
+
+
+def make_database(db_file, rows):
+    manager = SQLiteManager(db_file)
+    manager.connect()
+    manager.create_table()
+    manager.close()
+    conn = sqlite3.connect(db_file)
+    with conn:
+        conn.executemany("""INSERT INTO ProductData (Barcode, Weight, PhotoPath, CapturedAt, Lane, DuplicateOf)
+                            VALUES (?, 1.0, ?, ?, ?, ?)""", rows)
+    conn.close()
+
+
+def photo_paths(db_file):
+    conn = sqlite3.connect(db_file)
+    try:
+        return conn.execute("SELECT PhotoPath, DuplicateOf FROM ProductData ORDER BY id").fetchall()
+    finally:
+        conn.close()
+
+
+def test_migrate_moves_files_and_rewrites_paths(tmp_path):
+    root = str(tmp_path)
+    db_file = str(tmp_path / 'product_data.db')
+    write(root, 'captured_images/a.jpg', b'a')
+    write(root, thumbnail_path('captured_images/a.jpg'), b'thumb')
+    write(root, 'captured_images/b.JPG', b'b')
+    make_database(db_file, [
+        ('869', 'captured_images/a.jpg', '2026-01-01 10:30:00.125', '1', None),
+        ('869', 'captured_images/b.JPG', '2026-01-02 11:00:00', None, 'captured_images/a.jpg'),
+        ('870', 'captured_images/gone.jpg', None, '1', None),
+    ])
+    store = DateShardedStore('store')
+
+    assert migrate_images(db_file, store, root, batch_size=1) == (2, 1)
+    (a_path, _), (b_path, duplicate_of), (gone, _) = photo_paths(db_file)
+    assert a_path == store.path_for('869', '1', capture_timestamp('2026-01-01 10:30:00.125', None), unique=1)
+    assert a_path.startswith(os.path.join('store', '2026', '01', '01'))
+    assert b_path.startswith(os.path.join('store', '2026', '01', '02')) and b_path.endswith('_default_2.jpg')
+    assert duplicate_of == a_path
+    assert gone == 'captured_images/gone.jpg'
+    with open(os.path.join(root, a_path), 'rb') as f:
+        assert f.read() == b'a'
+    assert os.path.isfile(os.path.join(root, thumbnail_path(a_path)))
+    assert not os.path.exists(os.path.join(root, 'captured_images', 'a.jpg'))
+
+    # A second run finds everything in place already
+    assert migrate_images(db_file, store, root) == (0, 1)
+    assert photo_paths(db_file)[0][0] == a_path
+
+
+def test_migrate_picks_up_files_moved_by_an_interrupted_run(tmp_path):
+    root = str(tmp_path)
+    db_file = str(tmp_path / 'product_data.db')
+    make_database(db_file, [('869', 'captured_images/a.jpg', '2026-01-01 10:30:00', '1', None)])
+    store = HashShardedStore('store')
+    # The file was moved, but the batch's rows were never rewritten
+    moved = store.path_for('869', '1', capture_timestamp('2026-01-01 10:30:00', None), unique=1)
+    write(root, moved)
+
+    assert migrate_images(db_file, store, root) == (0, 0)
+    assert photo_paths(db_file) == [(moved, None)]
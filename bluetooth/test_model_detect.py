@@ -0,0 +1,52 @@
+import re
+
+from model_detect import CombinedModelRegex, ModelDetector
+
+MODELS = {
+    'hrcr': re.compile(r'S\s{1,}([0-9.\s]+?)kg$'),
+    'st': re.compile(r'ST,GS,\s*([0-9.]+)'),
+    'plain': re.compile(r'([0-9]+\.[0-9]+)'),
+}
+
+
+def test_the_earliest_match_wins():
+    combined = CombinedModelRegex(MODELS)
+    assert combined.best('S   1.250kg') == ('hrcr', '1.250')
+    assert combined.best('ST,GS, 0.750') == ('st', '0.750')
+    assert combined.best('0.750') == ('plain', '0.750')
+    assert combined.best('---') is None
+
+
+def test_patterns_that_cannot_be_combined_are_searched_separately():
+    models = {'echo': re.compile(r'(\d+\.\d+) (\1)'), 'hrcr': MODELS['hrcr']}
+    combined = CombinedModelRegex(models)
+    assert 'echo' in combined.separate
+    assert combined.best('1.5 1.5') == ('echo', '1.5')
+    assert combined.best('S 2.0kg') == ('hrcr', '2.0')
+
+
+def test_early_lines_decide_at_once():
+    detector = ModelDetector(MODELS, early_lines=5)
+    results = [detector.feed(f'S  1.{i}00kg') for i in range(5)]
+    assert results == [None] * 4 + ['hrcr']
+    assert detector.done and detector.model == 'hrcr'
+    assert detector.feed('ST,GS, 1.0') is None
+
+
+def test_majority_after_sample_lines():
+    detector = ModelDetector(MODELS, sample_lines=10, min_share=0.6, early_lines=5)
+    lines = ['ST,GS, 1.0', 'noise'] * 3 + ['ST,GS, 1.0'] * 4
+    assert [detector.feed(line) for line in lines][-1] == 'st'
+
+
+def test_no_model_without_a_majority():
+    detector = ModelDetector(MODELS, sample_lines=6, min_share=0.6)
+    for line in ['S 1.0kg', 'ST,GS, 1.0', 'x', 'y', 'S 1.0kg', 'z']:
+        detector.feed(line)
+    assert detector.done and detector.model is None
+
+
+def test_blank_lines_are_not_counted():
+    detector = ModelDetector(MODELS)
+    detector.feed('   ')
+    assert detector.lines == 0
@@ -0,0 +1,76 @@
+import os
+import types
+
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+QtWidgets = pytest.importorskip('PyQt5.QtWidgets')
+
+from notifications import NotificationCenter  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def app():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+@pytest.fixture
+def center(app):
+    status_bar = QtWidgets.QStatusBar()
+    center = NotificationCenter(status_bar, min_interval_ms=10_000, message_timeout_ms=5000)
+    yield center
+    center.refresh_timer.stop()
+    center.expire_timer.stop()
+
+
+def test_saves_are_counted(center):
+    center.record_saved('1', '869')
+    center.record_saved('1', '870')
+    center.refresh()
+    assert center.status_bar.currentMessage() == "KASA 1 - Başarıyla kaydedildi: 870"
+    assert center.save_count_label.text() == "2 kayıt son 1 dakikada"
+
+
+def test_a_save_does_not_replace_an_error(center):
+    # Regression: a save in the same window used to overwrite the error before it was shown
+    center.error("Kamera bağlantısı koptu")
+    center.record_saved('1', '869')
+    center.refresh()
+    assert center.status_bar.currentMessage() == "Kamera bağlantısı koptu"
+
+    center.record_saved('1', '870')
+    center.refresh()
+    assert center.status_bar.currentMessage() == "Kamera bağlantısı koptu"
+    assert center.save_count_label.text() == "2 kayıt son 1 dakikada"
+
+
+def test_every_error_in_a_window_is_shown(center):
+    center.error("Terazi bağlantısı koptu")
+    center.error("Terazi bağlantısı koptu")
+    center.error("Veritabanı hatası")
+    center.refresh()
+    assert center.status_bar.currentMessage() == "Terazi bağlantısı koptu (2 kez) | Veritabanı hatası"
+    assert center.pending_errors == []
+
+
+def window_for(center, lane='1'):
+    """
+    The parts of the main window onCollectorEvent touches, around a real NotificationCenter.
+    """
+    return types.SimpleNamespace(collector=types.SimpleNamespace(lane=types.SimpleNamespace(name=lane)),
+                                 notifications=center, servicesListSerial=[], servicesListBluetooth=[],
+                                 lane_status_labels={'2': QtWidgets.QLabel()})
+
+
+@pytest.mark.parametrize('lane', ['1', '2'])
+def test_capture_and_write_failures_reach_the_status_bar(center, lane):
+    scrolldownissue = pytest.importorskip('scrolldownissue')
+    window = window_for(center)
+    window.updateLaneStatus = lambda kind, data: scrolldownissue.BluetoothManager.updateLaneStatus(window, kind, data)
+    for kind, data in (('capture_failed', {'reason': "Kamera açılamadı"}),
+                       ('photo_failed', {'error': "disk dolu"}),
+                       ('record_failed', {'error': "database is locked", 'weight': '1.0', 'path': 'a.jpg'})):
+        scrolldownissue.BluetoothManager.onCollectorEvent(window, kind, dict(data, lane=lane, barcode='869'))
+    center.refresh()
+    message = center.status_bar.currentMessage()
+    assert "Kamera açılamadı" in message and "disk dolu" in message and "database is locked" in message
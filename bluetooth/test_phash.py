@@ -0,0 +1,46 @@
+import numpy as np
+
+from phash import BKTree, DuplicateIndex, dhash, hamming, hash_to_hex, hex_to_hash
+
+
+def gradient(width=64, height=48, reverse=False):
+    row = np.linspace(0, 255, width, dtype=np.uint8)
+    frame = np.tile(row[::-1] if reverse else row, (height, 1))
+    return np.dstack([frame] * 3)
+
+
+def test_dhash_tells_apart_different_frames_and_ignores_small_noise():
+    frame = gradient()
+    noisy = np.clip(frame.astype(np.int16) + np.random.default_rng(1).integers(-2, 3, frame.shape), 0, 255)
+    assert hamming(dhash(frame), dhash(noisy.astype(np.uint8))) <= 4
+    assert hamming(dhash(frame), dhash(gradient(reverse=True))) == 64
+    assert hex_to_hash(hash_to_hex(dhash(frame))) == dhash(frame)
+
+
+def test_bk_tree_search_matches_a_linear_scan():
+    rng = np.random.default_rng(7)
+    values = [int(value) for value in rng.integers(0, 2 ** 63, 300, dtype=np.int64)]
+    tree = BKTree()
+    for i, value in enumerate(values):
+        tree.add(value, i)
+    assert tree.size == 300
+    query = values[42] ^ 0b1011
+    expected = sorted((hamming(query, value), i) for i, value in enumerate(values) if hamming(query, value) <= 20)
+    assert sorted(tree.search(query, 20)) == expected
+    assert tree.search(query, 20)[0] == (3, 42)
+
+
+def test_duplicate_index_is_per_barcode():
+    index = DuplicateIndex(threshold=2)
+    assert index.find_or_add('1', 0b1111, 'a.jpg') is None
+    assert index.find_or_add('1', 0b1101, 'b.jpg') == (1, 'a.jpg')
+    assert index.find('2', 0b1111) is None
+    assert index.find('1', 0b0000) is None
+
+
+def test_removed_photo_is_no_longer_a_match():
+    index = DuplicateIndex(threshold=2)
+    index.load([('1', hash_to_hex(0b1111), 'a.jpg'), ('1', hash_to_hex(0xff00), 'b.jpg')])
+    index.remove('1', 'a.jpg')
+    assert index.find('1', 0b1111) is None
+    assert index.find('1', 0xff00) == (0, 'b.jpg')
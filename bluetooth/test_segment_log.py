@@ -0,0 +1,123 @@
+import sqlite3
+
+import pytest
+
+from segment_log import (MAGIC, SegmentLogManager, SegmentLogWriter, encode_record, iter_segment_rows,
+                         list_segments, read_segment, replay_segments)
+
+
+def record(barcode, photo_path, weight=1.25):
+    return [barcode, weight, photo_path, '2026-01-01 10:00:00.000', 'hrcr', 'default', None, None, None]
+
+
+def write_records(directory, records, **kwargs):
+    writer = SegmentLogWriter(str(directory), fsync_interval=0, **kwargs)
+    writer.start()
+    futures = [writer.submit(item) for item in records]
+    writer.stop()
+    assert all(future.result(timeout=5) for future in futures)
+
+
+def test_records_round_trip(tmp_path):
+    write_records(tmp_path, [record('a', 'p/a.jpg'), record('b', 'p/b.jpg')])
+    [(index, path)] = list_segments(tmp_path)
+    records, valid_bytes, size = read_segment(path)
+    assert index == 1 and valid_bytes == size
+    assert [row[0] for row in records] == ['a', 'b']
+
+
+def test_segments_rotate_at_max_bytes(tmp_path):
+    size = len(encode_record(record('a', 'p/a.jpg')))
+    write_records(tmp_path, [record(str(i), f'p/{i}.jpg') for i in range(6)],
+                  max_bytes=len(MAGIC) + 2 * size, batch_size=1)
+    assert len(list_segments(tmp_path)) >= 3
+    assert [row['Barcode'] for row in iter_segment_rows(tmp_path)] == [str(i) for i in range(6)]
+
+
+def test_torn_tail_is_truncated_on_open(tmp_path):
+    write_records(tmp_path, [record('a', 'p/a.jpg'), record('b', 'p/b.jpg')])
+    [(_, path)] = list_segments(tmp_path)
+    intact = read_segment(path)[1]
+    with open(path, 'ab') as f:
+        # A crash halfway through a record leaves its header and part of the payload
+        f.write(encode_record(record('c', 'p/c.jpg'))[:-5])
+    records, valid_bytes, size = read_segment(path)
+    assert len(records) == 2 and valid_bytes == intact < size
+
+    write_records(tmp_path, [record('d', 'p/d.jpg')])
+    records, valid_bytes, size = read_segment(path)
+    assert [row[0] for row in records] == ['a', 'b', 'd'] and valid_bytes == size
+
+
+def test_corrupt_record_stops_reading(tmp_path):
+    write_records(tmp_path, [record('a', 'p/a.jpg'), record('b', 'p/b.jpg')])
+    [(_, path)] = list_segments(tmp_path)
+    with open(path, 'r+b') as f:
+        data = bytearray(f.read())
+        data[-3] ^= 0xFF
+        f.seek(0)
+        f.write(data)
+    assert [row[0] for row in read_segment(path)[0]] == ['a']
+
+
+def test_replay_loads_closed_segments_once(tmp_path):
+    segments = tmp_path / 'segments'
+    db_file = str(tmp_path / 'product_data.db')
+    write_records(segments, [record('a', 'p/a.jpg'), record('a', 'p/a.jpg'), record('b', 'p/b.jpg')])
+
+    # The newest segment may still be written to and is left alone
+    assert replay_segments(str(segments), db_file) == (0, 0)
+    assert replay_segments(str(segments), db_file, include_active=True) == (2, 1)
+    assert list_segments(segments) == []
+
+    conn = sqlite3.connect(db_file)
+    try:
+        rows = conn.execute("SELECT Barcode, Weight, Lane FROM ProductData ORDER BY id").fetchall()
+    finally:
+        conn.close()
+    assert rows == [('a', 1.25, 'default'), ('b', 1.25, 'default')]
+
+
+def test_manager_writes_through_the_storage_backend(tmp_path):
+    segments = str(tmp_path / 'segments')
+    manager = SegmentLogManager(segments, str(tmp_path / 'product_data.db'), fsync_interval=0)
+    manager.connect()
+    assert manager.insert_data('4006381333931', '1.250', 'p/a.jpg', lane='1').result(timeout=5)
+    assert not manager.insert_data('4006381333931', '1.250', '').result(timeout=5)
+    manager.close()
+    rows = [(row['Barcode'], row['Weight'], row['Lane']) for row in iter_segment_rows(segments)]
+    assert rows == [('4006381333931', 1.25, '1')]
+
+
+def test_a_segment_that_cannot_be_opened_fails_every_future(tmp_path):
+    blocker = tmp_path / 'segments'
+    blocker.write_text('not a directory')
+    manager = SegmentLogManager(str(blocker), str(tmp_path / 'product_data.db'))
+    futures = [manager.writer.submit(record(str(i), f'p/{i}.jpg')) for i in range(3)]
+    manager.start_writer()
+    for future in futures:
+        assert isinstance(future.exception(timeout=5), OSError)
+    manager.writer.join(timeout=5)
+    # The dead writer is not started again, and new records are refused
+    manager.start_writer()
+    with pytest.raises(RuntimeError):
+        manager.insert_data('4006381333931', '1.250', 'p/a.jpg')
+    manager.close()
+
+
+def test_a_failed_rotation_fails_the_batch_and_the_queue(tmp_path):
+    writer = SegmentLogWriter(str(tmp_path), max_bytes=1, fsync_interval=0, batch_size=1)
+
+    def broken_rotate():
+        writer.file.close()
+        raise ValueError("I/O operation on closed file")
+
+    writer.rotate = broken_rotate
+    futures = [writer.submit(record(str(i), f'p/{i}.jpg')) for i in range(3)]
+    writer.start()
+    for future in futures:
+        assert isinstance(future.exception(timeout=5), ValueError)
+    writer.join(timeout=5)
+    assert not writer.is_alive()
+    with pytest.raises(RuntimeError):
+        writer.submit(record('x', 'p/x.jpg'))
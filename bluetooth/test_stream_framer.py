@@ -0,0 +1,60 @@
+import pytest
+
+from stream_framer import StreamFramer
+
+
+def test_line_mode_splits_on_cr_lf_and_crlf():
+    framer = StreamFramer('line')
+    assert framer.feed(b'S 1.000kg\r\nS 1.001kg\rS 1.002kg\n\n') == ['S 1.000kg', 'S 1.001kg', 'S 1.002kg']
+
+
+def test_frame_split_across_feeds():
+    framer = StreamFramer('crlf')
+    assert framer.feed(b'40063813\r') == []
+    assert framer.feed(b'\n33931\r\n') == ['40063813', '33931']
+
+
+def test_stx_etx_drops_noise_outside_frames():
+    framer = StreamFramer('stx_etx')
+    assert framer.feed(b'noise\x02 1.250\x03junk\x02 2.5') == ['1.250']
+    assert framer.feed(b'00\x03') == ['2.500']
+    assert framer.bytes_dropped == len(b'noise') + len(b'junk')
+
+
+def test_fixed_length_frames():
+    framer = StreamFramer('fixed:4')
+    assert framer.feed(b'abcdefg') == ['abcd']
+    assert framer.feed(b'h') == ['efgh']
+
+
+def test_control_bytes_are_stripped():
+    assert StreamFramer('line').feed(b'\x1b\x0712.5\x7f\n') == ['12.5']
+
+
+def test_invalid_modes():
+    with pytest.raises(ValueError):
+        StreamFramer('tabs')
+    with pytest.raises(ValueError):
+        StreamFramer('fixed:0')
+
+
+def test_overflow_drops_the_whole_frame():
+    # Regression: the tail of an overlong frame used to be emitted as a frame of its own
+    framer = StreamFramer('line', max_buffer=16)
+    assert framer.feed(b'x' * 40) == []
+    assert framer.feed(b'yz\n') == []
+    assert framer.feed(b'ok\r\nnext\n') == ['ok', 'next']
+    assert framer.bytes_dropped == 43
+
+
+def test_overflow_keeps_a_separator_split_across_feeds():
+    framer = StreamFramer('crlf', max_buffer=8)
+    assert framer.feed(b'x' * 20 + b'\r') == []
+    assert framer.feed(b'\nab\r\n') == ['ab']
+
+
+def test_reset_clears_a_partial_frame():
+    framer = StreamFramer('line', max_buffer=8)
+    framer.feed(b'x' * 10)
+    framer.reset()
+    assert framer.feed(b'ok\n') == ['ok']
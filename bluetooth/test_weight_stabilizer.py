@@ -0,0 +1,62 @@
+from weight_stabilizer import WeightStabilizer
+
+
+def feed(stabilizer, weights, start=0.0, interval=0.1):
+    return [stabilizer.add(weight, start + i * interval) for i, weight in enumerate(weights)]
+
+
+def test_constant_weight_settles_after_stable_time():
+    stabilizer = WeightStabilizer(stable_time=0.5)
+    results = feed(stabilizer, [1.250] * 8)
+    assert results[:5] == [None] * 5
+    assert results[5:] == [1.250] * 3
+    assert stabilizer.settled_since == 0.0
+
+
+def test_small_noise_within_tolerance_is_stable():
+    stabilizer = WeightStabilizer(tolerance=0.002, stable_time=0.3)
+    results = feed(stabilizer, [0.500, 0.501, 0.500, 0.501, 0.500, 0.501])
+    assert results[-1] == 0.501
+
+
+def test_a_jump_starts_a_new_run():
+    stabilizer = WeightStabilizer(stable_time=0.3)
+    feed(stabilizer, [1.0] * 5)
+    assert stabilizer.add(2.0, 0.5) is None
+    assert stabilizer.settled_since == 0.5
+    assert stabilizer.count == 1
+
+
+def test_drifting_weight_never_settles():
+    stabilizer = WeightStabilizer(stable_time=0.3)
+    assert feed(stabilizer, [1.0 + i * 0.001 for i in range(30)]) == [None] * 30
+
+
+def test_empty_scale_is_not_stable():
+    stabilizer = WeightStabilizer(stable_time=0.2, min_weight=0.05)
+    assert feed(stabilizer, [0.0] * 10) == [None] * 10
+
+
+def test_running_sums_match_the_window_after_evictions():
+    stabilizer = WeightStabilizer(window_size=4, stable_time=0.0)
+    feed(stabilizer, [3.0, 3.001, 3.0, 3.001, 3.0, 3.001, 3.0, 3.001, 3.0])
+    assert stabilizer.count == 4
+    assert abs(stabilizer.mean - 3.0005) < 1e-3
+    assert abs(stabilizer.slope) < 0.005
+
+
+def test_reset_forgets_the_run():
+    stabilizer = WeightStabilizer(stable_time=0.0)
+    feed(stabilizer, [1.0] * 3)
+    stabilizer.reset()
+    assert stabilizer.count == 0
+    assert stabilizer.stable_weight is None
+    assert stabilizer.settled_since is None
+
+
+def test_a_flicker_of_exactly_the_tolerance_stays_in_the_run():
+    # 1.002 - 1.000 is slightly more than 0.002 in binary floating point
+    stabilizer = WeightStabilizer(tolerance=0.002, stable_time=0.4)
+    results = feed(stabilizer, [1.000, 1.000, 1.000, 1.002, 1.000, 1.000, 1.000, 1.000])
+    assert stabilizer.settled_since == 0.0
+    assert results[-1] == 1.000
@@ -0,0 +1,142 @@
+import time
+from array import array
+
+# Weights are decimal readings in binary floats: 1.002 - 1.000 comes out just above 0.002.
+# A thousandth of a gram is far below any scale division, so a reading exactly at the
+# tolerance is compared with this margin and stays in the run.
+EPSILON = 1e-6
+
+
+class WeightStabilizer:
+    """
+    Rolling window of (timestamp, weight) samples for one scale.
+
+    Mean, variance and least-squares slope are kept as running sums, so each
+    sample costs O(1). The window holds only the current settled run: a sample
+    further than `tolerance` from the window mean starts a new run. A weight is
+    stable once the run has lasted `stable_time` seconds with a standard
+    deviation within `tolerance` and a slope within `max_slope` kg/s.
+    """
+
+    def __init__(self, window_size=32, tolerance=0.002, stable_time=0.5, max_slope=0.005,
+                 min_weight=0.0, min_samples=3):
+        self.window_size = max(2, window_size)
+        self.tolerance = tolerance
+        self.stable_time = stable_time
+        self.max_slope = max_slope
+        self.min_weight = min_weight
+        self.min_samples = max(2, min_samples)
+
+        self.times = array('d', bytes(8 * self.window_size))
+        self.weights = array('d', bytes(8 * self.window_size))
+        self.reset()
+
+    def reset(self):
+        self.head = 0
+        self.count = 0
+        self.origin = 0.0
+        self.settled_since = None
+        self.evictions = 0
+        self.latest = None
+        self.stable_weight = None
+        self.clear_sums()
+
+    def clear_sums(self):
+        self.sum_t = 0.0
+        self.sum_w = 0.0
+        self.sum_tt = 0.0
+        self.sum_ww = 0.0
+        self.sum_tw = 0.0
+
+    def add(self, weight, timestamp=None):
+        """
+        Add a sample and return the stable weight, or None while the scale is settling.
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+        self.latest = weight
+
+        if self.count and abs(weight - self.mean) > self.tolerance + EPSILON:
+            # The product moved or was replaced: start a new settled run
+            self.head = 0
+            self.count = 0
+            self.clear_sums()
+
+        if self.count == 0:
+            # Timestamps are kept relative to the run start to keep the sums small
+            self.origin = timestamp
+            self.settled_since = timestamp
+            self.evictions = 0
+
+        t = timestamp - self.origin
+        if self.count == self.window_size:
+            self.remove(self.times[self.head], self.weights[self.head])
+            self.evictions += 1
+        else:
+            self.count += 1
+
+        self.times[self.head] = t
+        self.weights[self.head] = weight
+        self.head = (self.head + 1) % self.window_size
+        self.sum_t += t
+        self.sum_w += weight
+        self.sum_tt += t * t
+        self.sum_ww += weight * weight
+        self.sum_tw += t * weight
+
+        if self.evictions >= self.window_size:
+            # Recompute once per window to stop floating point drift in the running sums
+            self.recompute()
+
+        self.stable_weight = weight if self.check_stable(timestamp) else None
+        return self.stable_weight
+
+    def remove(self, t, weight):
+        self.sum_t -= t
+        self.sum_w -= weight
+        self.sum_tt -= t * t
+        self.sum_ww -= weight * weight
+        self.sum_tw -= t * weight
+
+    def recompute(self):
+        self.evictions = 0
+        self.clear_sums()
+        for i in range(self.count):
+            t = self.times[i]
+            weight = self.weights[i]
+            self.sum_t += t
+            self.sum_w += weight
+            self.sum_tt += t * t
+            self.sum_ww += weight * weight
+            self.sum_tw += t * weight
+
+    def check_stable(self, timestamp):
+        if self.count < self.min_samples or self.mean <= self.min_weight:
+            return False
+        if timestamp - self.settled_since < self.stable_time:
+            return False
+        return (self.variance <= (self.tolerance + EPSILON) ** 2
+                and abs(self.slope) <= self.max_slope + EPSILON)
+
+    @property
+    def mean(self):
+        return self.sum_w / self.count if self.count else 0.0
+
+    @property
+    def variance(self):
+        if self.count < 2:
+            return 0.0
+        mean = self.sum_w / self.count
+        return max(0.0, self.sum_ww / self.count - mean * mean)
+
+    @property
+    def slope(self):
+        """
+        Least-squares slope of weight over time in kg/s.
+        """
+        if self.count < 2:
+            return 0.0
+        denominator = self.count * self.sum_tt - self.sum_t * self.sum_t
+        if denominator <= 0:
+            return 0.0
+        return (self.count * self.sum_tw - self.sum_t * self.sum_w) / denominator